@@ -3,13 +3,15 @@ const axios = require('axios');
 const router = express.Router();
 
 const ML_SERVICE_URL = process.env.ML_SERVICE_URL || 'http://localhost:8000';
+// Read-only query endpoints can be served by the async ML service (app_async.py)
+const ML_QUERY_SERVICE_URL = process.env.ML_QUERY_SERVICE_URL || ML_SERVICE_URL;
 
 // GET /api/correlation/:symbol - Get sentiment-price correlation
 router.get('/:symbol', async (req, res) => {
   try {
     const symbol = req.params.symbol.toUpperCase();
     
-    const response = await axios.post(`${ML_SERVICE_URL}/analyze-correlation`, {
+    const response = await axios.post(`${ML_QUERY_SERVICE_URL}/analyze-correlation`, {
       symbol: symbol
     });
     
@@ -3,6 +3,8 @@ const axios = require('axios');
 const router = express.Router();
 
 const ML_SERVICE_URL = process.env.ML_SERVICE_URL || 'http://localhost:8000';
+// Read-only query endpoints can be served by the async ML service (app_async.py)
+const ML_QUERY_SERVICE_URL = process.env.ML_QUERY_SERVICE_URL || ML_SERVICE_URL;
 
 // GET /api/news/:symbol - Get filtered news for a stock
 router.get('/:symbol', async (req, res) => {
@@ -10,7 +12,7 @@ router.get('/:symbol', async (req, res) => {
     const symbol = req.params.symbol.toUpperCase();
     const count = req.query.count || 50;
     
-    const response = await axios.post(`${ML_SERVICE_URL}/get-news`, {
+    const response = await axios.post(`${ML_QUERY_SERVICE_URL}/get-news`, {
       symbol: symbol,
       count: parseInt(count)
     });
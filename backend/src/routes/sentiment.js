@@ -4,6 +4,8 @@ const router = express.Router();
 
 // ML Service configuration
 const ML_SERVICE_URL = process.env.ML_SERVICE_URL || 'http://localhost:8000';
+// Read-only query endpoints can be served by the async ML service (app_async.py)
+const ML_QUERY_SERVICE_URL = process.env.ML_QUERY_SERVICE_URL || ML_SERVICE_URL;
 
 // GET /api/sentiment/:symbol - Get sentiment analysis for a stock
 router.get('/:symbol', async (req, res) => {
@@ -11,7 +13,7 @@ router.get('/:symbol', async (req, res) => {
     const symbol = req.params.symbol.toUpperCase();
     
     // Call your Python ML service
-    const response = await axios.post(`${ML_SERVICE_URL}/analyze-sentiment`, {
+    const response = await axios.post(`${ML_QUERY_SERVICE_URL}/analyze-sentiment`, {
       symbol: symbol,
       count: 50  // Number of articles to analyze
     });
@@ -77,7 +79,7 @@ router.post('/batch', async (req, res) => {
       });
     }
     
-    const response = await axios.post(`${ML_SERVICE_URL}/analyze-batch`, {
+    const response = await axios.post(`${ML_QUERY_SERVICE_URL}/analyze-batch`, {
       symbols: symbols,
       count: count
     });
@@ -48,8 +48,56 @@ CREATE TABLE IF NOT EXISTS sentiment_scores (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Per-symbol, per-day sentiment rollup, updated whenever sentiment scores are inserted
+CREATE TABLE IF NOT EXISTS daily_sentiment_aggregates (
+    id SERIAL PRIMARY KEY,
+    stock_id INTEGER REFERENCES stocks(id),
+    day DATE NOT NULL,
+    article_count INTEGER NOT NULL DEFAULT 0,
+    score_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    score_sum_sq DOUBLE PRECISION NOT NULL DEFAULT 0,
+    score_min DECIMAL(5,4),
+    score_max DECIMAL(5,4),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(stock_id, day)
+);
+
+-- Close-to-close return per trading day (against the previous stored trading day),
+-- updated whenever prices are upserted
+CREATE TABLE IF NOT EXISTS stock_daily_returns (
+    stock_id INTEGER REFERENCES stocks(id),
+    date DATE NOT NULL,
+    prev_date DATE NOT NULL,
+    close_price DECIMAL(10,2) NOT NULL,
+    price_change DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (stock_id, date)
+);
+
+-- One row per job_runner run (collection jobs), for the /jobs history API
+CREATE TABLE IF NOT EXISTS job_runs (
+    id SERIAL PRIMARY KEY,
+    job_name VARCHAR(100) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    started_at TIMESTAMP NOT NULL,
+    finished_at TIMESTAMP,
+    duration_seconds DOUBLE PRECISION,
+    rows_processed INTEGER,
+    error TEXT,
+    host VARCHAR(255)
+);
+
+-- Outbound API calls per provider per day (quota ledger, see api_usage.py)
+CREATE TABLE IF NOT EXISTS api_usage (
+    day DATE NOT NULL,
+    provider VARCHAR(50) NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (day, provider)
+);
+
 -- Create indexes for performance
 CREATE INDEX idx_sentiment_scores_stock_created ON sentiment_scores(stock_id, created_at);
 CREATE INDEX idx_news_published ON news_articles(published_at);
 CREATE INDEX idx_stock_prices_date ON stock_prices(stock_id, date);
-CREATE INDEX idx_article_stock_relations ON article_stock_relations(stock_id, article_id);
\ No newline at end of file
+CREATE INDEX idx_article_stock_relations ON article_stock_relations(stock_id, article_id);
+CREATE INDEX idx_job_runs_name_started ON job_runs(job_name, started_at DESC);
\ No newline at end of file
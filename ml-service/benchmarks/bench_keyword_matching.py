@@ -0,0 +1,62 @@
+# ml-service/benchmarks/bench_keyword_matching.py
+"""
+filter_relevant_articles at scale: synthetic 5,000-ticker keyword map, 100k headlines.
+
+The old per-keyword substring scan is timed on a sample and extrapolated,
+since running it on the full corpus takes far too long.
+
+Usage: python benchmarks/bench_keyword_matching.py [num_tickers] [num_headlines]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from keyword_matcher import KeywordMatcher
+from synthetic import make_headlines, make_keyword_map
+
+def naive_filter(articles, company_keywords):
+    """The previous implementation: every keyword of every symbol per article"""
+    relevant_articles = {symbol: [] for symbol in company_keywords}
+    for article in articles:
+        search_text = f"{article['title']} {article['description']}".lower()
+        for symbol, keywords in company_keywords.items():
+            for keyword in keywords:
+                if keyword.lower() in search_text:
+                    relevant_articles[symbol].append(article)
+                    break
+    return relevant_articles
+
+
+if __name__ == "__main__":
+    num_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    num_headlines = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+    rng = random.Random(42)
+    keyword_map = make_keyword_map(num_tickers, rng)
+    headlines = make_headlines(num_headlines, keyword_map, rng)
+
+    from news_Collection import filter_relevant_articles
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(keyword_map)
+    build_seconds = time.perf_counter() - start
+
+    # Filter with the matcher built above, so construction is not timed twice
+    start = time.perf_counter()
+    result = filter_relevant_articles(headlines, matcher)
+    matcher_seconds = time.perf_counter() - start
+    matches = sum(len(articles) for articles in result.values())
+
+    sample = headlines[:500]
+    start = time.perf_counter()
+    naive_filter(sample, keyword_map)
+    naive_seconds = (time.perf_counter() - start) * len(headlines) / len(sample)
+
+    print(f"Tickers: {num_tickers}, keywords: {sum(len(k) for k in keyword_map.values())}, headlines: {num_headlines}")
+    print(f"Matcher build:             {build_seconds:.2f} s")
+    print(f"Compiled matcher:          {matcher_seconds:.2f} s ({matches} symbol matches)")
+    print(f"Naive scan (extrapolated): {naive_seconds:.2f} s")
+    print(f"Speedup: {naive_seconds / matcher_seconds:.0f}x")
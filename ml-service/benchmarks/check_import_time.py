@@ -0,0 +1,147 @@
+# ml-service/benchmarks/check_import_time.py
+"""
+Import-time budget check for the service's entry points and CLI tools.
+
+Imports each module in a fresh interpreter under `python -X importtime` and
+fails (exit status 1) when
+  - its cumulative import time (median of --repeat runs) is over budget, or
+  - it pulls in a heavy dependency that must only load on first use
+    (e.g. init_db importing numpy, or anything importing TextBlob/VADER).
+
+The test suite runs the same check (tests/test_import_time.py); run it by hand
+for a report before merging changes to module-level imports:
+  python benchmarks/check_import_time.py [--repeat 5] [--scale 1.5] [--output results.json]
+
+--scale multiplies every budget, for slow CI machines.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Cumulative import time budget per module, in milliseconds (about 2-3x what
+# they measure on a developer laptop, so only real regressions trip them)
+IMPORT_BUDGETS_MS = {
+    'app': 800,
+    # Quart and hypercorn alone take about 300 ms, and they cannot load lazily
+    'app_async': 1000,
+    'init_db': 250,
+    'backfill_sentiment': 450,
+    'daily_data_collector': 300,
+    'corpus_export': 250,
+    'database': 250,
+    'database_queries': 250,
+    'news_Collection': 250,
+    'stock_data': 250
+}
+
+# Loaded lazily on first use; importing the module must not pull these in
+SENTIMENT_MODELS = ['textblob', 'vaderSentiment']
+LAZY_DEPENDENCIES = {
+    'app': SENTIMENT_MODELS,
+    'app_async': SENTIMENT_MODELS + ['numpy', 'requests', 'flask', 'asyncpg'],
+    'init_db': SENTIMENT_MODELS + ['numpy', 'requests', 'flask'],
+    'backfill_sentiment': SENTIMENT_MODELS + ['requests', 'flask'],
+    'daily_data_collector': SENTIMENT_MODELS + ['numpy', 'requests', 'flask'],
+    'corpus_export': SENTIMENT_MODELS + ['pyarrow', 'numpy', 'requests', 'flask'],
+    'database': SENTIMENT_MODELS + ['numpy', 'requests', 'flask'],
+    'database_queries': SENTIMENT_MODELS + ['numpy', 'requests', 'flask'],
+    'news_Collection': SENTIMENT_MODELS + ['numpy', 'requests', 'flask'],
+    'stock_data': SENTIMENT_MODELS + ['numpy', 'requests', 'flask']
+}
+
+
+def measure(module):
+    """
+    Import module once under -X importtime
+
+    Returns:
+    tuple: (cumulative import time in ms, set of every module imported)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=SRC_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            cumulative_us = int(cumulative)
+    return cumulative_us / 1000, imported
+
+
+def check(modules, repeat, scale):
+    """
+    Measure every module and compare against its budget
+
+    Returns:
+    dict: {module: {'median_ms', 'budget_ms', 'over_budget', 'eager_dependencies'}}
+    """
+    results = {}
+    for module in modules:
+        # First run also writes .pyc files; don't count it
+        measure(module)
+        timings = []
+        imported = set()
+        for _ in range(repeat):
+            milliseconds, imported = measure(module)
+            timings.append(milliseconds)
+
+        median = statistics.median(timings)
+        budget = IMPORT_BUDGETS_MS[module] * scale
+        eager = sorted(
+            dependency for dependency in LAZY_DEPENDENCIES.get(module, [])
+            if dependency in {name.split('.')[0] for name in imported}
+        )
+        results[module] = {
+            'median_ms': round(median, 1),
+            'budget_ms': budget,
+            'over_budget': median > budget,
+            'eager_dependencies': eager
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every budget (slow machines)')
+    parser.add_argument('--modules', help='Comma-separated subset of: ' + ', '.join(IMPORT_BUDGETS_MS))
+    parser.add_argument('--output', help='Write results JSON here')
+    args = parser.parse_args()
+
+    modules = args.modules.split(',') if args.modules else list(IMPORT_BUDGETS_MS)
+    results = check(modules, args.repeat, args.scale)
+
+    failed = False
+    for module, result in results.items():
+        problems = []
+        if result['over_budget']:
+            problems.append('over budget')
+        if result['eager_dependencies']:
+            problems.append('imports ' + ', '.join(result['eager_dependencies']) + ' eagerly')
+        failed = failed or bool(problems)
+        print(f"{module:22s} {result['median_ms']:7.1f} ms / {result['budget_ms']:5.0f} ms  "
+              + ('FAIL: ' + '; '.join(problems) if problems else 'ok'))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
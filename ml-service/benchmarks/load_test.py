@@ -0,0 +1,203 @@
+# ml-service/benchmarks/load_test.py
+"""
+Closed-loop HTTP load generator for comparing ways of serving the ML service.
+
+Each of --concurrency client threads sends requests back to back (one
+keep-alive session per thread) for --duration seconds, cycling through a
+mix of read routes. Reports overall throughput plus per-route latency
+percentiles and error counts, as JSON with --output.
+
+Compare servers by starting each against the same database and running the
+same command, e.g.:
+  python src/app.py                                  (dev server, port 8000)
+  gunicorn -c gunicorn.conf.py                       (production, port 8000)
+  python benchmarks/load_test.py --url http://127.0.0.1:8000 --concurrency 16
+
+Compare the sync (Flask) and async (Quart) query endpoints in one run; with
+--compare the same load is sent to each server in turn and summarised side
+by side. --routes query selects just the four query endpoints both serve:
+  gunicorn -c gunicorn.conf.py                                   (port 8000)
+  hypercorn -c file:hypercorn.conf.py src/app_async.py:app       (port 8001)
+  python benchmarks/load_test.py --compare http://127.0.0.1:8000,http://127.0.0.1:8001 \
+      --routes query --concurrency 200
+
+Usage:
+  python benchmarks/load_test.py [--url URL | --compare URL,URL] [--concurrency N] [--duration S]
+                                 [--warmup S] [--routes a,b|query] [--output results.json]
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from synthetic import make_sentiment_headlines
+
+SYMBOLS = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'META', 'TSLA', 'NVDA']
+TEXTS = make_sentiment_headlines(200)
+
+
+def route_requests(name, i):
+    """(method, path, json body) for the i-th request of a route"""
+    symbol = SYMBOLS[i % len(SYMBOLS)]
+    if name == 'health':
+        return 'GET', '/', None
+    if name == 'analyze-text':
+        return 'POST', '/analyze-text', {'text': TEXTS[i % len(TEXTS)]}
+    if name == 'analyze-batch':
+        return 'POST', '/analyze-batch', {'symbols': SYMBOLS[:3 + i % 4]}
+    if name == 'get-news':
+        return 'POST', '/get-news', {'symbol': symbol, 'count': 20}
+    if name == 'analyze-sentiment':
+        return 'POST', '/analyze-sentiment', {'symbol': symbol}
+    if name == 'analyze-correlation':
+        return 'POST', '/analyze-correlation', {'symbol': symbol}
+    raise ValueError(f"unknown route {name}")
+
+
+ROUTES = ['health', 'analyze-text', 'analyze-batch', 'get-news', 'analyze-sentiment', 'analyze-correlation']
+# Served by both app.py and app_async.py
+QUERY_ROUTES = ['analyze-batch', 'get-news', 'analyze-sentiment', 'analyze-correlation']
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def run_load(url, routes, concurrency, duration, warmup):
+    """
+    Drive the server and collect per-request latencies
+
+    Returns:
+    dict: {'requests', 'errors', 'requests_per_second', 'routes': {route: stats}}
+    """
+    latencies = {route: [] for route in routes}
+    errors = {route: 0 for route in routes}
+    lock = threading.Lock()
+    start_at = time.perf_counter() + warmup
+    stop_at = start_at + duration
+
+    def client(worker):
+        session = requests.Session()
+        i = worker
+        local = {route: [] for route in routes}
+        local_errors = {route: 0 for route in routes}
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                break
+            route = routes[i % len(routes)]
+            method, path, body = route_requests(route, i)
+            i += concurrency
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url + path, json=body, timeout=60)
+                ok = response.status_code < 500
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            # Requests that started during warm-up are not counted
+            if started >= start_at:
+                if ok:
+                    local[route].append(elapsed)
+                else:
+                    local_errors[route] += 1
+        with lock:
+            for route in routes:
+                latencies[route].extend(local[route])
+                errors[route] += local_errors[route]
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    route_stats = {}
+    for route in routes:
+        values = sorted(latencies[route])
+        route_stats[route] = {
+            'requests': len(values),
+            'errors': errors[route],
+            'mean_ms': statistics.fmean(values) * 1000 if values else None,
+            'p50_ms': percentile(values, 0.50) * 1000 if values else None,
+            'p95_ms': percentile(values, 0.95) * 1000 if values else None,
+            'p99_ms': percentile(values, 0.99) * 1000 if values else None
+        }
+
+    total = sum(stats['requests'] for stats in route_stats.values())
+    return {
+        'requests': total,
+        'errors': sum(errors.values()),
+        'requests_per_second': total / duration,
+        'routes': route_stats
+    }
+
+
+def print_results(results, concurrency, duration):
+    print(f"{results['requests']} requests in {duration:.0f}s "
+          f"({results['requests_per_second']:.1f} req/s, {results['errors']} errors) at concurrency {concurrency}")
+    for route, stats in results['routes'].items():
+        if stats['requests']:
+            print(f"  {route:22s} {stats['requests']:7d} req  p50 {stats['p50_ms']:7.1f} ms  "
+                  f"p95 {stats['p95_ms']:7.1f} ms  p99 {stats['p99_ms']:7.1f} ms  errors {stats['errors']}")
+        else:
+            print(f"  {route:22s} no successful requests, errors {stats['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--compare', help='Comma-separated base URLs to load in turn (overrides --url)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--routes', default=','.join(ROUTES),
+                        help='"query" or a comma-separated subset of: ' + ', '.join(ROUTES))
+    parser.add_argument('--output', help='Write results JSON here')
+    args = parser.parse_args()
+
+    if args.routes == 'query':
+        routes = QUERY_ROUTES
+    else:
+        routes = [route for route in args.routes.split(',') if route]
+    urls = [url.rstrip('/') for url in args.compare.split(',')] if args.compare else [args.url.rstrip('/')]
+
+    runs = []
+    for url in urls:
+        print(f"--- {url}")
+        results = run_load(url, routes, args.concurrency, args.duration, args.warmup)
+        print_results(results, args.concurrency, args.duration)
+        runs.append({'url': url, **results})
+
+    if len(runs) > 1:
+        print(f"\n{'server':32s} {'req/s':>8s} {'errors':>7s} {'p50 ms':>8s} {'p99 ms':>8s}  (slowest route)")
+        for run in runs:
+            served = [stats for stats in run['routes'].values() if stats['requests']]
+            p50 = max((stats['p50_ms'] for stats in served), default=float('nan'))
+            p99 = max((stats['p99_ms'] for stats in served), default=float('nan'))
+            print(f"{run['url']:32s} {run['requests_per_second']:8.1f} {run['errors']:7d} {p50:8.1f} {p99:8.1f}")
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'concurrency': args.concurrency,
+        'duration_seconds': args.duration
+    }
+    if args.compare:
+        report['runs'] = runs
+    else:
+        report.update(runs[0])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
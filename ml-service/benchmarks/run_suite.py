@@ -0,0 +1,304 @@
+# ml-service/benchmarks/run_suite.py
+"""
+End-to-end benchmark suite with JSON output, for tracking regressions across versions.
+
+Generates a synthetic corpus at the chosen scale and times keyword filtering,
+sentiment scoring, the correlation path and (with --db) bulk ingest plus every
+database_queries function against PostgreSQL. Database benchmarks use the
+usual DB_* / DATABASE_URL settings, or an embedded server via --pgserver DIR
+(needs the pgserver package). Synthetic stocks are prefixed BENCH and are
+removed again afterwards.
+
+Usage:
+  python benchmarks/run_suite.py [--scale small|medium|large] [--seed N]
+                                 [--db] [--pgserver DIR] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from synthetic import (
+    make_articles, make_headlines, make_keyword_map, make_price_series,
+    make_sentiment_headlines, make_symbol
+)
+
+SCALES = {
+    'small': {
+        'tickers': 200, 'headlines': 5000, 'sentiment_texts': 1000,
+        'correlation_symbols': 20, 'years': 2,
+        'db_symbols': 10, 'db_articles': 2000, 'query_repeats': 5
+    },
+    'medium': {
+        'tickers': 2000, 'headlines': 50000, 'sentiment_texts': 5000,
+        'correlation_symbols': 100, 'years': 5,
+        'db_symbols': 50, 'db_articles': 20000, 'query_repeats': 10
+    },
+    'large': {
+        'tickers': 5000, 'headlines': 100000, 'sentiment_texts': 20000,
+        'correlation_symbols': 300, 'years': 10,
+        'db_symbols': 200, 'db_articles': 100000, 'query_repeats': 20
+    }
+}
+
+BENCH_PREFIX = 'BENCH'
+BENCH_URL_PREFIX = 'bench://article'
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def record(results, name, seconds, items=None, **extra):
+    entry = {'seconds': round(seconds, 6)}
+    if items:
+        entry['items'] = items
+        entry['per_item_ms'] = round(seconds / items * 1000, 6)
+        entry['items_per_second'] = round(items / seconds, 1) if seconds else None
+    entry.update(extra)
+    results[name] = entry
+    print(f"  {name:40s} {seconds * 1000:10.1f} ms" + (f"  ({items} items)" if items else ""), file=sys.stderr)
+
+
+def bench_keyword_matching(results, scale, seed):
+    from keyword_matcher import KeywordMatcher
+    from news_Collection import filter_relevant_articles
+
+    rng = random.Random(seed)
+    keyword_map = make_keyword_map(scale['tickers'], rng)
+    headlines = make_headlines(scale['headlines'], keyword_map, rng)
+
+    seconds, matcher = timed(KeywordMatcher, keyword_map)
+    record(results, 'keyword_matcher.build', seconds, scale['tickers'])
+
+    # Reuse the built matcher so the filter timing excludes construction
+    seconds, matched = timed(filter_relevant_articles, headlines, matcher)
+    record(results, 'filter_relevant_articles', seconds, len(headlines),
+           matches=sum(len(articles) for articles in matched.values()))
+
+
+def bench_sentiment(results, scale, seed):
+    from models.Combined_Sentiment import analyze_sentiment_batch, analyze_sentiment_combined
+    from models.Sentiment_Memo import get_sentiment_memo
+
+    texts = make_sentiment_headlines(scale['sentiment_texts'], seed)
+    # Unique suffixes so the memo cannot answer; the model cost is what we track
+    unique_texts = [f"{text} #{i}" for i, text in enumerate(texts)]
+
+    memo = get_sentiment_memo()
+    memo_size, memo_path = memo.max_entries, memo.path
+    memo.max_entries, memo.path = 0, ''
+    try:
+        analyze_sentiment_combined("warm up the lexicons")
+        seconds, _ = timed(lambda: [analyze_sentiment_combined(text) for text in unique_texts])
+        record(results, 'analyze_sentiment_combined', seconds, len(unique_texts))
+
+        seconds, _ = timed(analyze_sentiment_batch, unique_texts, processes=1)
+        record(results, 'analyze_sentiment_batch', seconds, len(unique_texts))
+    finally:
+        memo.max_entries, memo.path = memo_size, memo_path
+
+    memo.clear()
+    seconds, _ = timed(lambda: [analyze_sentiment_combined(text) for text in texts])
+    record(results, 'analyze_sentiment_combined.memo', seconds, len(texts))
+
+
+def bench_correlation(results, scale, seed):
+    from correlation_engine import correlate_series
+    from stock_sentiment_correlation import correlate_sentiment_with_prices
+
+    np_rng = np.random.default_rng(seed)
+    universe = [make_symbol(np_rng, scale['years']) for _ in range(scale['correlation_symbols'])]
+
+    seconds, _ = timed(lambda: [correlate_series(*series) for series in universe])
+    record(results, 'correlate_series', seconds, len(universe), years=scale['years'])
+
+    # The dict-based entry point, as the scripts call it
+    inputs = []
+    for news_dates, sentiment, trading_days, closes in universe:
+        articles = [
+            {'publishedAt': f"{day}T12:00:00Z", 'sentiment_score': float(score)}
+            for day, score in zip(news_dates.astype(str), sentiment)
+        ]
+        stock_data = [{'date': str(day), 'close': float(close)} for day, close in zip(trading_days, closes)]
+        inputs.append((articles, stock_data))
+
+    seconds, _ = timed(lambda: [correlate_sentiment_with_prices('BENCH', a, p) for a, p in inputs])
+    record(results, 'correlate_sentiment_with_prices', seconds, len(inputs), years=scale['years'])
+
+
+def _cleanup_bench_rows(cursor):
+    cursor.execute("SELECT id FROM stocks WHERE symbol LIKE %s", (f"{BENCH_PREFIX}%",))
+    stock_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT id FROM news_articles WHERE url LIKE %s", (f"{BENCH_URL_PREFIX}%",))
+    article_ids = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute("DELETE FROM sentiment_scores WHERE article_id = ANY(%s) OR stock_id = ANY(%s)", (article_ids, stock_ids))
+    cursor.execute("DELETE FROM article_stock_relations WHERE article_id = ANY(%s) OR stock_id = ANY(%s)", (article_ids, stock_ids))
+    cursor.execute("DELETE FROM news_articles WHERE id = ANY(%s)", (article_ids,))
+    for table in ('daily_sentiment_aggregates', 'stock_daily_returns', 'stock_prices'):
+        cursor.execute(f"DELETE FROM {table} WHERE stock_id = ANY(%s)", (stock_ids,))
+    cursor.execute("DELETE FROM stocks WHERE id = ANY(%s)", (stock_ids,))
+
+
+def bench_database(results, scale, seed):
+    import database_queries as queries
+    from database import db_connection, save_articles_bulk, save_stock_prices
+    from init_db import create_tables
+    from news_Collection import filter_relevant_articles
+    from symbol_registry import get_symbol_registry
+
+    if not create_tables():
+        raise RuntimeError("could not create schema")
+
+    rng = random.Random(seed)
+    keyword_map = make_keyword_map(scale['db_symbols'], rng, prefix=BENCH_PREFIX)
+    symbols = list(keyword_map)
+
+    with db_connection() as conn:
+        if not conn:
+            raise RuntimeError("no database connection")
+        cursor = conn.cursor()
+        _cleanup_bench_rows(cursor)
+        cursor.executemany(
+            "INSERT INTO stocks (symbol, name) VALUES (%s, %s)",
+            [(symbol, keywords[0]) for symbol, keywords in keyword_map.items()]
+        )
+        conn.commit()
+    get_symbol_registry().invalidate()
+
+    try:
+        # Articles dated up to "now" so the windowed queries see them
+        articles = make_articles(scale['db_articles'], keyword_map, rng, days=365,
+                                 url_prefix=BENCH_URL_PREFIX, end=datetime.now())
+        filtered = filter_relevant_articles(articles, keyword_map)
+
+        seconds, inserted = timed(save_articles_bulk, filtered, lambda new: [0.0] * len(new))
+        record(results, 'save_articles_bulk', seconds, len(articles),
+               inserted=sum(len(rows) for rows in (inserted or {}).values()))
+
+        np_rng = np.random.default_rng(seed)
+        today = np.datetime64(datetime.now().date())
+        start = str(today - 365 * scale['years'])
+        price_rows = 0
+        price_seconds = 0.0
+        for symbol in symbols:
+            trading_days, closes = make_price_series(np_rng, scale['years'], start=start)
+            stock_data = [{'date': str(day), 'close': round(float(close), 2)} for day, close in zip(trading_days, closes)]
+            seconds, _ = timed(save_stock_prices, symbol, stock_data)
+            price_seconds += seconds
+            price_rows += len(stock_data)
+        record(results, 'save_stock_prices', price_seconds, price_rows, symbols=len(symbols))
+
+        sample = symbols[:10]
+        cases = {
+            'get_articles_with_sentiment': lambda s: queries.get_articles_with_sentiment(s, days_back=365, limit=100),
+            'get_correlation_data': lambda s: queries.get_correlation_data(s, days_back=365),
+            'get_daily_sentiment': lambda s: queries.get_daily_sentiment(s, days_back=90),
+            'get_sentiment_summary': lambda s: queries.get_sentiment_summary(s, days_back=365),
+            'check_data_freshness': lambda s: queries.check_data_freshness(s, hours=24 * 30),
+        }
+        for name, case in cases.items():
+            timings = []
+            for _ in range(scale['query_repeats']):
+                for symbol in sample:
+                    seconds, _ = timed(case, symbol)
+                    timings.append(seconds)
+            record(results, f"query.{name}", statistics.median(timings),
+                   p95_ms=round(np.percentile(timings, 95) * 1000, 3), calls=len(timings))
+
+        for name, case in {
+            'get_batch_sentiment_summary': lambda: queries.get_batch_sentiment_summary(symbols, days_back=30),
+            'get_article_counts': lambda: queries.get_article_counts(days_back=365),
+        }.items():
+            timings = [timed(case)[0] for _ in range(scale['query_repeats'])]
+            record(results, f"query.{name}", statistics.median(timings),
+                   p95_ms=round(np.percentile(timings, 95) * 1000, 3), calls=len(timings))
+    finally:
+        with db_connection() as conn:
+            if conn:
+                _cleanup_bench_rows(conn.cursor())
+                conn.commit()
+        get_symbol_registry().invalidate()
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def start_embedded_postgres(data_dir):
+    """Point the DB settings at a pgserver instance (created on first use)"""
+    import pgserver
+
+    server = pgserver.get_server(data_dir, cleanup_mode=None)
+    if 'sentiment_bench' not in server.psql("SELECT datname FROM pg_database;"):
+        server.psql("CREATE DATABASE sentiment_bench;")
+    os.environ.pop('DATABASE_URL', None)
+    os.environ.update({'DB_HOST': data_dir, 'DB_NAME': 'sentiment_bench', 'DB_USER': 'postgres'})
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', action='store_true', help='also run ingest and query benchmarks')
+    parser.add_argument('--pgserver', metavar='DIR', help='run the database benchmarks on an embedded server')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    server = start_embedded_postgres(args.pgserver) if args.pgserver else None
+
+    results = {}
+    errors = {}
+    groups = [bench_keyword_matching, bench_sentiment, bench_correlation]
+    if args.db or server:
+        groups.append(bench_database)
+
+    for group in groups:
+        print(f"{group.__name__}:", file=sys.stderr)
+        try:
+            group(results, scale, args.seed)
+        except Exception as e:
+            errors[group.__name__] = f"{type(e).__name__}: {e}"
+            print(f"  failed: {errors[group.__name__]}", file=sys.stderr)
+
+    report = {
+        'suite': 'ml-service',
+        'revision': git_revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': args.scale,
+        'parameters': scale,
+        'seed': args.seed,
+        'results': results,
+        'errors': errors
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(output)
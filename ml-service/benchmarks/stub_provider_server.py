@@ -0,0 +1,131 @@
+# ml-service/benchmarks/stub_provider_server.py
+"""
+Local stand-in for NewsAPI and Alpha Vantage, for running the collectors offline.
+
+Usage:
+    python benchmarks/stub_provider_server.py [port]
+
+Then point the collectors at it:
+    NEWS_API_BASE_URL=http://localhost:8765/v2 \
+    ALPHA_VANTAGE_BASE_URL=http://localhost:8765 \
+    NEWS_API_KEY=stub ALPHA_VANTAGE_KEY=stub \
+    ALPHA_VANTAGE_CALLS_PER_MINUTE=600 \
+    python src/daily_data_collector.py once
+
+Tests start it in-process with make_stub_server() (tests/test_fetch_layer.py).
+"""
+import json
+import random
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+COMPANIES = ['Apple', 'Google', 'Microsoft', 'Amazon', 'Meta', 'Tesla', 'Nvidia']
+EVENTS = ['beats estimates', 'misses targets', 'unveils new product', 'faces probe', 'rallies', 'slumps']
+
+
+def headlines_payload(category, count):
+    rng = random.Random(f"{category}-{date.today()}")
+    now = datetime.utcnow()
+    articles = []
+    for i in range(count):
+        company = rng.choice(COMPANIES)
+        articles.append({
+            'source': {'id': None, 'name': 'Stub News'},
+            'author': 'Stub Reporter',
+            'title': f"{company} {rng.choice(EVENTS)}",
+            'description': f"{category.title()} coverage of {company}.",
+            'url': f"https://stub.local/{category}/{date.today()}/{i}",
+            'urlToImage': None,
+            'publishedAt': (now - timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'content': None
+        })
+    return {'status': 'ok', 'totalResults': len(articles), 'articles': articles}
+
+
+def daily_series_payload(symbol, outputsize):
+    rng = random.Random(symbol)
+    days = 100 if outputsize == 'compact' else 5000
+    series = {}
+    price = 100 + rng.random() * 200
+    day = date.today()
+    while len(series) < days:
+        if day.weekday() < 5:
+            price *= 1 + rng.gauss(0, 0.02)
+            series[day.isoformat()] = {
+                '1. open': f"{price:.4f}", '2. high': f"{price * 1.01:.4f}",
+                '3. low': f"{price * 0.99:.4f}", '4. close': f"{price:.4f}",
+                '5. volume': str(rng.randint(10 ** 6, 10 ** 8))
+            }
+        day -= timedelta(days=1)
+    return {
+        'Meta Data': {'2. Symbol': symbol, '4. Output Size': outputsize},
+        'Time Series (Daily)': series
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Per-server state, set by make_stub_server
+    fail_next = 0
+    fail_status = 503
+    request_log = None
+    state_lock = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        with self.state_lock:
+            self.request_log.append((time.monotonic(), url.path, params))
+            failing = self.fail_next > 0
+            if failing:
+                type(self).fail_next -= 1
+        if failing:
+            self.send_error(self.fail_status)
+            return
+
+        if url.path == '/v2/top-headlines':
+            payload = headlines_payload(params.get('category', 'general'), int(params.get('pageSize', 20)))
+        elif url.path == '/query' and params.get('function') == 'TIME_SERIES_DAILY':
+            payload = daily_series_payload(params.get('symbol', 'AAPL'), params.get('outputsize', 'compact'))
+        else:
+            self.send_error(404)
+            return
+
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_stub_server(port=0, host='127.0.0.1'):
+    """
+    Stub server with its own request log and failure injection
+
+    Set server.handler.fail_next = N to answer the next N requests with
+    server.handler.fail_status. server.handler.request_log holds
+    (monotonic time, path, params) for every request. Port 0 picks a free port.
+
+    Returns:
+    ThreadingHTTPServer: not yet serving; call serve_forever() (e.g. on a thread)
+    """
+    handler = type('StubHandler', (StubHandler,), {
+        'fail_next': 0, 'request_log': [], 'state_lock': threading.Lock()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.handler = handler
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    print(f"Stub NewsAPI/Alpha Vantage listening on http://localhost:{port}")
+    make_stub_server(port, '0.0.0.0').serve_forever()
@@ -0,0 +1,117 @@
+# ml-service/benchmarks/synthetic.py
+"""
+Deterministic synthetic data for the benchmarks: keyword maps, NewsAPI-shaped
+articles, sentiment-bearing headlines and multi-year price series.
+
+Everything takes an explicit seed / RNG so runs are reproducible.
+"""
+import random
+import string
+from datetime import datetime, timedelta
+
+import numpy as np
+
+FILLER = [
+    'shares', 'rise', 'fall', 'after', 'earnings', 'report', 'analysts', 'expect',
+    'growth', 'market', 'investors', 'quarter', 'guidance', 'deal', 'launch', 'new'
+]
+
+COMPANIES = ['Apple', 'Google', 'Microsoft', 'Amazon', 'Meta', 'Tesla', 'Nvidia']
+EVENTS = [
+    'beats earnings expectations', 'misses revenue targets', 'announces layoffs',
+    'unveils new AI chips', 'faces antitrust probe', 'stock surges after upgrade',
+    'shares slump on weak guidance', 'reports record quarterly profit',
+    'delays product launch', 'expands cloud partnership'
+]
+DETAILS = [
+    'analysts say the outlook is strong', 'investors remain cautious',
+    'the market reacted badly', 'customers love the new features', ''
+]
+
+
+def make_keyword_map(num_tickers, rng, prefix='T'):
+    """{symbol: [keywords]} for num_tickers made-up companies"""
+    keyword_map = {}
+    for i in range(num_tickers):
+        symbol = f"{prefix}{i:05d}"
+        name = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 9))).title()
+        keyword_map[symbol] = [
+            name,
+            f"{name} Corp",
+            f"{name} {rng.choice(['Cloud', 'Pay', 'Labs', 'Motors'])}",
+            f"CEO {rng.choice(string.ascii_uppercase)}. {name}son",
+            f"{name}OS",
+            f"{name} {rng.choice(['One', 'Pro', 'Max'])}"
+        ]
+    return keyword_map
+
+
+def make_headlines(num_headlines, keyword_map, rng, mention_rate=0.3):
+    """{'title', 'description'} dicts; about mention_rate of them name a company"""
+    all_keywords = [keyword for keywords in keyword_map.values() for keyword in keywords]
+    headlines = []
+    for _ in range(num_headlines):
+        words = rng.sample(FILLER, 8)
+        if rng.random() < mention_rate:
+            words.insert(rng.randrange(len(words)), rng.choice(all_keywords))
+        headlines.append({'title': ' '.join(words[:5]), 'description': ' '.join(words[5:])})
+    return headlines
+
+
+def make_sentiment_headlines(count, seed=42):
+    """Short headlines with real sentiment-bearing phrases (they repeat, like real feeds)"""
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(COMPANIES)} {rng.choice(EVENTS)}. {rng.choice(DETAILS)}"
+        for _ in range(count)
+    ]
+
+
+def make_articles(count, keyword_map, rng, days=365, url_prefix='synthetic://article', end=None):
+    """
+    NewsAPI-shaped articles spread over the last `days` days, each naming one company
+
+    Returns:
+    list: {'title', 'description', 'content', 'url', 'urlToImage', 'source', 'author', 'publishedAt'}
+    """
+    end = end or datetime(2025, 1, 1)
+    symbols = list(keyword_map)
+    articles = []
+    for i in range(count):
+        symbol = rng.choice(symbols)
+        published = end - timedelta(seconds=rng.randrange(days * 86400))
+        articles.append({
+            'title': f"{rng.choice(keyword_map[symbol])} {rng.choice(EVENTS)}",
+            'description': f"{rng.choice(DETAILS)} {' '.join(rng.sample(FILLER, 4))}".strip(),
+            'content': None,
+            'url': f"{url_prefix}/{i}",
+            'urlToImage': None,
+            'source': 'Synthetic Wire',
+            'author': None,
+            'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ')
+        })
+    return articles
+
+
+def make_price_series(np_rng, years, start='2015-01-01'):
+    """
+    Weekday trading calendar and a random-walk close series
+
+    Returns:
+    tuple: (datetime64[D] trading days, float closes)
+    """
+    calendar = np.arange(np.datetime64(start), np.datetime64(start) + 365 * years, dtype='datetime64[D]')
+    # Weekdays only: 1970-01-01 was a Thursday
+    weekday = (calendar.astype(int) + 3) % 7
+    trading_days = calendar[weekday < 5]
+    closes = 100 * np.cumprod(1 + np_rng.normal(0, 0.02, len(trading_days)))
+    return trading_days, closes
+
+
+def make_symbol(np_rng, years, articles_per_day=3, start='2015-01-01'):
+    """(news dates, sentiment scores, trading days, closes) for one symbol"""
+    trading_days, closes = make_price_series(np_rng, years, start)
+    calendar = np.arange(np.datetime64(start), np.datetime64(start) + 365 * years, dtype='datetime64[D]')
+    news_dates = np_rng.choice(calendar, size=len(calendar) * articles_per_day)
+    sentiment = np_rng.uniform(-1, 1, len(news_dates))
+    return news_dates, sentiment, trading_days, closes
@@ -0,0 +1,60 @@
+# ml-service/gunicorn.conf.py
+# Production server settings: gunicorn -c gunicorn.conf.py
+import gc
+import multiprocessing
+import os
+import shutil
+
+# Metric values are written per worker and merged by /metrics. This has to be
+# set, and the directory emptied of a previous run's files, before
+# prometheus_client is first imported, i.e. before the app is preloaded
+# (which happens ahead of every server hook)
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/ml-service-metrics')
+shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+wsgi_app = 'wsgi:app'
+bind = f"0.0.0.0:{os.getenv('ML_SERVICE_PORT', '8000')}"
+
+# Worker processes x threads per worker (override via environment)
+workers = int(os.getenv('GUNICORN_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+# Each open /stream connection holds one of those threads for as long as it
+# lasts; cap streams at half of them so the REST routes keep serving
+os.environ.setdefault('SSE_MAX_SUBSCRIBERS', str(max(threads // 2, 1)))
+
+# Load the app (lexicons, keyword matcher, symbol registry) once in the
+# master; workers inherit it copy-on-write instead of each loading their own
+preload_app = True
+
+# Recycle workers after this many requests (jittered so they do not all
+# restart at once); in-flight requests get graceful_timeout to finish
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '1000'))
+# /refresh-data fetches and scores a batch of articles, so allow slow requests
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded and before any fork.
+    # Forked workers must not share the master's sockets, so drop its DB
+    # connections; each worker opens its own pool on first use.
+    from database import close_db_pool
+
+    close_db_pool()
+    # Move everything loaded so far out of the collector's reach, so garbage
+    # collection in the workers does not touch (and un-share) those pages
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,27 @@
+# ml-service/hypercorn.conf.py
+# Async query endpoints (src/app_async.py) under hypercorn:
+#   hypercorn -c file:hypercorn.conf.py src/app_async.py:app
+import os
+import shutil
+
+# Same multiprocess metrics setup as gunicorn.conf.py, in a directory of its
+# own so both servers can run side by side
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/ml-service-async-metrics')
+shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+bind = [f"0.0.0.0:{os.getenv('ML_SERVICE_ASYNC_PORT', '8001')}"]
+
+# One event loop per worker serves every in-flight request, so one worker per
+# core is enough (override via environment)
+workers = int(os.getenv('HYPERCORN_WORKERS', '1'))
+worker_class = 'asyncio'
+# Pending connections queued by the kernel; bursts of dashboard requests
+# beyond this are refused
+backlog = int(os.getenv('HYPERCORN_BACKLOG', '1024'))
+
+keep_alive_timeout = 5
+graceful_timeout = int(os.getenv('HYPERCORN_GRACEFUL_TIMEOUT', '30'))
+
+accesslog = '-'
+errorlog = '-'
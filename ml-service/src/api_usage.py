@@ -0,0 +1,158 @@
+# ml-service/src/api_usage.py
+import os
+import threading
+import time
+from datetime import date
+
+# Daily call quotas per provider (override via environment)
+MAX_NEWS_CALLS_PER_DAY = int(os.getenv('NEWS_API_DAILY_LIMIT', '100'))
+MAX_STOCK_CALLS_PER_DAY = int(os.getenv('ALPHA_VANTAGE_DAILY_LIMIT', '25'))
+DAILY_LIMITS = {
+    'newsapi': MAX_NEWS_CALLS_PER_DAY,
+    'alphavantage': MAX_STOCK_CALLS_PER_DAY
+}
+# Counts written by other processes are picked up after this many seconds
+API_USAGE_CACHE_TTL = float(os.getenv('API_USAGE_CACHE_TTL', '60'))
+
+# Take one call from today's quota: the row is created or incremented in one
+# statement, and only while it is still under the limit (no row back = exhausted)
+_RESERVE_CALL = """
+    INSERT INTO api_usage (day, provider, calls)
+    VALUES (%s, %s, 1)
+    ON CONFLICT (day, provider) DO UPDATE
+    SET calls = api_usage.calls + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE api_usage.calls < %s
+    RETURNING calls
+"""
+
+class ApiUsageLedger:
+    """
+    Per-provider, per-day outbound API call counts backed by the api_usage table
+
+    reserve() is called by the fetchers right before each request; the
+    database increment is atomic, so concurrent workers and replicas can never
+    go over a quota between them. Reads are served from an in-memory copy that
+    every reserve() refreshes, and that is re-read (one primary key range
+    lookup) at most every API_USAGE_CACHE_TTL seconds.
+    """
+
+    def __init__(self, limits=DAILY_LIMITS, ttl=API_USAGE_CACHE_TTL):
+        self.limits = dict(limits)
+        self.ttl = ttl
+        self._day = None
+        self._calls = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _roll_day(self, today):
+        # Called with the lock held
+        if self._day != today:
+            self._day = today
+            self._calls = {}
+            self._loaded_at = None
+
+    def load(self):
+        """
+        Re-read today's counts from the ledger
+
+        Returns:
+        bool: True if the table was read
+        """
+        from database import db_connection
+
+        today = date.today()
+        with db_connection() as conn:
+            if not conn:
+                return False
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT provider, calls FROM api_usage WHERE day = %s", (today,))
+                calls = dict(cursor.fetchall())
+                conn.commit()
+            except Exception as e:
+                print(f"Error loading API usage: {e}")
+                conn.rollback()
+                return False
+
+        with self._lock:
+            self._roll_day(today)
+            # Never move a count backwards if a reserve() landed meanwhile
+            for provider, count in calls.items():
+                self._calls[provider] = max(count, self._calls.get(provider, 0))
+            self._loaded_at = time.monotonic()
+        return True
+
+    def reserve(self, provider):
+        """
+        Count one outbound call against today's quota, if any is left
+
+        Parameters:
+        provider (str): 'newsapi' or 'alphavantage'
+
+        Returns:
+        bool: True if the call may go ahead, False if the daily quota is used up
+        """
+        from database import db_connection
+
+        today = date.today()
+        limit = self.limits.get(provider)
+        if limit is None:
+            return True
+
+        calls = None
+        with db_connection() as conn:
+            if conn:
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute(_RESERVE_CALL, (today, provider, limit))
+                    row = cursor.fetchone()
+                    conn.commit()
+                    calls = row[0] if row else limit
+                    allowed = row is not None
+                except Exception as e:
+                    print(f"Error recording API call for {provider}: {e}")
+                    conn.rollback()
+
+        with self._lock:
+            self._roll_day(today)
+            if calls is None:
+                # Ledger unavailable: enforce against this process's own count
+                calls = self._calls.get(provider, 0)
+                allowed = calls < limit
+                if allowed:
+                    calls += 1
+            self._calls[provider] = calls
+
+        if not allowed:
+            print(f"Daily {provider} quota reached ({limit} calls)")
+        return allowed
+
+    def usage(self):
+        """
+        Today's call counts per provider (from memory; the ledger is only read when stale)
+
+        Returns:
+        dict: {provider: calls} for every provider with a quota
+        """
+        today = date.today()
+        with self._lock:
+            self._roll_day(today)
+            stale = self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+        if stale:
+            self.load()
+        with self._lock:
+            return {provider: self._calls.get(provider, 0) for provider in self.limits}
+
+    def remaining(self, provider):
+        """Calls left today for provider"""
+        return max(self.limits[provider] - self.usage().get(provider, 0), 0)
+
+_ledger = ApiUsageLedger()
+
+def get_api_usage_ledger():
+    """The process-wide ApiUsageLedger"""
+    return _ledger
+
+def reserve_api_call(provider):
+    """Count one call against provider's daily quota; False if it is used up"""
+    return _ledger.reserve(provider)
@@ -1,5 +1,5 @@
 # ml-service/src/app.py - UPDATED VERSION
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
 import sys
@@ -10,21 +10,30 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'models'))
 
 # Import your existing functions
 from models.Combined_Sentiment import analyze_sentiment_combined
-from news_Collection import fetch_headlines, filter_relevant_articles, full_pipeline, COMPANY_KEYWORDS
+from models.Sentiment_Engine import get_sentiment_engine
+from models.Sentiment_Memo import get_sentiment_memo
+from news_Collection import fetch_categories, filter_relevant_articles, full_pipeline, score_articles, COMPANY_KEYWORDS
+from database import init_db_pool
+from keyword_matcher import get_keyword_matcher
+from symbol_registry import get_symbol_registry
+from response_cache import get_response_cache, invalidate_response_cache
+from job_runner import get_job_history
+from corpus_export import article_export_bounds, stream_articles_parquet
+from live_updates import SSE_HEARTBEAT_SECONDS, format_sse, get_update_broker
+from metrics import init_app as init_metrics
+from api_usage import MAX_NEWS_CALLS_PER_DAY
 from database_queries import (
     get_articles_with_sentiment, 
     get_correlation_data, 
     get_batch_sentiment_summary,
+    get_sentiment_summary,
     check_data_freshness,
     get_api_usage_today
 )
 
 app = Flask(__name__)
 CORS(app)
-
-# API Limits
-MAX_NEWS_CALLS_PER_DAY = 100  # Adjust based on your plan
-MAX_STOCK_CALLS_PER_DAY = 5   # Alpha Vantage free tier
+init_metrics(app)
 
 @app.route('/', methods=['GET'])
 def health_check():
@@ -33,7 +42,10 @@ def health_check():
         'message': 'TradingEmotion ML Service is running!',
         'version': '2.0.0',
         'api_usage_today': usage,
-        'endpoints': ['/analyze-sentiment', '/analyze-text', '/analyze-correlation', '/get-news', '/analyze-batch', '/refresh-data']
+        'response_cache': get_response_cache().stats(),
+        'sentiment_memo': get_sentiment_memo().stats(),
+        'live_updates': get_update_broker().stats(),
+        'endpoints': ['/analyze-sentiment', '/analyze-text', '/analyze-correlation', '/get-news', '/analyze-batch', '/refresh-data', '/jobs', '/stream', '/export/articles', '/metrics']
     })
 
 @app.route('/analyze-sentiment', methods=['POST'])
@@ -47,8 +59,17 @@ def analyze_stock_sentiment():
         
         print(f"Getting ALL stored articles for {symbol}")
         
-        # Get ALL articles from database
-        articles = get_articles_with_sentiment(symbol, days_back=365, limit=100)
+        # Get ALL articles from database, plus the overall score from the daily aggregates
+        stored = get_response_cache().get_or_compute(
+            'analyze-sentiment',
+            {'symbol': symbol, 'days_back': 365, 'count': 100},
+            lambda: {
+                'articles': get_articles_with_sentiment(symbol, days_back=365, limit=100),
+                'summary': get_sentiment_summary(symbol, days_back=365)
+            }
+        )
+        articles = stored['articles']
+        summary = stored['summary']
         
         if not articles:
             return jsonify({
@@ -59,28 +80,15 @@ def analyze_stock_sentiment():
                 'message': f'No articles found for {symbol}'
             })
         
-        # Calculate overall sentiment from stored articles
-        sentiment_scores = [article['sentiment_score'] for article in articles if article['sentiment_score'] is not None]
-        
-        if sentiment_scores:
-            avg_sentiment = sum(sentiment_scores) / len(sentiment_scores)
-            
-            if avg_sentiment > 0.1:
-                classification = 'positive'
-            elif avg_sentiment < -0.1:
-                classification = 'negative'
-            else:
-                classification = 'neutral'
-        else:
-            avg_sentiment = 0
-            classification = 'neutral'
-        
+        # The score and count cover every scored article of the past 365 days
+        # (daily aggregates), not just the latest 100 returned below
         return jsonify({
             'symbol': symbol,
-            'articles_analyzed': len(articles),
+            'articles_analyzed': summary['articles_count'] if summary else len(articles),
+            'sentiment_window_days': 365,
             'overall_sentiment': {
-                'score': avg_sentiment,
-                'classification': classification
+                'score': summary['avg_sentiment'] if summary else 0,
+                'classification': summary['classification'] if summary else 'neutral'
             },
             'articles': articles,
             'source': 'database'
@@ -100,7 +108,11 @@ def analyze_correlation():
             return jsonify({'error': 'Symbol is required'}), 400
         
         # Get correlation data from database
-        correlations = get_correlation_data(symbol, days_back=90)
+        correlations = get_response_cache().get_or_compute(
+            'analyze-correlation',
+            {'symbol': symbol, 'days_back': 90},
+            lambda: get_correlation_data(symbol, days_back=90)
+        )
         
         if not correlations:
             return jsonify({
@@ -153,7 +165,11 @@ def get_filtered_news():
             return jsonify({'error': 'Symbol is required'}), 400
         
         # Get news from database first
-        articles = get_articles_with_sentiment(symbol, days_back=days_back, limit=count)
+        articles = get_response_cache().get_or_compute(
+            'get-news',
+            {'symbol': symbol, 'days_back': int(days_back), 'count': int(count)},
+            lambda: get_articles_with_sentiment(symbol, days_back=days_back, limit=count)
+        )
         
         return jsonify({
             'symbol': symbol,
@@ -171,15 +187,23 @@ def analyze_batch_sentiment():
     try:
         data = request.get_json()
         symbols = data.get('symbols', [])
+        days_back = int(data.get('days_back', 7))
         
         if not symbols:
             return jsonify({'error': 'Symbols array is required'}), 400
         
-        # Get batch data from database
-        results = get_batch_sentiment_summary()
+        # Normalise so the same watchlist in any order or case shares a cache entry
+        requested = sorted({symbol.upper() for symbol in symbols})
+        
+        # Get batch data for just the requested symbols from database
+        results = get_response_cache().get_or_compute(
+            'analyze-batch',
+            {'symbols': requested, 'days_back': days_back},
+            lambda: get_batch_sentiment_summary(requested, days_back=days_back)
+        )
         
         # Ensure all requested symbols are included
-        for symbol in symbols:
+        for symbol in requested:
             if symbol not in results:
                 results[symbol] = {
                     'articles_found': 0,
@@ -188,8 +212,9 @@ def analyze_batch_sentiment():
                 }
         
         return jsonify({
-            'symbols_analyzed': len(symbols),
-            'results': {k: v for k, v in results.items() if k in symbols},
+            'symbols_analyzed': len(requested),
+            'days_back': days_back,
+            'results': results,
             'source': 'database'
         })
         
@@ -213,26 +238,24 @@ def refresh_data():
         
         print("=== REFRESH DATA: Fetching NEW articles to ADD to database ===")
         
-        # Count articles before refresh
-        from database_queries import get_articles_with_sentiment
-        before_counts = {}
-        symbols = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'META', 'TSLA', 'NVDA']
+        # Count articles before refresh (every symbol in the stocks table)
+        from database_queries import get_article_counts
+        before_counts = get_article_counts(days_back=365)
         
-        for symbol in symbols:
-            articles = get_articles_with_sentiment(symbol, days_back=365, limit=1000)
-            before_counts[symbol] = len(articles)
-            print(f"Before refresh - {symbol}: {len(articles)} articles")
+        for symbol, count in before_counts.items():
+            print(f"Before refresh - {symbol}: {count} articles")
         
         # Fetch fresh articles from NewsAPI
         print("Fetching fresh articles from NewsAPI...")
-        tech_articles = fetch_headlines('technology', count=50)
-        business_articles = fetch_headlines('business', count=50)
+        headlines = fetch_categories(['technology', 'business'], count=50)
+        tech_articles = headlines['technology']
+        business_articles = headlines['business']
         
-        if isinstance(tech_articles, dict) and tech_articles.get('error'):
-            return jsonify({'error': f'News API error: {tech_articles["message"]}'}), 500
-            
-        if isinstance(business_articles, dict) and business_articles.get('error'):
-            return jsonify({'error': f'News API error: {business_articles["message"]}'}), 500
+        for result in (tech_articles, business_articles):
+            if isinstance(result, dict) and result.get('error'):
+                # 429: the fetcher refused because today's quota is used up
+                status = 429 if result.get('status_code') == 429 else 500
+                return jsonify({'error': f'News API error: {result["message"]}', 'usage': get_api_usage_today()}), status
         
         all_articles = tech_articles + business_articles
         print(f"Fetched {len(all_articles)} total articles from NewsAPI")
@@ -240,53 +263,30 @@ def refresh_data():
         # Filter for relevant companies
         filtered_articles = filter_relevant_articles(all_articles, COMPANY_KEYWORDS)
         
-        # Process and save new articles
-        from database import save_article, save_sentiment_score, get_stock_id
+        # Save new articles, relations and sentiment scores in one transaction
+        from database import save_articles_bulk
+        
+        inserted = save_articles_bulk(filtered_articles, score_articles)
+        if inserted is None:
+            return jsonify({'error': 'Failed to store fetched articles'}), 500
         
         new_articles_added = {}
         total_new_articles = 0
         
-        for symbol, articles in filtered_articles.items():
-            new_articles_added[symbol] = 0
-            stock_id = get_stock_id(symbol)
-            
-            if not stock_id:
-                print(f"❌ Stock {symbol} not found in database")
-                continue
-            
-            print(f"\nProcessing {len(articles)} articles for {symbol}...")
-            
-            for article in articles:
-                # Try to save article (will be ignored if URL already exists due to ON CONFLICT)
-                article_id = save_article(article, [symbol])
-                
-                if article_id:  # New article was saved
-                    # Analyze sentiment for new article
-                    text = f"{article['title']} {article.get('description', '')}"
-                    sentiment = analyze_sentiment_combined(text)
-                    
-                    # Save sentiment score
-                    sentiment_id = save_sentiment_score(
-                        article_id,
-                        stock_id,
-                        sentiment['combined_score']
-                    )
-                    
-                    if sentiment_id:
-                        new_articles_added[symbol] += 1
-                        total_new_articles += 1
-                        print(f"✅ Added new article for {symbol}: {article['title'][:50]}...")
-                else:
-                    print(f"⚠️  Article already exists (skipped): {article['title'][:50]}...")
+        for symbol, new_articles in inserted.items():
+            new_articles_added[symbol] = len(new_articles)
+            total_new_articles += len(new_articles)
+            for article in new_articles:
+                print(f"✅ Added new article for {symbol}: {(article['title'] or '')[:50]}...")
+        
+        if total_new_articles:
+            invalidate_response_cache()
         
         # Count articles after refresh
         print("\n=== REFRESH RESULTS ===")
-        after_counts = {}
-        for symbol in symbols:
-            articles = get_articles_with_sentiment(symbol, days_back=365, limit=1000)
-            after_counts[symbol] = len(articles)
-            added = after_counts[symbol] - before_counts[symbol]
-            print(f"After refresh - {symbol}: {after_counts[symbol]} articles (+{added} new)")
+        after_counts = get_article_counts(days_back=365)
+        for symbol, count in after_counts.items():
+            print(f"After refresh - {symbol}: {count} articles (+{new_articles_added.get(symbol, 0)} new)")
         
         return jsonify({
             'message': 'Data refresh completed successfully!',
@@ -296,13 +296,87 @@ def refresh_data():
             'after_refresh': after_counts,
             'new_articles_by_symbol': new_articles_added,
             'timestamp': datetime.now().isoformat(),
-            'api_usage': usage
+            'api_usage': get_api_usage_today()
         })
         
     except Exception as e:
         print(f"Error in refresh data: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs', methods=['GET'])
+def job_history():
+    """Recent collection job runs (start, end, duration, rows, status), newest first"""
+    try:
+        job_name = request.args.get('job')
+        limit = min(int(request.args.get('limit', 50)), 500)
+        
+        return jsonify({
+            'runs': get_job_history(job_name=job_name, limit=limit)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/stream', methods=['GET'])
+def stream_updates():
+    """
+    Server-Sent Events: newly ingested articles ('article') and updated daily
+    aggregates ('aggregate') as they commit, optionally only for ?symbols=AAPL,MSFT
+    
+    A 'resync' event means updates were missed (slow client or lost
+    listener connection); refetch over the REST endpoints.
+    """
+    symbols = [symbol.strip().upper() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()]
+    
+    broker = get_update_broker()
+    subscription = broker.subscribe(symbols)
+    if subscription is None:
+        return jsonify({'error': 'Too many open streams, try again later'}), 503
+    
+    def events():
+        try:
+            # Ask browsers to wait 5s before reconnecting
+            yield 'retry: 5000\n\n'
+            while True:
+                event = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                # Comment lines keep proxies from timing out idle streams
+                yield format_sse(event) if event else ': keep-alive\n\n'
+        finally:
+            broker.unsubscribe(subscription)
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/export/articles', methods=['GET'])
+def export_articles():
+    """
+    Stream scored articles as one Parquet file, optionally only those scored
+    after ?since_id= (the previous export's X-Export-Watermark) and only for
+    ?symbols=AAPL,MSFT
+    """
+    try:
+        since_id = int(request.args.get('since_id', 0))
+    except ValueError:
+        return jsonify({'error': 'since_id must be an integer'}), 400
+    symbols = [symbol.strip().upper() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()]
+    
+    bounds = article_export_bounds(since_id)
+    if bounds is None:
+        return jsonify({'error': 'Database unavailable'}), 503
+    _, upper_id = bounds
+    
+    return Response(
+        stream_with_context(stream_articles_parquet(since_id, upper_id, symbols)),
+        mimetype='application/vnd.apache.parquet',
+        headers={
+            'Content-Disposition': f'attachment; filename="articles-{since_id}-{upper_id}.parquet"',
+            'X-Export-Watermark': str(upper_id)
+        }
+    )
+
 @app.route('/analyze-text', methods=['POST'])
 def analyze_text_sentiment():
     # Keep your existing text analysis endpoint unchanged
@@ -323,5 +397,28 @@ def analyze_text_sentiment():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def create_app():
+    """
+    The app with everything expensive loaded up front, for production servers
+    
+    Loads the VADER and TextBlob lexicons, compiles the company keyword
+    matcher, resolves DB settings and reads the symbol registry. Under
+    gunicorn with preload_app this runs once in the master, so every worker
+    starts warm and shares those pages copy-on-write. The master's DB
+    connections are closed again before forking (see gunicorn.conf.py);
+    each worker opens its own pool on first use.
+    
+    Returns:
+    Flask: the configured app
+    """
+    get_sentiment_engine().load()
+    get_keyword_matcher(COMPANY_KEYWORDS)
+    init_db_pool()
+    get_symbol_registry().load()
+    return app
+
 if __name__ == '__main__':
+    # Development server only; production runs wsgi:app under gunicorn
+    # Resolve DB settings and open the connection pool once, up front
+    init_db_pool()
     app.run(host='0.0.0.0', port=8000, debug=True)
\ No newline at end of file
@@ -0,0 +1,222 @@
+# ml-service/src/app_async.py
+# Async (ASGI) variant of the read-only dashboard endpoints: /analyze-sentiment,
+# /analyze-correlation, /get-news and /analyze-batch, with the same request and
+# response formats as app.py. Handlers await asyncpg queries
+# (database_queries_async.py), so a single process keeps hundreds of requests
+# in flight while they wait on the database. Everything else (scoring,
+# /refresh-data, /stream, exports) stays on the Flask app.
+# Production: hypercorn -c file:hypercorn.conf.py (from ml-service/)
+import asyncio
+
+from quart import Quart, request, jsonify
+
+from database_async import close_async_db_pool, init_async_db_pool
+from database_queries_async import (
+    get_articles_with_sentiment,
+    get_correlation_data,
+    get_batch_sentiment_summary,
+    get_sentiment_summary
+)
+from metrics import init_async_app as init_metrics
+from response_cache import get_response_cache
+from symbol_registry import STOCKS_QUERY, get_symbol_registry
+
+app = Quart(__name__)
+init_metrics(app)
+
+@app.before_serving
+async def open_pool():
+    # Runs in each worker once its event loop is up: the pool belongs to that
+    # loop. Warm the symbol registry over it so no request has to. If the
+    # database is down, start anyway; requests retry opening the pool
+    try:
+        pool = await init_async_db_pool()
+        get_symbol_registry().replace(await pool.fetch(STOCKS_QUERY))
+    except Exception as e:
+        print(f"Error opening async database pool: {e}")
+
+@app.after_serving
+async def close_pool():
+    await close_async_db_pool()
+
+@app.route('/', methods=['GET'])
+async def health_check():
+    return jsonify({
+        'message': 'TradingEmotion ML Service (async query endpoints) is running!',
+        'version': '2.0.0',
+        'response_cache': get_response_cache().stats(),
+        'endpoints': ['/analyze-sentiment', '/analyze-correlation', '/get-news', '/analyze-batch', '/metrics']
+    })
+
+@app.route('/analyze-sentiment', methods=['POST'])
+async def analyze_stock_sentiment():
+    try:
+        data = await request.get_json()
+        symbol = data.get('symbol', '').upper()
+
+        if not symbol:
+            return jsonify({'error': 'Symbol is required'}), 400
+
+        async def load():
+            # Both queries run concurrently, each on its own pooled connection
+            articles, summary = await asyncio.gather(
+                get_articles_with_sentiment(symbol, days_back=365, limit=100),
+                get_sentiment_summary(symbol, days_back=365)
+            )
+            return {'articles': articles, 'summary': summary}
+
+        stored = await get_response_cache().get_or_compute_async(
+            'analyze-sentiment',
+            {'symbol': symbol, 'days_back': 365, 'count': 100},
+            load
+        )
+        articles = stored['articles']
+        summary = stored['summary']
+
+        if not articles:
+            return jsonify({
+                'symbol': symbol,
+                'articles_analyzed': 0,
+                'overall_sentiment': None,
+                'articles': [],
+                'message': f'No articles found for {symbol}'
+            })
+
+        # The score and count cover every scored article of the past 365 days
+        # (daily aggregates), not just the latest 100 returned below
+        return jsonify({
+            'symbol': symbol,
+            'articles_analyzed': summary['articles_count'] if summary else len(articles),
+            'sentiment_window_days': 365,
+            'overall_sentiment': {
+                'score': summary['avg_sentiment'] if summary else 0,
+                'classification': summary['classification'] if summary else 'neutral'
+            },
+            'articles': articles,
+            'source': 'database'
+        })
+
+    except Exception as e:
+        print(f"Error in sentiment analysis: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/analyze-correlation', methods=['POST'])
+async def analyze_correlation():
+    try:
+        data = await request.get_json()
+        symbol = data.get('symbol', '').upper()
+
+        if not symbol:
+            return jsonify({'error': 'Symbol is required'}), 400
+
+        correlations = await get_response_cache().get_or_compute_async(
+            'analyze-correlation',
+            {'symbol': symbol, 'days_back': 90},
+            lambda: get_correlation_data(symbol, days_back=90)
+        )
+
+        if not correlations:
+            return jsonify({
+                'symbol': symbol,
+                'correlation_data': [],
+                'message': f'No correlation data found for {symbol}. Try running data collection first.'
+            })
+
+        positive_sentiment_days = [c for c in correlations if c['sentiment'] > 0.1]
+        negative_sentiment_days = [c for c in correlations if c['sentiment'] < -0.1]
+
+        avg_positive_price_change = (
+            sum(c['price_change'] for c in positive_sentiment_days) / len(positive_sentiment_days)
+            if positive_sentiment_days else 0
+        )
+
+        avg_negative_price_change = (
+            sum(c['price_change'] for c in negative_sentiment_days) / len(negative_sentiment_days)
+            if negative_sentiment_days else 0
+        )
+
+        summary = {
+            'total_correlations': len(correlations),
+            'positive_sentiment_days': len(positive_sentiment_days),
+            'negative_sentiment_days': len(negative_sentiment_days),
+            'avg_positive_price_change': avg_positive_price_change,
+            'avg_negative_price_change': avg_negative_price_change
+        }
+
+        return jsonify({
+            'symbol': symbol,
+            'correlation_data': correlations,
+            'summary': summary,
+            'source': 'database'
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/get-news', methods=['POST'])
+async def get_filtered_news():
+    try:
+        data = await request.get_json()
+        symbol = data.get('symbol', '').upper()
+        count = data.get('count', 50)
+        days_back = data.get('days_back', 7)
+
+        if not symbol:
+            return jsonify({'error': 'Symbol is required'}), 400
+
+        articles = await get_response_cache().get_or_compute_async(
+            'get-news',
+            {'symbol': symbol, 'days_back': int(days_back), 'count': int(count)},
+            lambda: get_articles_with_sentiment(symbol, days_back=days_back, limit=count)
+        )
+
+        return jsonify({
+            'symbol': symbol,
+            'relevant_articles': len(articles),
+            'articles': articles,
+            'source': 'database',
+            'days_back': days_back
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/analyze-batch', methods=['POST'])
+async def analyze_batch_sentiment():
+    try:
+        data = await request.get_json()
+        symbols = data.get('symbols', [])
+        days_back = int(data.get('days_back', 7))
+
+        if not symbols:
+            return jsonify({'error': 'Symbols array is required'}), 400
+
+        requested = sorted({symbol.upper() for symbol in symbols})
+
+        results = await get_response_cache().get_or_compute_async(
+            'analyze-batch',
+            {'symbols': requested, 'days_back': days_back},
+            lambda: get_batch_sentiment_summary(requested, days_back=days_back)
+        )
+
+        for symbol in requested:
+            if symbol not in results:
+                results[symbol] = {
+                    'articles_found': 0,
+                    'overall_sentiment': None,
+                    'message': f'No data found for {symbol}'
+                }
+
+        return jsonify({
+            'symbols_analyzed': len(requested),
+            'days_back': days_back,
+            'results': results,
+            'source': 'database'
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+if __name__ == '__main__':
+    # Development server only
+    app.run(host='0.0.0.0', port=8001)
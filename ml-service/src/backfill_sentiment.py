@@ -1,130 +1,235 @@
 # ml-service/src/backfill_sentiment.py
-from database import get_db_connection, save_sentiment_score
-from models.Combined_Sentiment import analyze_sentiment_combined
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from database import db_connection, insert_sentiment_scores, rebuild_daily_aggregates
+from models.Combined_Sentiment import analyze_sentiment_batch
+from response_cache import invalidate_response_cache
 
-def backfill_missing_sentiment():
-    """Analyze sentiment for articles that don't have sentiment scores yet"""
-    conn = get_db_connection()
-    if not conn:
-        print("Cannot connect to database!")
-        return
-    
+# Streaming backfill settings (override via environment)
+BACKFILL_CHUNK_SIZE = int(os.getenv('BACKFILL_CHUNK_SIZE', '5000'))
+BACKFILL_CHECKPOINT = os.getenv('BACKFILL_CHECKPOINT', 'backfill_checkpoint.json')
+
+_CANDIDATES_QUERY = """
+SELECT 
+    na.id as article_id,
+    s.id as stock_id,
+    s.symbol,
+    na.title,
+    na.description
+FROM news_articles na
+JOIN article_stock_relations asr ON na.id = asr.article_id
+JOIN stocks s ON asr.stock_id = s.id
+{missing_join}
+WHERE (na.id, s.id) > (%s, %s)
+{missing_filter}
+ORDER BY na.id, s.id
+"""
+
+def _load_checkpoint(path, mode):
+    """(article_id, stock_id, processed) to resume after, or a fresh start"""
     try:
-        cursor = conn.cursor()
-        
-        # Find articles without sentiment scores
-        query = """
-        SELECT 
-            na.id as article_id,
-            na.title,
-            na.description,
-            s.id as stock_id,
-            s.symbol
-        FROM news_articles na
-        JOIN article_stock_relations asr ON na.id = asr.article_id
-        JOIN stocks s ON asr.stock_id = s.id
-        LEFT JOIN sentiment_scores ss ON na.id = ss.article_id AND s.id = ss.stock_id
-        WHERE ss.id IS NULL
-        ORDER BY s.symbol, na.published_at DESC
-        """
-        
-        cursor.execute(query)
-        missing_articles = cursor.fetchall()
-        
-        print(f"Found {len(missing_articles)} articles without sentiment analysis")
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return 0, 0, 0
+    
+    if checkpoint.get('mode') != mode:
+        print(f"⚠️  Ignoring {mode} backfill checkpoint written by a {checkpoint.get('mode')} run")
+        return 0, 0, 0
+    return checkpoint['article_id'], checkpoint['stock_id'], checkpoint.get('processed', 0)
+
+def _save_checkpoint(path, mode, article_id, stock_id, processed):
+    """Write the checkpoint atomically so a crash never leaves a torn file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'mode': mode, 'article_id': article_id, 'stock_id': stock_id, 'processed': processed}, f)
+    os.replace(tmp_path, path)
+
+def _write_chunk(rows, scores, rescore):
+    """Bulk-write one scored chunk in its own transaction; returns rows written or None"""
+    with db_connection() as conn:
+        if not conn:
+            return None
         
-        if len(missing_articles) == 0:
-            print("✅ All articles already have sentiment analysis!")
-            return
+        try:
+            cursor = conn.cursor()
+            
+            if rescore:
+                cursor.execute("""
+                    DELETE FROM sentiment_scores ss
+                    USING unnest(%s::int[], %s::int[]) AS chunk(article_id, stock_id)
+                    WHERE ss.article_id = chunk.article_id AND ss.stock_id = chunk.stock_id
+                """, ([row[0] for row in rows], [row[1] for row in rows]))
+            
+            inserted = insert_sentiment_scores(
+                cursor,
+                [(article_id, stock_id, float(score)) for (article_id, stock_id), score in zip(rows, scores)],
+                update_aggregates=not rescore,
+                # Historical scores, not live news: don't flood /stream subscribers
+                publish=False
+            )
+            conn.commit()
+            return len(inserted)
         
-        # Process each missing article
-        processed = 0
-        by_symbol = {}
+        except Exception as e:
+            print(f"Error writing backfill chunk: {e}")
+            conn.rollback()
+            return None
+
+def backfill_missing_sentiment(rescore=False, chunk_size=BACKFILL_CHUNK_SIZE, processes=None,
+                               checkpoint_path=BACKFILL_CHECKPOINT, restart=False):
+    """
+    Analyze sentiment for articles that don't have sentiment scores yet
+    
+    Candidates are streamed through a server-side cursor in (article_id, stock_id)
+    order, each chunk is scored on a shared process pool and written with one bulk
+    insert, and the last written (article_id, stock_id) is checkpointed so an
+    interrupted run resumes where it stopped.
+    
+    Parameters:
+    rescore (bool): Replace the scores of every article (e.g. after a model change)
+                    instead of only filling in missing ones. Daily aggregates are
+                    rebuilt once at the end rather than per chunk.
+    chunk_size (int): Rows fetched, scored and written per round trip
+    processes (int): Scoring worker processes (None = one per CPU, 0/1 = in-process)
+    checkpoint_path (str): Where progress is persisted between runs
+    restart (bool): Ignore an existing checkpoint and start from the beginning
+    
+    Returns:
+    int: Rows written by this run, or None if the backfill failed
+    """
+    mode = 'rescore' if rescore else 'missing'
+    last_article_id, last_stock_id, processed_before = (0, 0, 0) if restart else _load_checkpoint(checkpoint_path, mode)
+    if last_article_id:
+        print(f"Resuming {mode} backfill after article {last_article_id} ({processed_before} rows already done)")
+    
+    query = _CANDIDATES_QUERY.format(
+        missing_join="" if rescore else "LEFT JOIN sentiment_scores ss ON na.id = ss.article_id AND s.id = ss.stock_id",
+        missing_filter="" if rescore else "AND ss.id IS NULL"
+    )
+    
+    if processes is None:
+        processes = os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    
+    processed = 0
+    skipped = 0
+    by_symbol = {}
+    started = time.perf_counter()
+    
+    with db_connection() as conn:
+        if not conn:
+            print("Cannot connect to database!")
+            return None
+    
+        try:
+            # Named cursor: rows are streamed from the server chunk by chunk
+            cursor = conn.cursor(name='sentiment_backfill')
+            cursor.itersize = chunk_size
+            cursor.execute(query, (last_article_id, last_stock_id))
         
-        for article_id, title, description, stock_id, symbol in missing_articles:
-            if symbol not in by_symbol:
-                by_symbol[symbol] = 0
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
             
-            # Combine title and description for analysis
-            text = f"{title or ''} {description or ''}"
+                # Combine title and description for analysis, skipping empty articles
+                rows = []
+                texts = []
+                for article_id, stock_id, symbol, title, description in chunk:
+                    text = f"{title or ''} {description or ''}"
+                    if not text.strip():
+                        skipped += 1
+                        continue
+                    rows.append((article_id, stock_id))
+                    texts.append(text)
+                    by_symbol[symbol] = by_symbol.get(symbol, 0) + 1
             
-            if not text.strip():
-                print(f"⚠️  Skipping article with no text: {article_id}")
-                continue
+                if rows:
+                    scores = analyze_sentiment_batch(texts, processes=1, executor=executor)['combined_score']
+                    written = _write_chunk(rows, scores, rescore)
+                    if written is None:
+                        print(f"❌ Backfill stopped; rerun to resume after article {last_article_id}")
+                        return None
+                    processed += written
             
-            try:
-                # Analyze sentiment
-                sentiment_result = analyze_sentiment_combined(text)
-                sentiment_score = sentiment_result['combined_score']
-                
-                # Save sentiment score
-                sentiment_id = save_sentiment_score(
-                    article_id,
-                    stock_id,
-                    sentiment_score
-                )
-                
-                if sentiment_id:
-                    processed += 1
-                    by_symbol[symbol] += 1
-                    print(f"✅ {symbol}: Added sentiment for '{title[:50]}...' (Score: {sentiment_score:.3f})")
-                else:
-                    print(f"❌ Failed to save sentiment for article {article_id}")
-                    
-            except Exception as e:
-                print(f"❌ Error analyzing article {article_id}: {e}")
-        
-        print(f"\n=== BACKFILL COMPLETE ===")
-        print(f"Processed {processed} articles")
-        print("Articles added by symbol:")
-        for symbol, count in by_symbol.items():
-            print(f"  {symbol}: +{count} sentiment scores")
+                last_article_id, last_stock_id = chunk[-1][0], chunk[-1][1]
+                _save_checkpoint(checkpoint_path, mode, last_article_id, last_stock_id, processed_before + processed)
             
-    except Exception as e:
-        print(f"Error in backfill: {e}")
-    finally:
-        conn.close()
+                elapsed = time.perf_counter() - started
+                print(f"  {processed} rows scored ({processed / elapsed:,.0f} rows/sec), through article {last_article_id}")
+        
+            cursor.close()
+        
+        except Exception as e:
+            print(f"Error in backfill: {e}")
+            return None
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    
+    if rescore and not rebuild_daily_aggregates():
+        return None
+    
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    
+    if processed:
+        invalidate_response_cache()
+    
+    elapsed = time.perf_counter() - started
+    print(f"\n=== BACKFILL COMPLETE ===")
+    print(f"Processed {processed} articles in {elapsed:.1f}s ({processed / elapsed if elapsed else 0:,.0f} rows/sec)")
+    if skipped:
+        print(f"⚠️  Skipped {skipped} articles with no text")
+    print("Articles added by symbol:")
+    for symbol, count in sorted(by_symbol.items()):
+        print(f"  {symbol}: +{count} sentiment scores")
+    
+    return processed
 
 def check_sentiment_coverage():
     """Check how many articles have sentiment analysis"""
-    conn = get_db_connection()
-    if not conn:
-        return
+    with db_connection() as conn:
+        if not conn:
+            return
     
-    try:
-        cursor = conn.cursor()
+        try:
+            cursor = conn.cursor()
         
-        query = """
-        SELECT 
-            s.symbol,
-            COUNT(asr.article_id) as total_articles,
-            COUNT(ss.id) as articles_with_sentiment,
-            ROUND(
-                (COUNT(ss.id) * 100.0 / NULLIF(COUNT(asr.article_id), 0)), 2
-            ) as coverage_percent
-        FROM stocks s 
-        LEFT JOIN article_stock_relations asr ON s.id = asr.stock_id
-        LEFT JOIN sentiment_scores ss ON asr.article_id = ss.article_id
-        GROUP BY s.symbol
-        ORDER BY s.symbol
-        """
+            query = """
+            SELECT 
+                s.symbol,
+                COUNT(asr.article_id) as total_articles,
+                COUNT(ss.id) as articles_with_sentiment,
+                ROUND(
+                    (COUNT(ss.id) * 100.0 / NULLIF(COUNT(asr.article_id), 0)), 2
+                ) as coverage_percent
+            FROM stocks s 
+            LEFT JOIN article_stock_relations asr ON s.id = asr.stock_id
+            LEFT JOIN sentiment_scores ss ON asr.article_id = ss.article_id AND asr.stock_id = ss.stock_id
+            GROUP BY s.symbol
+            ORDER BY s.symbol
+            """
         
-        cursor.execute(query)
-        results = cursor.fetchall()
+            cursor.execute(query)
+            results = cursor.fetchall()
         
-        print("=== SENTIMENT COVERAGE REPORT ===")
-        print("Symbol | Total Articles | With Sentiment | Coverage %")
-        print("-------|----------------|----------------|----------")
+            print("=== SENTIMENT COVERAGE REPORT ===")
+            print("Symbol | Total Articles | With Sentiment | Coverage %")
+            print("-------|----------------|----------------|----------")
         
-        for symbol, total, with_sentiment, coverage in results:
-            print(f"{symbol:6} | {total:14} | {with_sentiment:14} | {coverage or 0:8}%")
+            for symbol, total, with_sentiment, coverage in results:
+                print(f"{symbol:6} | {total:14} | {with_sentiment:14} | {coverage or 0:8}%")
             
-    except Exception as e:
-        print(f"Error checking coverage: {e}")
-    finally:
-        conn.close()
+        except Exception as e:
+            print(f"Error checking coverage: {e}")
 
 if __name__ == "__main__":
+    import sys
+    
     print("=== SENTIMENT BACKFILL UTILITY ===\n")
     
     # First, check current coverage
@@ -132,8 +237,8 @@ if __name__ == "__main__":
     
     print("\n" + "="*50 + "\n")
     
-    # Then backfill missing sentiment
-    backfill_missing_sentiment()
+    # Then backfill missing sentiment ("rescore" replaces every score, "restart" ignores the checkpoint)
+    backfill_missing_sentiment(rescore="rescore" in sys.argv[1:], restart="restart" in sys.argv[1:])
     
     print("\n" + "="*50 + "\n")
     
@@ -0,0 +1,389 @@
+# ml-service/src/corpus_export.py
+# Columnar export of the article/sentiment corpus and price history, as
+# hive-partitioned Parquet (symbol=AAPL/month=2024-07/part-*.parquet):
+#   articles/  one row per scored (article, stock), exported incrementally
+#              since the sentiment_scores.id watermark in _watermark.json
+#   prices/    one row per (stock, trading day), rewritten on every run
+# A rescore inserts new score rows, so an (article_id, stock_id) pair can
+# appear more than once; readers keep the highest sentiment_id. Scores still
+# uncommitted when an export starts can end up below the new watermark, so
+# run a full export now and then (e.g. after a backfill).
+# Usage: python corpus_export.py [full]
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from database import db_connection
+from symbol_registry import get_symbol_registry
+
+# Export settings (override via environment)
+CORPUS_EXPORT_DIR = os.getenv('CORPUS_EXPORT_DIR', 'exports/corpus')
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '50000'))
+WATERMARK_FILE = '_watermark.json'
+
+_ARTICLES_QUERY = """
+SELECT
+    ss.id,
+    ss.stock_id,
+    na.id,
+    na.title,
+    na.description,
+    na.source,
+    na.author,
+    na.url,
+    na.published_at,
+    ss.sentiment_score::float8,
+    ss.created_at
+FROM sentiment_scores ss
+JOIN article_stock_relations asr ON asr.article_id = ss.article_id AND asr.stock_id = ss.stock_id
+JOIN news_articles na ON na.id = ss.article_id
+WHERE ss.id > %s AND ss.id <= %s
+AND na.published_at IS NOT NULL
+{symbol_filter}
+ORDER BY ss.stock_id, na.published_at, ss.id
+"""
+
+_PRICES_QUERY = """
+SELECT sp.stock_id, sp.date, sp.close_price::float8, sdr.price_change
+FROM stock_prices sp
+LEFT JOIN stock_daily_returns sdr ON sdr.stock_id = sp.stock_id AND sdr.date = sp.date
+ORDER BY sp.stock_id, sp.date
+"""
+
+def articles_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('symbol', pa.string()),
+        ('month', pa.string()),
+        ('sentiment_id', pa.int64()),
+        ('stock_id', pa.int32()),
+        ('article_id', pa.int64()),
+        ('title', pa.string()),
+        ('description', pa.string()),
+        ('source', pa.string()),
+        ('author', pa.string()),
+        ('url', pa.string()),
+        ('published_at', pa.timestamp('us')),
+        ('sentiment_score', pa.float64()),
+        ('scored_at', pa.timestamp('us'))
+    ])
+
+def prices_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('symbol', pa.string()),
+        ('month', pa.string()),
+        ('stock_id', pa.int32()),
+        ('date', pa.date32()),
+        ('close_price', pa.float64()),
+        ('price_change', pa.float64())
+    ])
+
+def _record_batches(cursor, schema, batch_size, stock_id_column, month_column):
+    """
+    Turn rows from a (named) cursor into Arrow record batches, fetching
+    batch_size rows per round trip
+
+    The first two schema columns (symbol, month) are derived from the
+    stock id and the date/timestamp at the given row positions.
+    """
+    import pyarrow as pa
+
+    registry = get_symbol_registry()
+    symbols = {}
+    fields = list(schema)[2:]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+
+        columns = list(zip(*rows))
+        stock_ids = columns[stock_id_column]
+        for stock_id in set(stock_ids) - symbols.keys():
+            symbols[stock_id] = registry.get_symbol(stock_id)
+
+        arrays = [
+            pa.array([symbols[stock_id] for stock_id in stock_ids], pa.string()),
+            pa.array([value.strftime('%Y-%m') for value in columns[month_column]], pa.string())
+        ]
+        arrays += [pa.array(values, field.type) for values, field in zip(columns, fields)]
+        yield pa.record_batch(arrays, schema=schema)
+
+def _latest_sentiment_id(cursor):
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sentiment_scores")
+    return cursor.fetchone()[0]
+
+def _symbol_filter(symbols):
+    """(SQL fragment, params) restricting the articles query to some symbols"""
+    if not symbols:
+        return "", ()
+    stock_ids = list(get_symbol_registry().get_ids(symbols).values())
+    return "AND ss.stock_id = ANY(%s)", (stock_ids,)
+
+def load_watermark(export_dir=CORPUS_EXPORT_DIR):
+    """Last export's {'sentiment_id', 'exported_at', ...}, or None before the first export"""
+    try:
+        with open(os.path.join(export_dir, WATERMARK_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _save_watermark(export_dir, watermark):
+    """Write the watermark atomically so a crash never leaves a torn file"""
+    path = os.path.join(export_dir, WATERMARK_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(watermark, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _write_partitioned(batches, schema, target_dir, basename):
+    """Stream record batches into hive-partitioned Parquet files; returns rows written"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    rows = 0
+
+    def counted():
+        nonlocal rows
+        for batch in batches:
+            rows += batch.num_rows
+            yield batch
+
+    ds.write_dataset(
+        pa.RecordBatchReader.from_batches(schema, counted()),
+        target_dir,
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([schema.field('symbol'), schema.field('month')]), flavor='hive'),
+        basename_template=f"{basename}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',
+        # Rows arrive grouped by symbol and time, so few files are open at once
+        min_rows_per_group=10000,
+        max_rows_per_group=100000
+    )
+    return rows
+
+def _publish_files(staging_dir, target_dir):
+    """Move every staged Parquet file into the same partition under target_dir"""
+    for root, _, files in os.walk(staging_dir):
+        for name in files:
+            source = os.path.join(root, name)
+            destination = os.path.join(target_dir, os.path.relpath(source, staging_dir))
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            os.replace(source, destination)
+
+def export_corpus(export_dir=CORPUS_EXPORT_DIR, full=False, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Export new article scores (since the watermark) and all prices to Parquet
+
+    Rows are streamed from PostgreSQL through server-side cursors and written
+    batch by batch, so memory stays flat however large the corpus is. Files
+    are written to a staging directory first and only moved into place (and
+    the watermark advanced) once the whole run succeeded.
+
+    Parameters:
+    export_dir (str): Root of the export
+    full (bool): Discard the existing article files and export everything
+    batch_size (int): Rows fetched and converted per round trip
+
+    Returns:
+    dict: {'articles', 'prices', 'watermark', 'previous_watermark', 'seconds'},
+          or None if the export failed
+    """
+    started = time.perf_counter()
+    run_id = f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    staging_dir = os.path.join(export_dir, f"_staging-{run_id}")
+    articles_dir = os.path.join(export_dir, 'articles')
+    prices_dir = os.path.join(export_dir, 'prices')
+
+    watermark = None if full else load_watermark(export_dir)
+    since_id = watermark['sentiment_id'] if watermark else 0
+
+    with db_connection() as conn:
+        if not conn:
+            print("Cannot connect to database!")
+            return None
+
+        try:
+            cursor = conn.cursor()
+            upper_id = _latest_sentiment_id(cursor)
+            print(f"Exporting sentiment rows {since_id + 1}..{upper_id} to {export_dir}")
+
+            # Named cursors: rows are streamed from the server batch by batch
+            articles_cursor = conn.cursor(name='corpus_export_articles')
+            articles_cursor.itersize = batch_size
+            articles_cursor.execute(_ARTICLES_QUERY.format(symbol_filter=""), (since_id, upper_id))
+            article_rows = _write_partitioned(
+                _record_batches(articles_cursor, articles_schema(), batch_size, stock_id_column=1, month_column=8),
+                articles_schema(), os.path.join(staging_dir, 'articles'), f"part-{run_id}"
+            )
+            articles_cursor.close()
+
+            prices_cursor = conn.cursor(name='corpus_export_prices')
+            prices_cursor.itersize = batch_size
+            prices_cursor.execute(_PRICES_QUERY)
+            price_rows = _write_partitioned(
+                _record_batches(prices_cursor, prices_schema(), batch_size, stock_id_column=0, month_column=1),
+                prices_schema(), os.path.join(staging_dir, 'prices'), f"part-{run_id}"
+            )
+            prices_cursor.close()
+            conn.commit()
+
+        except Exception as e:
+            print(f"Error exporting corpus: {e}")
+            conn.rollback()
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return None
+
+    # Everything is staged: swap it in
+    if full:
+        shutil.rmtree(articles_dir, ignore_errors=True)
+    _publish_files(os.path.join(staging_dir, 'articles'), articles_dir)
+
+    old_prices_dir = os.path.join(export_dir, f"_old-prices-{run_id}")
+    if os.path.exists(prices_dir):
+        os.replace(prices_dir, old_prices_dir)
+    os.makedirs(os.path.join(staging_dir, 'prices'), exist_ok=True)
+    os.replace(os.path.join(staging_dir, 'prices'), prices_dir)
+    shutil.rmtree(old_prices_dir, ignore_errors=True)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    new_watermark = {
+        'sentiment_id': upper_id,
+        'exported_at': datetime.now().isoformat(),
+        'articles_exported': article_rows,
+        'prices_exported': price_rows
+    }
+    _save_watermark(export_dir, new_watermark)
+
+    elapsed = time.perf_counter() - started
+    print(f"Exported {article_rows} article rows and {price_rows} price rows in {elapsed:.1f}s")
+    return {
+        'articles': article_rows,
+        'prices': price_rows,
+        'watermark': upper_id,
+        'previous_watermark': since_id,
+        'seconds': elapsed
+    }
+
+class _ChunkSink:
+    """Write-only file object that collects what ParquetWriter writes, for streaming"""
+
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def article_export_bounds(since_id=0):
+    """(since_id, upper_id) for a streamed export; upper_id is the watermark to resume from"""
+    with db_connection() as conn:
+        if not conn:
+            return None
+        try:
+            return since_id, _latest_sentiment_id(conn.cursor())
+        except Exception as e:
+            print(f"Error reading export watermark: {e}")
+            return None
+
+def stream_articles_parquet(since_id, upper_id, symbols=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Generate one Parquet file of article scores in (since_id, upper_id], chunk by chunk
+
+    Each fetched batch becomes a row group whose bytes are yielded straight
+    away, so the response starts immediately and memory stays flat.
+
+    Parameters:
+    since_id (int): Only sentiment rows with a higher id
+    upper_id (int): ...and at most this id (from article_export_bounds)
+    symbols (list): Only these symbols (default: all)
+    batch_size (int): Rows per row group
+
+    Yields:
+    bytes: Parquet file content
+    """
+    import pyarrow.parquet as pq
+
+    symbol_filter, filter_params = _symbol_filter(symbols)
+    schema = articles_schema()
+
+    with db_connection() as conn:
+        if not conn:
+            raise RuntimeError("no database connection for export")
+
+        try:
+            cursor = conn.cursor(name='corpus_export_stream')
+            cursor.itersize = batch_size
+            cursor.execute(_ARTICLES_QUERY.format(symbol_filter=symbol_filter), (since_id, upper_id) + filter_params)
+
+            sink = _ChunkSink()
+            writer = pq.ParquetWriter(sink, schema)
+            for batch in _record_batches(cursor, schema, batch_size, stock_id_column=1, month_column=8):
+                writer.write_batch(batch)
+                yield sink.drain()
+            writer.close()
+            yield sink.drain()
+            cursor.close()
+        finally:
+            conn.rollback()
+
+def read_symbol_series(symbol, export_dir=CORPUS_EXPORT_DIR):
+    """
+    One symbol's scored articles and prices from the export, memory-mapped
+
+    Only the partitions of that symbol and the few columns the correlation
+    needs are read; files are memory-mapped rather than copied into memory.
+    Rescored articles keep only their latest score.
+
+    Returns:
+    tuple: (news datetimes, sentiment scores, price dates, closes) as numpy arrays,
+           or None if the symbol has no exported prices
+    """
+    import numpy as np
+    import pyarrow.parquet as pq
+
+    articles_path = os.path.join(export_dir, 'articles', f"symbol={symbol}")
+    prices_path = os.path.join(export_dir, 'prices', f"symbol={symbol}")
+    if not os.path.isdir(prices_path):
+        return None
+
+    prices = pq.read_table(prices_path, columns=['date', 'close_price'], memory_map=True)
+
+    news_dates = np.array([], dtype='datetime64[us]')
+    scores = np.array([], dtype=float)
+    if os.path.isdir(articles_path):
+        articles = pq.read_table(
+            articles_path, columns=['sentiment_id', 'article_id', 'published_at', 'sentiment_score'], memory_map=True
+        )
+        if articles.num_rows:
+            # Keep the newest score per article (a rescore adds rows with higher ids)
+            sentiment_ids = articles['sentiment_id'].to_numpy()
+            article_ids = articles['article_id'].to_numpy()
+            order = np.lexsort((-sentiment_ids, article_ids))
+            ordered_ids = article_ids[order]
+            keep = order[np.concatenate(([True], ordered_ids[1:] != ordered_ids[:-1]))]
+            news_dates = articles['published_at'].to_numpy()[keep]
+            scores = articles['sentiment_score'].to_numpy()[keep]
+
+    return news_dates, scores, prices['date'].to_numpy(), prices['close_price'].to_numpy()
+
+if __name__ == "__main__":
+    export_corpus(full=len(sys.argv) > 1 and sys.argv[1] == "full")
@@ -0,0 +1,112 @@
+# ml-service/src/correlation_engine.py
+import numpy as np
+from trading_calendar import to_day_array, align_to_trading_days
+
+# Lagged correlations are reported for trading days t+0 .. t+MAX_LAG_DAYS
+MAX_LAG_DAYS = 5
+
+
+def daily_mean(days, values):
+    """
+    Average values per day
+    
+    Returns:
+    tuple: (unique sorted datetime64[D] days, mean value per day)
+    """
+    unique_days, inverse = np.unique(days, return_inverse=True)
+    sums = np.bincount(inverse, weights=values, minlength=len(unique_days))
+    counts = np.bincount(inverse, minlength=len(unique_days))
+    return unique_days, sums / counts
+
+
+def _pearson(x, y):
+    if len(x) < 2:
+        return None
+    x = x - x.mean()
+    y = y - y.mean()
+    denominator = np.sqrt((x * x).sum() * (y * y).sum())
+    if denominator == 0:
+        return None
+    return float((x * y).sum() / denominator)
+
+
+def _rank(values):
+    """Average ranks (ties share the mean of their positions), as used by Spearman"""
+    order = np.argsort(values)
+    ordered = values[order]
+
+    # Runs of equal values in sorted order are the tie groups
+    first_index = np.concatenate(([0], np.flatnonzero(ordered[1:] != ordered[:-1]) + 1))
+    counts = np.diff(np.append(first_index, len(values)))
+
+    ranks = np.empty(len(values))
+    ranks[order] = np.repeat(first_index + (counts + 1) / 2, counts)
+    return ranks
+
+
+def _spearman(x, y):
+    if len(x) < 2:
+        return None
+    return _pearson(_rank(x), _rank(y))
+
+
+def correlate_series(news_dates, sentiment_scores, price_dates, closes, max_lag=MAX_LAG_DAYS):
+    """
+    Vectorized sentiment/price correlation for one symbol
+    
+    Parameters:
+    news_dates (array-like): Publication date of each scored article
+    sentiment_scores (array-like): Sentiment score of each article
+    price_dates (array-like): Trading dates, any order
+    closes (array-like): Close price for each trading date
+    max_lag (int): Report correlations against returns t+0 .. t+max_lag trading days later
+    
+    Returns:
+    dict: {
+        'news_date', 'trading_date', 'sentiment', 'price_change': aligned arrays,
+        'pearson', 'spearman': same-day correlation (None if undefined),
+        'lagged': [{'lag', 'observations', 'pearson', 'spearman'}, ...]
+    }
+    """
+    price_dates = to_day_array(price_dates)
+    closes = np.asarray(closes, dtype=float)
+
+    # Daily % returns, keyed by the day the return is realised
+    order = np.argsort(price_dates, kind='mergesort')
+    price_dates = price_dates[order]
+    closes = closes[order]
+    return_days = price_dates[1:]
+    returns = np.diff(closes) / closes[:-1] * 100
+
+    news_days, daily_sentiment = daily_mean(
+        to_day_array(news_dates), np.asarray(sentiment_scores, dtype=float)
+    )
+
+    trading_index = align_to_trading_days(news_days, return_days)
+    matched = trading_index >= 0
+    trading_index = trading_index[matched]
+    sentiment = daily_sentiment[matched]
+    price_change = returns[trading_index]
+
+    lagged = []
+    for lag in range(max_lag + 1):
+        lag_index = trading_index + lag
+        in_range = lag_index < len(returns)
+        x = sentiment[in_range]
+        y = returns[lag_index[in_range]]
+        lagged.append({
+            'lag': lag,
+            'observations': int(in_range.sum()),
+            'pearson': _pearson(x, y),
+            'spearman': _spearman(x, y)
+        })
+
+    return {
+        'news_date': news_days[matched],
+        'trading_date': return_days[trading_index],
+        'sentiment': sentiment,
+        'price_change': price_change,
+        'pearson': lagged[0]['pearson'],
+        'spearman': lagged[0]['spearman'],
+        'lagged': lagged
+    }
@@ -1,87 +1,118 @@
 # ml-service/src/daily_data_collector.py
+import os
 import schedule
+import threading
 import time
 from datetime import datetime, timedelta
 import logging
 from news_Collection import full_pipeline
 from stock_data import fetch_and_save_stocks
 from database_queries import get_api_usage_today
+from api_usage import MAX_NEWS_CALLS_PER_DAY, MAX_STOCK_CALLS_PER_DAY
+from job_runner import JobRunner
+
+# Log file for collection runs (blank = console only). Opened on the first
+# record, so importing this module never creates it
+COLLECTION_LOG_FILE = os.getenv('COLLECTION_LOG_FILE', 'data_collection.log')
 
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('data_collection.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.StreamHandler()] + (
+        [logging.FileHandler(COLLECTION_LOG_FILE, delay=True)] if COLLECTION_LOG_FILE else []
+    )
 )
 
-# API Limits
-MAX_NEWS_CALLS_PER_DAY = 100
-MAX_STOCK_CALLS_PER_DAY = 5
+TECH_STOCKS = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'META', 'TSLA', 'NVDA']
 
-def collect_daily_data():
-    """Main daily data collection function"""
-    logging.info("=== Starting Daily Data Collection ===")
+def build_collection_runner(fetch_stocks=fetch_and_save_stocks, run_pipeline=full_pipeline,
+                            get_usage=get_api_usage_today):
+    """
+    Job runner with the collection jobs registered
     
-    try:
-        # Check API usage
-        usage = get_api_usage_today()
-        logging.info(f"Current API usage: News: {usage['news_calls']}/{MAX_NEWS_CALLS_PER_DAY}, Stock: {usage['stock_calls']}/{MAX_STOCK_CALLS_PER_DAY}")
-        
-        # Collect stock prices first (uses fewer API calls)
-        if usage['stock_calls'] < MAX_STOCK_CALLS_PER_DAY:
-            logging.info("Collecting stock price data...")
-            tech_stocks = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'META', 'TSLA', 'NVDA']
-            stock_results = fetch_and_save_stocks(tech_stocks)
-            
-            success_count = sum(1 for result in stock_results.values() if not isinstance(result, dict) or not result.get('error'))
-            logging.info(f"Stock data collection completed: {success_count}/{len(tech_stocks)} successful")
-        else:
+    The fetchers are parameters so the jobs can be exercised without network
+    access by passing stubs.
+    
+    Returns:
+    JobRunner: with 'stock_prices' and 'news_sentiment' jobs
+    """
+    def stock_prices_job():
+        usage = get_usage()
+        if usage['stock_calls'] >= MAX_STOCK_CALLS_PER_DAY:
             logging.warning("Stock API limit reached, skipping stock price collection")
+            return 0
         
-        # Collect news and sentiment data
-        if usage['news_calls'] < MAX_NEWS_CALLS_PER_DAY:
-            logging.info("Collecting news and sentiment data...")
-            news_results = full_pipeline()
-            logging.info("News and sentiment collection completed")
-        else:
-            logging.warning("News API limit reached, skipping news collection")
+        logging.info("Collecting stock price data...")
+        stock_results = fetch_stocks(TECH_STOCKS)
         
-        logging.info("=== Daily Data Collection Completed Successfully ===")
+        stored = [data for data in stock_results.values() if not isinstance(data, dict)]
+        logging.info(f"Stock data collection completed: {len(stored)}/{len(TECH_STOCKS)} successful")
+        return sum(len(data) for data in stored)
+    
+    def news_sentiment_job():
+        usage = get_usage()
+        if usage['news_calls'] >= MAX_NEWS_CALLS_PER_DAY:
+            logging.warning("News API limit reached, skipping news collection")
+            return 0
         
-    except Exception as e:
-        logging.error(f"Error in daily data collection: {e}")
+        logging.info("Collecting news and sentiment data...")
+        news_results = run_pipeline()
+        if news_results is None:
+            # full_pipeline has already logged the fetch or API error
+            raise RuntimeError("news pipeline returned no results (fetch or API error)")
+        logging.info("News and sentiment collection completed")
+        return sum(results.get('new_articles', 0) for results in news_results.values())
+    
+    runner = JobRunner()
+    runner.register('stock_prices', stock_prices_job)
+    runner.register('news_sentiment', news_sentiment_job)
+    return runner
+
+collection_runner = build_collection_runner()
+
+def collect_daily_data():
+    """Main daily data collection function: price and news jobs run concurrently"""
+    logging.info("=== Starting Daily Data Collection ===")
+    
+    usage = get_api_usage_today()
+    logging.info(f"Current API usage: News: {usage['news_calls']}/{MAX_NEWS_CALLS_PER_DAY}, Stock: {usage['stock_calls']}/{MAX_STOCK_CALLS_PER_DAY}")
+    
+    results = collection_runner.run(['stock_prices', 'news_sentiment'])
+    for name, result in results.items():
+        logging.info(f"{name}: {result['status']} in {result['duration_seconds']:.1f}s, rows: {result['rows']}"
+                     + (f", error: {result['error']}" if result['error'] else ""))
+    
+    logging.info("=== Daily Data Collection Completed ===")
+    return results
 
 def collect_weekly_data():
     """Weekly comprehensive data collection"""
     logging.info("=== Starting Weekly Comprehensive Data Collection ===")
     
-    try:
-        # Reset API usage tracking for the week
-        # Run more comprehensive collection
-        logging.info("Running comprehensive news collection...")
-        
-        # You could run the pipeline with higher article counts for weekly collection
-        news_results = full_pipeline()
-        
-        logging.info("=== Weekly Data Collection Completed ===")
-        
-    except Exception as e:
-        logging.error(f"Error in weekly data collection: {e}")
+    # Same job name as the daily news run, so the two never overlap
+    result = collection_runner.run_job('news_sentiment')
+    
+    logging.info(f"=== Weekly Data Collection {result['status'].title()} ===")
+    return result
+
+def run_in_background(job):
+    """Scheduler wrapper: start the job on its own thread so the schedule loop never blocks"""
+    def start():
+        threading.Thread(target=job, name=job.__name__, daemon=True).start()
+    return start
 
 def schedule_data_collection():
     """Set up the data collection schedule"""
     
     # Daily collection at 9 AM (before market open)
-    schedule.every().day.at("09:00").do(collect_daily_data)
+    schedule.every().day.at("09:00").do(run_in_background(collect_daily_data))
     
     # Additional collection at 6 PM (after market close)
-    schedule.every().day.at("18:00").do(collect_daily_data)
+    schedule.every().day.at("18:00").do(run_in_background(collect_daily_data))
     
     # Weekly comprehensive collection on Sunday at 2 AM
-    schedule.every().sunday.at("02:00").do(collect_weekly_data)
+    schedule.every().sunday.at("02:00").do(run_in_background(collect_weekly_data))
     
     logging.info("Data collection schedule set up:")
     logging.info("- Daily collection: 9:00 AM and 6:00 PM")
@@ -96,7 +127,9 @@ def run_scheduler():
     try:
         while True:
             schedule.run_pending()
-            time.sleep(60)  # Check every minute
+            # Sleep until the next trigger, but wake at least once a minute
+            idle = schedule.idle_seconds()
+            time.sleep(min(60, max(1, idle if idle is not None else 60)))
     except KeyboardInterrupt:
         logging.info("Data collection scheduler stopped.")
 
@@ -112,13 +145,12 @@ def manual_collection():
     
     if choice == "1":
         print("Collecting news and sentiment data...")
-        full_pipeline()
+        collection_runner.run_job('news_sentiment')
         print("News collection completed!")
         
     elif choice == "2":
         print("Collecting stock price data...")
-        tech_stocks = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'META', 'TSLA', 'NVDA']
-        fetch_and_save_stocks(tech_stocks)
+        collection_runner.run_job('stock_prices')
         print("Stock price collection completed!")
         
     elif choice == "3":
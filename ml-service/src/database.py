@@ -1,228 +1,627 @@
 # ml-service/src/database.py
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import TRANSACTION_STATUS_UNKNOWN
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from urllib.parse import urlparse
+from response_cache import invalidate_response_cache
+from symbol_registry import get_symbol_registry
+from metrics import POOL_CHECKOUT_WAIT
+from live_updates import publish_sentiment_updates
 
-def get_db_connection():
-    """Create database connection"""
-    try:
-        print("Attempting to connect to database...")
-        
-        # Try to get connection details from DATABASE_URL environment variable first
-        database_url = os.getenv('DATABASE_URL')
-        
-        if database_url:
-            # Parse the DATABASE_URL
-            url = urlparse(database_url)
-            host = url.hostname
-            database = url.path[1:]  # Remove leading slash
-            user = url.username
-            password = url.password
-            port = url.port or 5432
-        else:
-            # Fallback to individual environment variables or defaults
-            # Check if we're running in Docker (hostname 'db' exists) or locally
-            default_host = 'db'
+# Connection pool settings (override via environment)
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+# Connections idle longer than this are pinged with SELECT 1 before reuse
+DB_POOL_PING_AFTER = float(os.getenv('DB_POOL_PING_AFTER', '30'))
+
+_db_config = None
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+_last_used = {}
+_borrowed = {}
+
+
+def get_db_config():
+    """Resolve connection settings once per process"""
+    global _db_config
+    if _db_config is not None:
+        return _db_config
+
+    # Try to get connection details from DATABASE_URL environment variable first
+    database_url = os.getenv('DATABASE_URL')
+
+    if database_url:
+        # Parse the DATABASE_URL
+        url = urlparse(database_url)
+        config = {
+            'host': url.hostname,
+            'database': url.path[1:],  # Remove leading slash
+            'user': url.username,
+            'password': url.password,
+            'port': url.port or 5432
+        }
+    else:
+        # Fallback to individual environment variables or defaults
+        # Check if we're running in Docker (hostname 'db' exists) or locally
+        default_host = 'db'
+        if not os.getenv('DB_HOST'):
             try:
-                import socket
                 socket.gethostbyname('db')
             except socket.gaierror:
                 # 'db' hostname not found, likely running locally
                 default_host = 'localhost'
-            
-            host = os.getenv('DB_HOST', default_host)
-            database = os.getenv('DB_NAME', 'sentiment_db')
-            user = os.getenv('DB_USER', 'postgres')
-            password = os.getenv('DB_PASSWORD', 'password')
-            port = os.getenv('DB_PORT', '5432')
-        
-        print(f"Host: {host}, Database: {database}, User: {user}, Port: {port}")
-        
-        conn = psycopg2.connect(
-            host=host,
-            database=database,
-            user=user,
-            password=password,
-            port=port
-        )
-        print("Database connection successful!")
+
+        config = {
+            'host': os.getenv('DB_HOST', default_host),
+            'database': os.getenv('DB_NAME', 'sentiment_db'),
+            'user': os.getenv('DB_USER', 'postgres'),
+            'password': os.getenv('DB_PASSWORD', 'password'),
+            'port': os.getenv('DB_PORT', '5432')
+        }
+
+    print(f"Host: {config['host']}, Database: {config['database']}, User: {config['user']}, Port: {config['port']}")
+    _db_config = config
+    return _db_config
+
+
+def init_db_pool():
+    """Create the process-wide connection pool (idempotent)"""
+    global _pool, _pool_slots
+    if _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None:
+            config = get_db_config()
+            print(f"Creating database connection pool (min={DB_POOL_MIN}, max={DB_POOL_MAX})...")
+            _pool = ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, **config)
+            _pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+    return _pool
+
+
+def close_db_pool():
+    """Close every pooled connection (e.g. on shutdown or after fork)"""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+        _pool = None
+        _pool_slots = None
+        _last_used.clear()
+        _borrowed.clear()
+
+
+def _connection_is_healthy(conn):
+    """Cheap liveness check, plus a ping for connections that sat idle"""
+    if conn.closed or conn.info.transaction_status == TRANSACTION_STATUS_UNKNOWN:
+        return False
+
+    last_used = _last_used.get(id(conn))
+    if last_used is None or time.monotonic() - last_used < DB_POOL_PING_AFTER:
+        return True
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def get_db_connection():
+    """Borrow a connection from the pool; pair with release_db_connection()"""
+    try:
+        pool = init_db_pool()
+        slots = _pool_slots
+
+        # The pool raises instead of blocking when exhausted, so bound checkouts ourselves
+        started = time.perf_counter()
+        acquired = slots.acquire(timeout=DB_POOL_TIMEOUT)
+        POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+        if not acquired:
+            print(f"Database connection error: no pooled connection free after {DB_POOL_TIMEOUT}s")
+            return None
+
+        try:
+            conn = pool.getconn()
+            if not _connection_is_healthy(conn):
+                pool.putconn(conn, close=True)
+                _last_used.pop(id(conn), None)
+                conn = pool.getconn()
+        except Exception:
+            slots.release()
+            raise
+
+        _borrowed[id(conn)] = slots
         return conn
     except Exception as e:
         print(f"Database connection error: {e}")
         print(f"Error type: {type(e)}")
         return None
 
+
+def release_db_connection(conn):
+    """Return a borrowed connection to the pool"""
+    if conn is None:
+        return
+
+    slots = _borrowed.pop(id(conn), None)
+    try:
+        if _pool is not None and slots is _pool_slots:
+            _last_used[id(conn)] = time.monotonic()
+            # putconn rolls back open transactions and discards broken connections
+            _pool.putconn(conn, close=conn.closed != 0)
+        else:
+            # Pool was reset since this connection was borrowed
+            conn.close()
+    finally:
+        if slots is not None:
+            slots.release()
+
+
+@contextmanager
+def db_connection():
+    """
+    Borrow a pooled connection for the duration of a with-block.
+
+    Yields None if no connection could be obtained, matching get_db_connection().
+    """
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        release_db_connection(conn)
+
 def save_article(article, stock_symbols=None):
     """Save news article to database"""
-    conn = get_db_connection()
-    if not conn:
-        return None
+    with db_connection() as conn:
+        if not conn:
+            return None
     
-    try:
-        cursor = conn.cursor()
-        
-        # Insert article
-        insert_query = """
-        INSERT INTO news_articles (title, description, content, url, url_to_image, source, author, published_at)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (url) DO NOTHING
-        RETURNING id;
-        """
-        
-        published_at = None
-        if article.get('publishedAt'):
-            published_at = datetime.fromisoformat(article['publishedAt'].replace('Z', '+00:00'))
-        
-        cursor.execute(insert_query, (
-            article.get('title'),
-            article.get('description'),
-            article.get('content'),
-            article.get('url'),
-            article.get('urlToImage'),
-            article.get('source'),
-            article.get('author'),
-            published_at
-        ))
-        
-        result = cursor.fetchone()
-        article_id = result[0] if result else None
-        
-        # Link to stocks if provided
-        if article_id and stock_symbols:
-            for symbol in stock_symbols:
-                # Get stock_id
-                cursor.execute("SELECT id FROM stocks WHERE symbol = %s", (symbol,))
-                stock_result = cursor.fetchone()
+        try:
+            cursor = conn.cursor()
+        
+            # Insert article
+            insert_query = """
+            INSERT INTO news_articles (title, description, content, url, url_to_image, source, author, published_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (url) DO NOTHING
+            RETURNING id;
+            """
+        
+            published_at = _parse_published_at(article)
+        
+            cursor.execute(insert_query, (
+                article.get('title'),
+                article.get('description'),
+                article.get('content'),
+                article.get('url'),
+                article.get('urlToImage'),
+                article.get('source'),
+                article.get('author'),
+                published_at
+            ))
+        
+            result = cursor.fetchone()
+            article_id = result[0] if result else None
+        
+            # Link to stocks if provided
+            if article_id and stock_symbols:
+                stock_ids = get_symbol_registry().get_ids(stock_symbols, cursor)
+                for symbol in stock_symbols:
+                    stock_id = stock_ids.get(symbol)
                 
-                if stock_result:
-                    stock_id = stock_result[0]
-                    
-                    # Insert relationship
-                    cursor.execute("""
-                        INSERT INTO article_stock_relations (article_id, stock_id)
-                        VALUES (%s, %s)
-                        ON CONFLICT (article_id, stock_id) DO NOTHING
-                    """, (article_id, stock_id))
-        
-        conn.commit()
-        return article_id
+                    if stock_id:
+                        # Insert relationship
+                        cursor.execute("""
+                            INSERT INTO article_stock_relations (article_id, stock_id)
+                            VALUES (%s, %s)
+                            ON CONFLICT (article_id, stock_id) DO NOTHING
+                        """, (article_id, stock_id))
         
-    except Exception as e:
-        print(f"Error saving article: {e}")
-        conn.rollback()
-        return None
-    finally:
-        conn.close()
+            conn.commit()
+            return article_id
+        
+        except Exception as e:
+            print(f"Error saving article: {e}")
+            conn.rollback()
+            return None
+
+def _parse_published_at(article):
+    """NewsAPI ISO timestamp -> datetime (or None)"""
+    if article.get('publishedAt'):
+        return datetime.fromisoformat(article['publishedAt'].replace('Z', '+00:00'))
+    return None
+
+_AGGREGATE_UPSERT = """
+    INSERT INTO daily_sentiment_aggregates
+        (stock_id, day, article_count, score_sum, score_sum_sq, score_min, score_max)
+    SELECT
+        ss.stock_id,
+        DATE(na.published_at),
+        COUNT(*),
+        SUM(ss.sentiment_score),
+        SUM(ss.sentiment_score * ss.sentiment_score),
+        MIN(ss.sentiment_score),
+        MAX(ss.sentiment_score)
+    FROM sentiment_scores ss
+    JOIN news_articles na ON na.id = ss.article_id
+    WHERE {where}
+    AND na.published_at IS NOT NULL
+    GROUP BY ss.stock_id, DATE(na.published_at)
+    ON CONFLICT (stock_id, day) DO UPDATE SET
+        article_count = daily_sentiment_aggregates.article_count + EXCLUDED.article_count,
+        score_sum = daily_sentiment_aggregates.score_sum + EXCLUDED.score_sum,
+        score_sum_sq = daily_sentiment_aggregates.score_sum_sq + EXCLUDED.score_sum_sq,
+        score_min = LEAST(daily_sentiment_aggregates.score_min, EXCLUDED.score_min),
+        score_max = GREATEST(daily_sentiment_aggregates.score_max, EXCLUDED.score_max),
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+def update_daily_aggregates(cursor, sentiment_ids):
+    """
+    Fold newly inserted sentiment scores into daily_sentiment_aggregates
+    
+    Runs on the caller's cursor so the aggregates commit (or roll back)
+    together with the scores themselves.
+    
+    Parameters:
+    cursor: Cursor inside the transaction that inserted the scores
+    sentiment_ids (list): ids of the new sentiment_scores rows
+    """
+    if sentiment_ids:
+        cursor.execute(_AGGREGATE_UPSERT.format(where="ss.id = ANY(%s)"), (list(sentiment_ids),))
+
+def rebuild_daily_aggregates():
+    """Recompute daily_sentiment_aggregates from scratch (after schema setup or a rescore)"""
+    with db_connection() as conn:
+        if not conn:
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM daily_sentiment_aggregates")
+            cursor.execute(_AGGREGATE_UPSERT.format(where="TRUE"))
+            conn.commit()
+            return True
+        except Exception as e:
+            print(f"Error rebuilding daily aggregates: {e}")
+            conn.rollback()
+            return False
+
+_RETURNS_UPSERT = """
+    INSERT INTO stock_daily_returns (stock_id, date, prev_date, close_price, price_change)
+    SELECT stock_id, date, prev_date, close_price,
+           (close_price - prev_close) / prev_close * 100
+    FROM (
+        SELECT
+            stock_id,
+            date,
+            close_price,
+            LAG(date) OVER w AS prev_date,
+            LAG(close_price) OVER w AS prev_close
+        FROM stock_prices
+        WHERE {where}
+        WINDOW w AS (PARTITION BY stock_id ORDER BY date)
+    ) ordered
+    WHERE prev_close IS NOT NULL AND prev_close <> 0
+    ON CONFLICT (stock_id, date) DO UPDATE SET
+        prev_date = EXCLUDED.prev_date,
+        close_price = EXCLUDED.close_price,
+        price_change = EXCLUDED.price_change
+"""
+
+def update_daily_returns(cursor, stock_id, since):
+    """
+    Recompute stock_daily_returns for one stock from `since` onwards
+    
+    Returns are taken against the previous stored trading day (LAG over date),
+    so Mondays and post-holiday sessions are covered. The window starts at the
+    last trading day before `since` so the first recomputed row has its
+    previous close, and the whole update is one range scan on (stock_id, date).
+    
+    Parameters:
+    cursor: Cursor inside the transaction that wrote the prices
+    stock_id (int): Stock whose prices changed
+    since (str|date): Earliest price date that was inserted or updated
+    """
+    cursor.execute(
+        _RETURNS_UPSERT.format(where="""
+            stock_id = %s
+            AND date >= COALESCE(
+                (SELECT MAX(date) FROM stock_prices WHERE stock_id = %s AND date < %s),
+                %s
+            )
+        """),
+        (stock_id, stock_id, since, since)
+    )
+
+def rebuild_daily_returns():
+    """Recompute stock_daily_returns from scratch (after schema setup)"""
+    with db_connection() as conn:
+        if not conn:
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM stock_daily_returns")
+            cursor.execute(_RETURNS_UPSERT.format(where="TRUE"))
+            conn.commit()
+            return True
+        except Exception as e:
+            print(f"Error rebuilding daily returns: {e}")
+            conn.rollback()
+            return False
+
+def insert_sentiment_scores(cursor, rows, update_aggregates=True, publish=True):
+    """
+    Multi-row insert into sentiment_scores on an open cursor, keeping
+    daily_sentiment_aggregates in step
+    
+    Parameters:
+    cursor: Cursor inside the caller's transaction
+    rows (list): (article_id, stock_id, sentiment_score) tuples
+    update_aggregates (bool): False when the caller rebuilds the aggregates
+                              itself afterwards (e.g. a full rescore)
+    publish (bool): Announce the new scores to /stream subscribers on commit
+    
+    Returns:
+    list: Inserted sentiment score ids
+    """
+    if not rows:
+        return []
+    
+    result = execute_values(cursor, """
+        INSERT INTO sentiment_scores (article_id, stock_id, sentiment_score)
+        VALUES %s
+        RETURNING id
+    """, rows, page_size=len(rows), fetch=True)
+    
+    sentiment_ids = [row[0] for row in result]
+    if update_aggregates:
+        update_daily_aggregates(cursor, sentiment_ids)
+    if publish:
+        publish_sentiment_updates(cursor, sentiment_ids)
+    return sentiment_ids
+
+def save_articles_bulk(filtered_articles, scorer):
+    """
+    Save a whole filter_relevant_articles() result in a single transaction
+    
+    Articles, article_stock_relations and sentiment_scores are each written with
+    one multi-row INSERT, so a refresh costs a handful of round trips no matter
+    how many articles it carries. Articles without a URL cannot be deduplicated
+    and are skipped.
+    
+    Parameters:
+    filtered_articles (dict): {symbol: [articles]} from filter_relevant_articles
+    scorer (callable): Takes a list of articles, returns their combined sentiment
+                       scores. Only called for articles new to the database.
+    
+    Returns:
+    dict: {symbol: [{'article_id', 'title', 'sentiment_score'}]} for the articles
+          that were actually inserted, or None if the transaction failed
+    """
+    # One row per URL, remembering every symbol the article matched
+    articles_by_url = {}
+    symbols_by_url = {}
+    for symbol, articles in filtered_articles.items():
+        for article in articles:
+            url = article.get('url')
+            if not url:
+                continue
+            articles_by_url.setdefault(url, article)
+            symbols_by_url.setdefault(url, [])
+            if symbol not in symbols_by_url[url]:
+                symbols_by_url[url].append(symbol)
+    
+    inserted = {symbol: [] for symbol in filtered_articles}
+    if not articles_by_url:
+        return inserted
+    
+    with db_connection() as conn:
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            
+            stock_ids = get_symbol_registry().get_ids(filtered_articles, cursor)
+            
+            for symbol in filtered_articles:
+                if symbol not in stock_ids:
+                    print(f"❌ Stock {symbol} not found in database")
+            
+            # Insert articles; existing URLs are skipped and not returned
+            article_rows = [
+                (
+                    article.get('title'),
+                    article.get('description'),
+                    article.get('content'),
+                    url,
+                    article.get('urlToImage'),
+                    article.get('source'),
+                    article.get('author'),
+                    _parse_published_at(article)
+                )
+                for url, article in articles_by_url.items()
+            ]
+            new_rows = execute_values(cursor, """
+                INSERT INTO news_articles (title, description, content, url, url_to_image, source, author, published_at)
+                VALUES %s
+                ON CONFLICT (url) DO NOTHING
+                RETURNING id, url
+            """, article_rows, page_size=len(article_rows), fetch=True)
+            
+            if not new_rows:
+                conn.commit()
+                return inserted
+            
+            new_articles = [articles_by_url[url] for _, url in new_rows]
+            scores = scorer(new_articles)
+            
+            relation_rows = []
+            sentiment_rows = []
+            for (article_id, url), article, score in zip(new_rows, new_articles, scores):
+                for symbol in symbols_by_url[url]:
+                    stock_id = stock_ids.get(symbol)
+                    if not stock_id:
+                        continue
+                    relation_rows.append((article_id, stock_id))
+                    sentiment_rows.append((article_id, stock_id, float(score)))
+                    inserted[symbol].append({
+                        'article_id': article_id,
+                        'title': article.get('title'),
+                        'sentiment_score': float(score)
+                    })
+            
+            if relation_rows:
+                execute_values(cursor, """
+                    INSERT INTO article_stock_relations (article_id, stock_id)
+                    VALUES %s
+                    ON CONFLICT (article_id, stock_id) DO NOTHING
+                """, relation_rows, page_size=len(relation_rows))
+            
+            insert_sentiment_scores(cursor, sentiment_rows)
+            
+            conn.commit()
+            return inserted
+        
+        except Exception as e:
+            print(f"Error saving articles in bulk: {e}")
+            conn.rollback()
+            return None
 
 def save_stock_prices(symbol, stock_data):
     """Save stock price data to database"""
-    conn = get_db_connection()
-    if not conn:
-        return False
+    with db_connection() as conn:
+        if not conn:
+            return False
     
-    try:
-        cursor = conn.cursor()
+        try:
+            cursor = conn.cursor()
         
-        # Get stock_id
-        cursor.execute("SELECT id FROM stocks WHERE symbol = %s", (symbol,))
-        stock_result = cursor.fetchone()
+            stock_id = get_symbol_registry().get_id(symbol, cursor)
         
-        if not stock_result:
-            print(f"Stock {symbol} not found in database")
-            return False
+            if not stock_id:
+                print(f"Stock {symbol} not found in database")
+                return False
         
-        stock_id = stock_result[0]
+            # Upsert all rows in one statement
+            if stock_data:
+                execute_values(cursor, """
+                    INSERT INTO stock_prices (stock_id, date, close_price)
+                    VALUES %s
+                    ON CONFLICT (stock_id, date) DO UPDATE SET close_price = EXCLUDED.close_price
+                """, [(stock_id, day['date'], day['close']) for day in stock_data], page_size=len(stock_data))
+                update_daily_returns(cursor, stock_id, min(day['date'] for day in stock_data))
         
-        # Insert stock prices
-        for day in stock_data:
-            cursor.execute("""
-                INSERT INTO stock_prices (stock_id, date, close_price)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (stock_id, date) DO UPDATE SET close_price = EXCLUDED.close_price
-            """, (stock_id, day['date'], day['close']))
+            conn.commit()
+            if stock_data:
+                invalidate_response_cache()
+            print(f"Saved {len(stock_data)} price records for {symbol}")
+            return True
         
-        conn.commit()
-        print(f"Saved {len(stock_data)} price records for {symbol}")
-        return True
+        except Exception as e:
+            print(f"Error saving stock prices: {e}")
+            conn.rollback()
+            return False
+
+def get_latest_price_dates(symbols):
+    """
+    Most recent stored price date per symbol
+    
+    Parameters:
+    symbols (list): Stock symbols
+    
+    Returns:
+    dict: {symbol: datetime.date} for symbols that have any prices stored
+    """
+    with db_connection() as conn:
+        if not conn:
+            return {}
         
-    except Exception as e:
-        print(f"Error saving stock prices: {e}")
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
+        try:
+            cursor = conn.cursor()
+            stock_ids = get_symbol_registry().get_ids(symbols, cursor)
+            symbols_by_id = {stock_id: symbol for symbol, stock_id in stock_ids.items()}
+            cursor.execute("""
+                SELECT stock_id, MAX(date)
+                FROM stock_prices
+                WHERE stock_id = ANY(%s)
+                GROUP BY stock_id
+            """, (list(symbols_by_id),))
+            return {symbols_by_id[stock_id]: latest for stock_id, latest in cursor.fetchall()}
+        except Exception as e:
+            print(f"Error getting latest price dates: {e}")
+            return {}
 
 def save_sentiment_score(article_id, stock_id, sentiment_score, confidence=None):
     """Save sentiment score to database"""
-    conn = get_db_connection()
-    if not conn:
-        return None
+    with db_connection() as conn:
+        if not conn:
+            return None
     
-    try:
-        cursor = conn.cursor()
+        try:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            INSERT INTO sentiment_scores (article_id, stock_id, sentiment_score, confidence)
-            VALUES (%s, %s, %s, %s)
-            RETURNING id;
-        """, (article_id, stock_id, sentiment_score, confidence))
+            cursor.execute("""
+                INSERT INTO sentiment_scores (article_id, stock_id, sentiment_score, confidence)
+                VALUES (%s, %s, %s, %s)
+                RETURNING id;
+            """, (article_id, stock_id, sentiment_score, confidence))
         
-        result = cursor.fetchone()
-        sentiment_id = result[0] if result else None
+            result = cursor.fetchone()
+            sentiment_id = result[0] if result else None
+            
+            if sentiment_id:
+                update_daily_aggregates(cursor, [sentiment_id])
+                publish_sentiment_updates(cursor, [sentiment_id])
         
-        conn.commit()
-        return sentiment_id
+            conn.commit()
+            return sentiment_id
         
-    except Exception as e:
-        print(f"Error saving sentiment score: {e}")
-        conn.rollback()
-        return None
-    finally:
-        conn.close()
+        except Exception as e:
+            print(f"Error saving sentiment score: {e}")
+            conn.rollback()
+            return None
 
 def get_stock_id(symbol):
-    """Get stock ID from database"""
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM stocks WHERE symbol = %s", (symbol,))
-        result = cursor.fetchone()
-        return result[0] if result else None
-    except Exception as e:
-        print(f"Error getting stock ID for {symbol}: {e}")
-        return None
-    finally:
-        conn.close()
+    """Get stock ID (from the in-process symbol registry)"""
+    return get_symbol_registry().get_id(symbol)
 
 
 def test_db_connection():
     """Test database connection and show available stocks"""
-    conn = get_db_connection()
-    if not conn:
-        return False
+    with db_connection() as conn:
+        if not conn:
+            return False
     
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("SELECT * FROM stocks")
-        stocks = cursor.fetchall()
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("SELECT * FROM stocks")
+            stocks = cursor.fetchall()
         
-        print("Database connection successful!")
-        print("Available stocks:")
-        for stock in stocks:
-            print(f"  {stock['symbol']}: {stock['name']}")
+            print("Database connection successful!")
+            print("Available stocks:")
+            for stock in stocks:
+                print(f"  {stock['symbol']}: {stock['name']}")
         
-        return True
+            return True
         
-    except Exception as e:
-        print(f"Database test error: {e}")
-        return False
-    finally:
-        conn.close()
+        except Exception as e:
+            print(f"Database test error: {e}")
+            return False
 
 
     return False
@@ -0,0 +1,145 @@
+# ml-service/src/database_async.py
+# asyncpg connection pool for the async query layer (database_queries_async.py,
+# served by app_async.py). Uses the same connection settings as database.py.
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from database import get_db_config
+from metrics import POOL_CHECKOUT_WAIT
+
+# Async pool settings (override via environment). One event loop multiplexes
+# every request over these connections, so the pool can stay small
+ASYNC_DB_POOL_MIN = int(os.getenv('ASYNC_DB_POOL_MIN', '2'))
+ASYNC_DB_POOL_MAX = int(os.getenv('ASYNC_DB_POOL_MAX', '20'))
+ASYNC_DB_POOL_TIMEOUT = float(os.getenv('ASYNC_DB_POOL_TIMEOUT', '30'))
+# Pooled connections idle longer than this are closed
+ASYNC_DB_MAX_IDLE = float(os.getenv('ASYNC_DB_MAX_IDLE', '300'))
+
+_pool = None
+_pool_slots = None
+_pool_lock = None
+
+
+class _FairSlots:
+    """
+    First-come, first-served connection slots for one event loop
+
+    asyncpg's pool hands a released connection to whichever coroutine asks
+    next, so under sustained load new requests overtake ones already waiting
+    and a few wait for seconds. Here a released slot goes straight to the
+    longest waiter.
+    """
+
+    def __init__(self, slots):
+        self._free = slots
+        self._waiters = deque()
+
+    async def acquire(self):
+        if self._free and not self._waiters:
+            self._free -= 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as we gave up: pass it on
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._free += 1
+
+
+async def init_async_db_pool():
+    """Create the event loop's connection pool (idempotent)"""
+    global _pool, _pool_slots, _pool_lock
+    if _pool is not None:
+        return _pool
+
+    import asyncpg
+
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if _pool is None:
+            config = get_db_config()
+            print(f"Creating async database connection pool (min={ASYNC_DB_POOL_MIN}, max={ASYNC_DB_POOL_MAX})...")
+            _pool = await asyncpg.create_pool(
+                host=config['host'],
+                port=int(config['port']),
+                user=config['user'],
+                password=config['password'],
+                database=config['database'],
+                min_size=ASYNC_DB_POOL_MIN,
+                max_size=ASYNC_DB_POOL_MAX,
+                max_inactive_connection_lifetime=ASYNC_DB_MAX_IDLE
+            )
+            _pool_slots = _FairSlots(ASYNC_DB_POOL_MAX)
+    return _pool
+
+
+async def close_async_db_pool():
+    """Close every pooled connection (on shutdown)"""
+    global _pool, _pool_slots, _pool_lock
+    if _pool is not None:
+        await _pool.close()
+    _pool = None
+    _pool_slots = None
+    _pool_lock = None
+
+
+@asynccontextmanager
+async def async_db_connection():
+    """
+    Borrow a pooled connection for the duration of an `async with` block
+
+    Yields None if the database is unreachable or no connection frees up
+    within ASYNC_DB_POOL_TIMEOUT, like database.db_connection. Waiting for
+    a connection suspends only this request, not the event loop.
+    """
+    try:
+        pool = await init_async_db_pool()
+        slots = _pool_slots
+        started = time.perf_counter()
+        await asyncio.wait_for(slots.acquire(), ASYNC_DB_POOL_TIMEOUT)
+        POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+    except asyncio.TimeoutError:
+        print(f"Async database connection error: no pooled connection free after {ASYNC_DB_POOL_TIMEOUT}s")
+        yield None
+        return
+    except Exception as e:
+        print(f"Async database connection error: {e}")
+        yield None
+        return
+
+    try:
+        conn = await pool.acquire()
+    except asyncio.CancelledError:
+        slots.release()
+        raise
+    except Exception as e:
+        slots.release()
+        print(f"Async database connection error: {e}")
+        yield None
+        return
+
+    try:
+        yield conn
+    finally:
+        try:
+            await pool.release(conn)
+        finally:
+            slots.release()
@@ -1,245 +1,417 @@
 # ml-service/src/database_queries.py
-import psycopg2
 from psycopg2.extras import RealDictCursor
-from database import get_db_connection
-from datetime import datetime, timedelta
+from database import db_connection
+from response_cache import skip_caching
+from symbol_registry import get_symbol_registry
+from api_usage import get_api_usage_ledger
+from metrics import record_query_error, timed_query
+from datetime import date, datetime, timedelta
 
+@timed_query
 def get_articles_with_sentiment(symbol, days_back=30, limit=50):
     """Get stored articles with sentiment scores for a symbol"""
-    conn = get_db_connection()
-    if not conn:
-        return []
+    with db_connection() as conn:
+        if not conn:
+            record_query_error('get_articles_with_sentiment')
+            skip_caching()
+            return []
     
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cutoff_date = datetime.now() - timedelta(days=days_back)
-        
-        query = """
-        SELECT 
-            na.title,
-            na.description,
-            na.url,
-            na.source,
-            na.published_at,
-            ss.sentiment_score,
-            CASE 
-                WHEN ss.sentiment_score > 0.1 THEN 'positive'
-                WHEN ss.sentiment_score < -0.1 THEN 'negative'
-                ELSE 'neutral'
-            END as sentiment_classification
-        FROM news_articles na
-        JOIN article_stock_relations asr ON na.id = asr.article_id
-        JOIN stocks s ON asr.stock_id = s.id
-        JOIN sentiment_scores ss ON na.id = ss.article_id
-        WHERE s.symbol = %s 
-        AND na.published_at >= %s
-        ORDER BY na.published_at DESC
-        LIMIT %s
-        """
-        
-        cursor.execute(query, (symbol, cutoff_date, limit))
-        articles = cursor.fetchall()
-        
-        # Convert to list of dicts for JSON serialization
-        return [dict(article) for article in articles]
-        
-    except Exception as e:
-        print(f"Error getting articles for {symbol}: {e}")
-        return []
-    finally:
-        conn.close()
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-def get_correlation_data(symbol, days_back=90):
-    """Get sentiment-price correlation data from database"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+            stock_id = get_symbol_registry().get_id(symbol, cursor)
+            if not stock_id:
+                return []
         
-        cutoff_date = datetime.now() - timedelta(days=days_back)
+            cutoff_date = datetime.now() - timedelta(days=days_back)
         
-        query = """
-        WITH daily_sentiment AS (
+            query = """
             SELECT 
-                DATE(na.published_at) as news_date,
-                AVG(ss.sentiment_score) as avg_sentiment
+                na.title,
+                na.description,
+                na.url,
+                na.source,
+                na.published_at,
+                ss.sentiment_score,
+                CASE 
+                    WHEN ss.sentiment_score > 0.1 THEN 'positive'
+                    WHEN ss.sentiment_score < -0.1 THEN 'negative'
+                    ELSE 'neutral'
+                END as sentiment_classification
             FROM news_articles na
             JOIN article_stock_relations asr ON na.id = asr.article_id
-            JOIN stocks s ON asr.stock_id = s.id
-            JOIN sentiment_scores ss ON na.id = ss.article_id
-            WHERE s.symbol = %s 
+            JOIN sentiment_scores ss ON na.id = ss.article_id AND asr.stock_id = ss.stock_id
+            WHERE asr.stock_id = %s 
             AND na.published_at >= %s
-            GROUP BY DATE(na.published_at)
-        ),
-        price_changes AS (
-            SELECT 
-                sp1.date as trading_date,
-                ((sp1.close_price - sp2.close_price) / sp2.close_price) * 100 as price_change
-            FROM stock_prices sp1
-            JOIN stock_prices sp2 ON sp1.stock_id = sp2.stock_id 
-                AND sp2.date = sp1.date - INTERVAL '1 day'
-            JOIN stocks s ON sp1.stock_id = s.id
-            WHERE s.symbol = %s
-            AND sp1.date >= %s
-        )
-        SELECT 
-            ds.news_date::text,
-            pc.trading_date::text,
-            ds.avg_sentiment as sentiment,
-            pc.price_change
-        FROM daily_sentiment ds
-        JOIN price_changes pc ON ds.news_date = pc.trading_date
-        ORDER BY ds.news_date DESC
-        """
+            ORDER BY na.published_at DESC
+            LIMIT %s
+            """
         
-        cursor.execute(query, (symbol, cutoff_date, symbol, cutoff_date))
-        correlations = cursor.fetchall()
+            cursor.execute(query, (stock_id, cutoff_date, limit))
+            articles = cursor.fetchall()
         
-        return [dict(correlation) for correlation in correlations]
+            # Convert to list of dicts for JSON serialization
+            return [dict(article) for article in articles]
         
-    except Exception as e:
-        print(f"Error getting correlation data for {symbol}: {e}")
-        return []
-    finally:
-        conn.close()
+        except Exception as e:
+            print(f"Error getting articles for {symbol}: {e}")
+            record_query_error('get_articles_with_sentiment')
+            skip_caching()
+            return []
 
-def get_batch_sentiment_summary():
-    """Get sentiment summary for all stocks"""
-    conn = get_db_connection()
-    if not conn:
-        return {}
+@timed_query
+def get_correlation_data(symbol, days_back=90):
+    """
+    Get sentiment-price correlation data from database
     
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+    Daily sentiment comes from daily_sentiment_aggregates and returns from
+    stock_daily_returns (one range scan each); news days are matched to
+    trading days with trading_calendar, so weekend and holiday news lands on
+    the next session exactly as in the in-memory correlation engine.
+    """
+    # numpy is only needed here; keep it out of the import path of the CLI tools
+    from trading_calendar import TRADING_DAY_WINDOW, to_day_array, align_to_trading_days
+    
+    with db_connection() as conn:
+        if not conn:
+            record_query_error('get_correlation_data')
+            skip_caching()
+            return []
+    
+        try:
+            cursor = conn.cursor()
+
+            stock_id = get_symbol_registry().get_id(symbol, cursor)
+            if not stock_id:
+                return []
         
-        # Get recent sentiment (last 7 days)
-        query = """
-        SELECT 
-            s.symbol,
-            COUNT(na.id) as articles_found,
-            AVG(ss.sentiment_score) as avg_sentiment,
-            CASE 
-                WHEN AVG(ss.sentiment_score) > 0.1 THEN 'positive'
-                WHEN AVG(ss.sentiment_score) < -0.1 THEN 'negative'
-                ELSE 'neutral'
-            END as classification
-        FROM stocks s
-        LEFT JOIN article_stock_relations asr ON s.id = asr.stock_id
-        LEFT JOIN news_articles na ON asr.article_id = na.id
-        LEFT JOIN sentiment_scores ss ON na.id = ss.article_id
-        WHERE na.published_at >= NOW() - INTERVAL '7 days'
-        GROUP BY s.symbol
-        ORDER BY s.symbol
-        """
+            cutoff_date = (datetime.now() - timedelta(days=days_back)).date()
         
-        cursor.execute(query)
-        results = cursor.fetchall()
+            cursor.execute("""
+                SELECT dsa.day, dsa.score_sum / dsa.article_count
+                FROM daily_sentiment_aggregates dsa
+                WHERE dsa.stock_id = %s 
+                AND dsa.day >= %s
+                AND dsa.article_count > 0
+                ORDER BY dsa.day
+            """, (stock_id, cutoff_date))
+            sentiment_rows = cursor.fetchall()
         
-        batch_data = {}
-        for row in results:
-            batch_data[row['symbol']] = {
-                'articles_found': row['articles_found'] or 0,
-                'overall_sentiment': {
-                    'score': float(row['avg_sentiment']) if row['avg_sentiment'] else 0,
-                    'classification': row['classification'] or 'neutral'
-                } if row['avg_sentiment'] else None
-            }
+            if not sentiment_rows:
+                return []
+        
+            # Returns slightly before the cutoff let early news fall back a session
+            cursor.execute("""
+                SELECT sdr.date, sdr.price_change
+                FROM stock_daily_returns sdr
+                WHERE sdr.stock_id = %s
+                AND sdr.date >= %s
+                ORDER BY sdr.date
+            """, (stock_id, cutoff_date - timedelta(days=TRADING_DAY_WINDOW)))
+            return_rows = cursor.fetchall()
+        
+            news_days = to_day_array([row[0] for row in sentiment_rows])
+            trading_days = to_day_array([row[0] for row in return_rows])
+            trading_index = align_to_trading_days(news_days, trading_days)
         
-        return batch_data
+            correlations = [
+                {
+                    'news_date': str(news_days[i]),
+                    'trading_date': str(trading_days[index]),
+                    'sentiment': float(sentiment_rows[i][1]),
+                    'price_change': float(return_rows[index][1])
+                }
+                for i, index in enumerate(trading_index) if index >= 0
+            ]
+            correlations.reverse()
+            return correlations
         
-    except Exception as e:
-        print(f"Error getting batch sentiment: {e}")
-        return {}
-    finally:
-        conn.close()
+        except Exception as e:
+            print(f"Error getting correlation data for {symbol}: {e}")
+            record_query_error('get_correlation_data')
+            skip_caching()
+            return []
 
-def check_data_freshness(symbol, hours=24):
-    """Check if we have fresh data for a symbol"""
-    conn = get_db_connection()
-    if not conn:
-        return False
+@timed_query
+def get_batch_sentiment_summary(symbols, days_back=7):
+    """
+    Get sentiment summary for a list of stocks in one query
+    
+    Parameters:
+    symbols (list): Stock symbols to summarise (only these are aggregated)
+    days_back (int): Window in days
     
-    try:
-        cursor = conn.cursor()
+    Returns:
+    dict: {symbol: {'articles_found', 'overall_sentiment'}} for symbols with data
+    """
+    with db_connection() as conn:
+        if not conn:
+            record_query_error('get_batch_sentiment_summary')
+            skip_caching()
+            return {}
+        if not symbols:
+            return {}
+    
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
         
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+            # Get recent sentiment for the requested symbols from the daily aggregates
+            query = """
+            WITH recent AS (
+                SELECT 
+                    dsa.stock_id,
+                    SUM(dsa.article_count) as articles_found,
+                    SUM(dsa.score_sum) / NULLIF(SUM(dsa.article_count), 0) as avg_sentiment
+                FROM daily_sentiment_aggregates dsa
+                WHERE dsa.stock_id = ANY(%s)
+                AND dsa.day >= CURRENT_DATE - %s
+                GROUP BY dsa.stock_id
+            )
+            SELECT 
+                r.stock_id,
+                r.articles_found,
+                r.avg_sentiment,
+                CASE 
+                    WHEN r.avg_sentiment > 0.1 THEN 'positive'
+                    WHEN r.avg_sentiment < -0.1 THEN 'negative'
+                    ELSE 'neutral'
+                END as classification
+            FROM recent r
+            """
         
-        # Check for recent articles
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM news_articles na
-            JOIN article_stock_relations asr ON na.id = asr.article_id
-            JOIN stocks s ON asr.stock_id = s.id
-            WHERE s.symbol = %s 
-            AND na.published_at >= %s
-        """, (symbol, cutoff_time))
+            stock_ids = get_symbol_registry().get_ids(symbols, cursor)
+            symbols_by_id = {stock_id: symbol for symbol, stock_id in stock_ids.items()}
+            if not stock_ids:
+                return {}
         
-        recent_articles = cursor.fetchone()[0]
+            cursor.execute(query, (list(symbols_by_id), days_back))
+            results = cursor.fetchall()
         
-        # Check for recent stock prices
-        cursor.execute("""
-            SELECT COUNT(*)
-            FROM stock_prices sp
-            JOIN stocks s ON sp.stock_id = s.id
-            WHERE s.symbol = %s
-            AND sp.date >= %s
-        """, (symbol, cutoff_time.date()))
+            batch_data = {}
+            for row in results:
+                batch_data[symbols_by_id[row['stock_id']]] = {
+                    'articles_found': row['articles_found'] or 0,
+                    'overall_sentiment': {
+                        'score': float(row['avg_sentiment']) if row['avg_sentiment'] else 0,
+                        'classification': row['classification'] or 'neutral'
+                    } if row['avg_sentiment'] else None
+                }
         
-        recent_prices = cursor.fetchone()[0]
+            return batch_data
         
-        return recent_articles > 0 and recent_prices > 0
+        except Exception as e:
+            print(f"Error getting batch sentiment: {e}")
+            record_query_error('get_batch_sentiment_summary')
+            skip_caching()
+            return {}
+
+@timed_query
+def get_daily_sentiment(symbol, days_back=30):
+    """Per-day sentiment statistics for a symbol, read from the daily aggregates"""
+    with db_connection() as conn:
+        if not conn:
+            record_query_error('get_daily_sentiment')
+            skip_caching()
+            return []
         
-    except Exception as e:
-        print(f"Error checking data freshness for {symbol}: {e}")
-        return False
-    finally:
-        conn.close()
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-def get_api_usage_today():
-    """Track API usage to manage limits"""
-    conn = get_db_connection()
-    if not conn:
-        return {'news_calls': 0, 'stock_calls': 0}
+            stock_id = get_symbol_registry().get_id(symbol, cursor)
+            if not stock_id:
+                return []
+            
+            cutoff_date = (datetime.now() - timedelta(days=days_back)).date()
+            
+            query = """
+            SELECT 
+                dsa.day::text as day,
+                dsa.article_count,
+                dsa.score_sum / dsa.article_count as avg_sentiment,
+                SQRT(GREATEST(
+                    dsa.score_sum_sq / dsa.article_count - POWER(dsa.score_sum / dsa.article_count, 2), 0
+                )) as stddev_sentiment,
+                dsa.score_min::float as min_sentiment,
+                dsa.score_max::float as max_sentiment
+            FROM daily_sentiment_aggregates dsa
+            WHERE dsa.stock_id = %s
+            AND dsa.day >= %s
+            AND dsa.article_count > 0
+            ORDER BY dsa.day DESC
+            """
+            
+            cursor.execute(query, (stock_id, cutoff_date))
+            return [dict(row) for row in cursor.fetchall()]
+        
+        except Exception as e:
+            print(f"Error getting daily sentiment for {symbol}: {e}")
+            record_query_error('get_daily_sentiment')
+            skip_caching()
+            return []
+
+@timed_query
+def get_sentiment_summary(symbol, days_back=30):
+    """
+    Overall sentiment for a symbol over a window, read from the daily aggregates
     
-    try:
-        cursor = conn.cursor()
+    Returns:
+    dict: {'articles_count', 'avg_sentiment', 'classification', 'min_sentiment', 'max_sentiment'},
+          or None if there are no scored articles in the window
+    """
+    with db_connection() as conn:
+        if not conn:
+            record_query_error('get_sentiment_summary')
+            skip_caching()
+            return None
         
-        # You'd need to create an api_usage table to track this
-        # For now, return estimated usage
-        today = datetime.now().date()
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+            stock_id = get_symbol_registry().get_id(symbol, cursor)
+            if not stock_id:
+                return None
+            
+            cutoff_date = (datetime.now() - timedelta(days=days_back)).date()
+            
+            query = """
+            SELECT 
+                SUM(dsa.article_count) as articles_count,
+                SUM(dsa.score_sum) / NULLIF(SUM(dsa.article_count), 0) as avg_sentiment,
+                MIN(dsa.score_min)::float as min_sentiment,
+                MAX(dsa.score_max)::float as max_sentiment
+            FROM daily_sentiment_aggregates dsa
+            WHERE dsa.stock_id = %s
+            AND dsa.day >= %s
+            """
+            
+            cursor.execute(query, (stock_id, cutoff_date))
+            row = cursor.fetchone()
+            
+            if not row or not row['articles_count']:
+                return None
+            
+            avg_sentiment = row['avg_sentiment']
+            if avg_sentiment > 0.1:
+                classification = 'positive'
+            elif avg_sentiment < -0.1:
+                classification = 'negative'
+            else:
+                classification = 'neutral'
+            
+            return {
+                'articles_count': int(row['articles_count']),
+                'avg_sentiment': avg_sentiment,
+                'classification': classification,
+                'min_sentiment': row['min_sentiment'],
+                'max_sentiment': row['max_sentiment']
+            }
         
-        # Count articles fetched today (estimate API calls)
-        cursor.execute("""
-            SELECT COUNT(DISTINCT DATE(created_at))
-            FROM news_articles 
-            WHERE DATE(created_at) = %s
-        """, (today,))
+        except Exception as e:
+            print(f"Error getting sentiment summary for {symbol}: {e}")
+            record_query_error('get_sentiment_summary')
+            skip_caching()
+            return None
+
+@timed_query
+def get_article_counts(days_back=365):
+    """
+    Scored articles per symbol over a window, for every stock in the stocks table
+    
+    Counts come from daily_sentiment_aggregates, so this is one small
+    aggregate query rather than a fetch of the articles themselves.
+    
+    Returns:
+    dict: {symbol: article count} (0 for stocks without recent articles)
+    """
+    with db_connection() as conn:
+        if not conn:
+            record_query_error('get_article_counts')
+            skip_caching()
+            return {}
+    
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT s.symbol, COALESCE(SUM(dsa.article_count), 0)
+                FROM stocks s
+                LEFT JOIN daily_sentiment_aggregates dsa 
+                    ON dsa.stock_id = s.id
+                    AND dsa.day >= CURRENT_DATE - %s
+                GROUP BY s.symbol
+                ORDER BY s.symbol
+            """, (days_back,))
+            return {symbol: int(count) for symbol, count in cursor.fetchall()}
         
-        news_calls = cursor.fetchone()[0] or 0
+        except Exception as e:
+            print(f"Error getting article counts: {e}")
+            record_query_error('get_article_counts')
+            skip_caching()
+            return {}
+
+@timed_query
+def check_data_freshness(symbol, hours=24):
+    """Check if we have fresh data for a symbol"""
+    with db_connection() as conn:
+        if not conn:
+            record_query_error('check_data_freshness')
+            skip_caching()
+            return False
+    
+        try:
+            cursor = conn.cursor()
+
+            stock_id = get_symbol_registry().get_id(symbol, cursor)
+            if not stock_id:
+                return False
+        
+            cutoff_time = datetime.now() - timedelta(hours=hours)
+        
+            # Check for recent articles
+            cursor.execute("""
+                SELECT COUNT(*) 
+                FROM news_articles na
+                JOIN article_stock_relations asr ON na.id = asr.article_id
+                WHERE asr.stock_id = %s 
+                AND na.published_at >= %s
+            """, (stock_id, cutoff_time))
         
-        # Count stock price updates today
-        cursor.execute("""
-            SELECT COUNT(DISTINCT stock_id)
-            FROM stock_prices 
-            WHERE date = %s
-        """, (today,))
+            recent_articles = cursor.fetchone()[0]
         
-        stock_calls = cursor.fetchone()[0] or 0
+            # Check for recent stock prices
+            cursor.execute("""
+                SELECT COUNT(*)
+                FROM stock_prices sp
+                WHERE sp.stock_id = %s
+                AND sp.date >= %s
+            """, (stock_id, cutoff_time.date()))
         
-        return {
-            'news_calls': news_calls,
-            'stock_calls': stock_calls,
-            'date': today.isoformat()
-        }
+            recent_prices = cursor.fetchone()[0]
         
-    except Exception as e:
-        print(f"Error getting API usage: {e}")
-        return {'news_calls': 0, 'stock_calls': 0}
-    finally:
-        conn.close()
+            return recent_articles > 0 and recent_prices > 0
+        
+        except Exception as e:
+            print(f"Error checking data freshness for {symbol}: {e}")
+            record_query_error('check_data_freshness')
+            skip_caching()
+            return False
+
+def get_api_usage_today():
+    """
+    Today's outbound API calls, from the usage ledger's in-memory view (no table scans)
+    
+    Returns:
+    dict: {'news_calls', 'stock_calls', 'news_limit', 'stock_limit', 'date'}
+    """
+    ledger = get_api_usage_ledger()
+    usage = ledger.usage()
+    
+    return {
+        'news_calls': usage['newsapi'],
+        'stock_calls': usage['alphavantage'],
+        'news_limit': ledger.limits['newsapi'],
+        'stock_limit': ledger.limits['alphavantage'],
+        'date': date.today().isoformat()
+    }
 
 if __name__ == "__main__":
     # Test the functions
@@ -254,7 +426,7 @@ if __name__ == "__main__":
     print(f"Found {len(correlations)} correlation points for AAPL")
     
     # Test batch sentiment
-    batch = get_batch_sentiment_summary()
+    batch = get_batch_sentiment_summary(['AAPL', 'MSFT', 'GOOGL'])
     print(f"Batch sentiment for {len(batch)} stocks")
     
     # Test freshness
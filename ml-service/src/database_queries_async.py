@@ -0,0 +1,249 @@
+# ml-service/src/database_queries_async.py
+# Async versions of the read queries behind the dashboard endpoints, for
+# app_async.py. Same SQL and return values as database_queries.py.
+from datetime import datetime, timedelta
+
+from database_async import async_db_connection
+from metrics import record_query_error, timed_async_query
+from response_cache import skip_caching
+from symbol_registry import STOCKS_QUERY, get_symbol_registry
+
+
+async def _get_stock_ids(conn, symbols):
+    """Registry lookup that (re)loads the stocks table over conn instead of blocking"""
+    registry = get_symbol_registry()
+    if registry.needs_load(symbols):
+        registry.replace(await conn.fetch(STOCKS_QUERY))
+    return registry.get_ids(symbols)
+
+
+@timed_async_query
+async def get_articles_with_sentiment(symbol, days_back=30, limit=50):
+    """Get stored articles with sentiment scores for a symbol"""
+    async with async_db_connection() as conn:
+        if not conn:
+            record_query_error('get_articles_with_sentiment')
+            skip_caching()
+            return []
+
+        try:
+            stock_id = (await _get_stock_ids(conn, [symbol])).get(symbol)
+            if not stock_id:
+                return []
+
+            cutoff_date = datetime.now() - timedelta(days=days_back)
+
+            rows = await conn.fetch("""
+                SELECT
+                    na.title,
+                    na.description,
+                    na.url,
+                    na.source,
+                    na.published_at,
+                    ss.sentiment_score,
+                    CASE
+                        WHEN ss.sentiment_score > 0.1 THEN 'positive'
+                        WHEN ss.sentiment_score < -0.1 THEN 'negative'
+                        ELSE 'neutral'
+                    END as sentiment_classification
+                FROM news_articles na
+                JOIN article_stock_relations asr ON na.id = asr.article_id
+                JOIN sentiment_scores ss ON na.id = ss.article_id AND asr.stock_id = ss.stock_id
+                WHERE asr.stock_id = $1
+                AND na.published_at >= $2
+                ORDER BY na.published_at DESC
+                LIMIT $3
+            """, stock_id, cutoff_date, int(limit))
+
+            return [dict(row) for row in rows]
+
+        except Exception as e:
+            print(f"Error getting articles for {symbol}: {e}")
+            record_query_error('get_articles_with_sentiment')
+            skip_caching()
+            return []
+
+
+@timed_async_query
+async def get_correlation_data(symbol, days_back=90):
+    """Get sentiment-price correlation data from database (see database_queries.get_correlation_data)"""
+    from trading_calendar import TRADING_DAY_WINDOW, to_day_array, align_to_trading_days
+
+    async with async_db_connection() as conn:
+        if not conn:
+            record_query_error('get_correlation_data')
+            skip_caching()
+            return []
+
+        try:
+            stock_id = (await _get_stock_ids(conn, [symbol])).get(symbol)
+            if not stock_id:
+                return []
+
+            cutoff_date = (datetime.now() - timedelta(days=days_back)).date()
+
+            sentiment_rows = await conn.fetch("""
+                SELECT dsa.day, dsa.score_sum / dsa.article_count
+                FROM daily_sentiment_aggregates dsa
+                WHERE dsa.stock_id = $1
+                AND dsa.day >= $2
+                AND dsa.article_count > 0
+                ORDER BY dsa.day
+            """, stock_id, cutoff_date)
+
+            if not sentiment_rows:
+                return []
+
+            # Returns slightly before the cutoff let early news fall back a session
+            return_rows = await conn.fetch("""
+                SELECT sdr.date, sdr.price_change
+                FROM stock_daily_returns sdr
+                WHERE sdr.stock_id = $1
+                AND sdr.date >= $2
+                ORDER BY sdr.date
+            """, stock_id, cutoff_date - timedelta(days=TRADING_DAY_WINDOW))
+
+            news_days = to_day_array([row[0] for row in sentiment_rows])
+            trading_days = to_day_array([row[0] for row in return_rows])
+            trading_index = align_to_trading_days(news_days, trading_days)
+
+            correlations = [
+                {
+                    'news_date': str(news_days[i]),
+                    'trading_date': str(trading_days[index]),
+                    'sentiment': float(sentiment_rows[i][1]),
+                    'price_change': float(return_rows[index][1])
+                }
+                for i, index in enumerate(trading_index) if index >= 0
+            ]
+            correlations.reverse()
+            return correlations
+
+        except Exception as e:
+            print(f"Error getting correlation data for {symbol}: {e}")
+            record_query_error('get_correlation_data')
+            skip_caching()
+            return []
+
+
+@timed_async_query
+async def get_batch_sentiment_summary(symbols, days_back=7):
+    """
+    Get sentiment summary for a list of stocks in one query
+
+    Returns:
+    dict: {symbol: {'articles_found', 'overall_sentiment'}} for symbols with data
+    """
+    async with async_db_connection() as conn:
+        if not conn:
+            record_query_error('get_batch_sentiment_summary')
+            skip_caching()
+            return {}
+        if not symbols:
+            return {}
+
+        try:
+            stock_ids = await _get_stock_ids(conn, symbols)
+            symbols_by_id = {stock_id: symbol for symbol, stock_id in stock_ids.items()}
+            if not stock_ids:
+                return {}
+
+            rows = await conn.fetch("""
+                WITH recent AS (
+                    SELECT
+                        dsa.stock_id,
+                        SUM(dsa.article_count) as articles_found,
+                        SUM(dsa.score_sum) / NULLIF(SUM(dsa.article_count), 0) as avg_sentiment
+                    FROM daily_sentiment_aggregates dsa
+                    WHERE dsa.stock_id = ANY($1)
+                    AND dsa.day >= CURRENT_DATE - $2::int
+                    GROUP BY dsa.stock_id
+                )
+                SELECT
+                    r.stock_id,
+                    r.articles_found,
+                    r.avg_sentiment,
+                    CASE
+                        WHEN r.avg_sentiment > 0.1 THEN 'positive'
+                        WHEN r.avg_sentiment < -0.1 THEN 'negative'
+                        ELSE 'neutral'
+                    END as classification
+                FROM recent r
+            """, list(symbols_by_id), int(days_back))
+
+            batch_data = {}
+            for row in rows:
+                batch_data[symbols_by_id[row['stock_id']]] = {
+                    'articles_found': row['articles_found'] or 0,
+                    'overall_sentiment': {
+                        'score': float(row['avg_sentiment']) if row['avg_sentiment'] else 0,
+                        'classification': row['classification'] or 'neutral'
+                    } if row['avg_sentiment'] else None
+                }
+
+            return batch_data
+
+        except Exception as e:
+            print(f"Error getting batch sentiment: {e}")
+            record_query_error('get_batch_sentiment_summary')
+            skip_caching()
+            return {}
+
+
+@timed_async_query
+async def get_sentiment_summary(symbol, days_back=30):
+    """
+    Overall sentiment for a symbol over a window, read from the daily aggregates
+
+    Returns:
+    dict: {'articles_count', 'avg_sentiment', 'classification', 'min_sentiment', 'max_sentiment'},
+          or None if there are no scored articles in the window
+    """
+    async with async_db_connection() as conn:
+        if not conn:
+            record_query_error('get_sentiment_summary')
+            skip_caching()
+            return None
+
+        try:
+            stock_id = (await _get_stock_ids(conn, [symbol])).get(symbol)
+            if not stock_id:
+                return None
+
+            cutoff_date = (datetime.now() - timedelta(days=days_back)).date()
+
+            row = await conn.fetchrow("""
+                SELECT
+                    SUM(dsa.article_count) as articles_count,
+                    SUM(dsa.score_sum) / NULLIF(SUM(dsa.article_count), 0) as avg_sentiment,
+                    MIN(dsa.score_min)::float as min_sentiment,
+                    MAX(dsa.score_max)::float as max_sentiment
+                FROM daily_sentiment_aggregates dsa
+                WHERE dsa.stock_id = $1
+                AND dsa.day >= $2
+            """, stock_id, cutoff_date)
+
+            if not row or not row['articles_count']:
+                return None
+
+            avg_sentiment = row['avg_sentiment']
+            if avg_sentiment > 0.1:
+                classification = 'positive'
+            elif avg_sentiment < -0.1:
+                classification = 'negative'
+            else:
+                classification = 'neutral'
+
+            return {
+                'articles_count': int(row['articles_count']),
+                'avg_sentiment': avg_sentiment,
+                'classification': classification,
+                'min_sentiment': row['min_sentiment'],
+                'max_sentiment': row['max_sentiment']
+            }
+
+        except Exception as e:
+            print(f"Error getting sentiment summary for {symbol}: {e}")
+            record_query_error('get_sentiment_summary')
+            skip_caching()
+            return None
@@ -0,0 +1,152 @@
+# ml-service/src/http_client.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import FETCH_LATENCY, RATE_LIMIT_WAIT
+
+# Provider endpoints; point these at a local stub server for offline runs
+NEWS_API_BASE_URL = os.getenv('NEWS_API_BASE_URL', 'https://newsapi.org/v2')
+ALPHA_VANTAGE_BASE_URL = os.getenv('ALPHA_VANTAGE_BASE_URL', 'https://www.alphavantage.co')
+
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '30'))
+FETCH_MAX_WORKERS = int(os.getenv('FETCH_MAX_WORKERS', '8'))
+# Extra attempts after a network error or a retryable status, waiting
+# HTTP_RETRY_BACKOFF seconds, doubled per attempt (or the server's Retry-After)
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', '1'))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+    
+    Tokens refill continuously at `rate` per second up to `capacity`;
+    acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+# Provider rate limits. Alpha Vantage's free tier allows 5 calls per minute, so
+# a burst of 1 spaces calls evenly instead of firing 5 at once.
+RATE_LIMITERS = {
+    'newsapi': TokenBucket(
+        rate=float(os.getenv('NEWS_API_CALLS_PER_MINUTE', '60')) / 60,
+        capacity=int(os.getenv('NEWS_API_BURST', '5'))
+    ),
+    'alphavantage': TokenBucket(
+        rate=float(os.getenv('ALPHA_VANTAGE_CALLS_PER_MINUTE', '5')) / 60,
+        capacity=int(os.getenv('ALPHA_VANTAGE_BURST', '1'))
+    )
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared keep-alive HTTP session, sized for concurrent fetches"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # requests is imported on first fetch, not by everything that imports this module
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=FETCH_MAX_WORKERS)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def _retry_delay(attempt, response=None):
+    """Seconds to wait before retry number attempt (0-based)"""
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return HTTP_RETRY_BACKOFF * 2 ** attempt
+
+
+def rate_limited_get(provider, url, params=None):
+    """
+    GET through the shared session after taking a token from the provider's limiter
+    
+    Network errors and RETRY_STATUSES responses are retried up to HTTP_RETRIES
+    times with backoff; every attempt takes its own token.
+    
+    Parameters:
+    provider (str): Key into RATE_LIMITERS ('newsapi' or 'alphavantage')
+    url (str): Request URL
+    params (dict): Query string parameters
+    
+    Returns:
+    requests.Response (the last one, if every attempt got a retryable status)
+    """
+    from requests.exceptions import RequestException
+
+    for attempt in range(HTTP_RETRIES + 1):
+        RATE_LIMIT_WAIT.labels(provider).observe(RATE_LIMITERS[provider].acquire())
+        
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = get_session().get(url, params=params, timeout=HTTP_TIMEOUT)
+            outcome = str(response.status_code)
+        except RequestException:
+            if attempt == HTTP_RETRIES:
+                raise
+            response = None
+        finally:
+            FETCH_LATENCY.labels(provider, outcome).observe(time.perf_counter() - started)
+        
+        if response is not None and (response.status_code not in RETRY_STATUSES or attempt == HTTP_RETRIES):
+            return response
+        
+        delay = _retry_delay(attempt, response)
+        print(f"{provider} request failed ({outcome}), retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def fetch_concurrently(fetch, items, max_workers=FETCH_MAX_WORKERS):
+    """
+    Run fetch(item) for every item on a thread pool
+    
+    Returns:
+    dict: {item: fetch(item)} in the order items were given
+    """
+    items = list(items)
+    if not items:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        results = list(executor.map(fetch, items))
+    return dict(zip(items, results))
@@ -1,111 +1,178 @@
 # ml-service/src/init_db.py
 import psycopg2
-from database import get_db_connection
+from database import db_connection, rebuild_daily_aggregates, rebuild_daily_returns
+from symbol_registry import get_symbol_registry
 
 def create_tables():
     """Create all necessary database tables"""
-    conn = get_db_connection()
-    if not conn:
-        print("Failed to connect to database")
-        return False
+    with db_connection() as conn:
+        if not conn:
+            print("Failed to connect to database")
+            return False
     
-    try:
-        cursor = conn.cursor()
+        try:
+            cursor = conn.cursor()
         
-        # Create stocks table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stocks (
-                id SERIAL PRIMARY KEY,
-                symbol VARCHAR(10) UNIQUE NOT NULL,
-                name VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
+            # Create stocks table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stocks (
+                    id SERIAL PRIMARY KEY,
+                    symbol VARCHAR(10) UNIQUE NOT NULL,
+                    name VARCHAR(255) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
         
-        # Create news_articles table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS news_articles (
-                id SERIAL PRIMARY KEY,
-                title TEXT,
-                description TEXT,
-                content TEXT,
-                url TEXT UNIQUE,
-                url_to_image TEXT,
-                source VARCHAR(255),
-                author VARCHAR(255),
-                published_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
+            # Create news_articles table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS news_articles (
+                    id SERIAL PRIMARY KEY,
+                    title TEXT,
+                    description TEXT,
+                    content TEXT,
+                    url TEXT UNIQUE,
+                    url_to_image TEXT,
+                    source VARCHAR(255),
+                    author VARCHAR(255),
+                    published_at TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
         
-        # Create stock_prices table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stock_prices (
-                id SERIAL PRIMARY KEY,
-                stock_id INTEGER REFERENCES stocks(id),
-                date DATE NOT NULL,
-                close_price DECIMAL(10, 2) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(stock_id, date)
-            );
-        """)
+            # Create stock_prices table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stock_prices (
+                    id SERIAL PRIMARY KEY,
+                    stock_id INTEGER REFERENCES stocks(id),
+                    date DATE NOT NULL,
+                    close_price DECIMAL(10, 2) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(stock_id, date)
+                );
+            """)
         
-        # Create article_stock_relations table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS article_stock_relations (
-                id SERIAL PRIMARY KEY,
-                article_id INTEGER REFERENCES news_articles(id),
-                stock_id INTEGER REFERENCES stocks(id),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(article_id, stock_id)
-            );
-        """)
+            # Create article_stock_relations table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS article_stock_relations (
+                    id SERIAL PRIMARY KEY,
+                    article_id INTEGER REFERENCES news_articles(id),
+                    stock_id INTEGER REFERENCES stocks(id),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(article_id, stock_id)
+                );
+            """)
         
-        # Create sentiment_scores table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sentiment_scores (
-                id SERIAL PRIMARY KEY,
-                article_id INTEGER REFERENCES news_articles(id),
-                stock_id INTEGER REFERENCES stocks(id),
-                sentiment_score DECIMAL(5, 4) NOT NULL,
-                confidence DECIMAL(5, 4),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
+            # Create sentiment_scores table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS sentiment_scores (
+                    id SERIAL PRIMARY KEY,
+                    article_id INTEGER REFERENCES news_articles(id),
+                    stock_id INTEGER REFERENCES stocks(id),
+                    sentiment_score DECIMAL(5, 4) NOT NULL,
+                    confidence DECIMAL(5, 4),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
         
-        conn.commit()
-        print("✅ All tables created successfully!")
+            # Create daily_sentiment_aggregates table (maintained on every sentiment insert)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS daily_sentiment_aggregates (
+                    id SERIAL PRIMARY KEY,
+                    stock_id INTEGER REFERENCES stocks(id),
+                    day DATE NOT NULL,
+                    article_count INTEGER NOT NULL DEFAULT 0,
+                    score_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+                    score_sum_sq DOUBLE PRECISION NOT NULL DEFAULT 0,
+                    score_min DECIMAL(5, 4),
+                    score_max DECIMAL(5, 4),
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(stock_id, day)
+                );
+            """)
         
-        # Insert some sample stock data
-        sample_stocks = [
-            ('AAPL', 'Apple Inc.'),
-            ('GOOGL', 'Alphabet Inc.'),
-            ('MSFT', 'Microsoft Corporation'),
-            ('AMZN', 'Amazon.com Inc.'),
-            ('TSLA', 'Tesla Inc.'),
-            ('META', 'Meta Platforms Inc.'),
-            ('NVDA', 'NVIDIA Corporation'),
-            ('NFLX', 'Netflix Inc.')
-        ]
+            # Create stock_daily_returns table (maintained on every price upsert)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stock_daily_returns (
+                    stock_id INTEGER REFERENCES stocks(id),
+                    date DATE NOT NULL,
+                    prev_date DATE NOT NULL,
+                    close_price DECIMAL(10, 2) NOT NULL,
+                    price_change DOUBLE PRECISION NOT NULL,
+                    PRIMARY KEY (stock_id, date)
+                );
+            """)
         
-        for symbol, name in sample_stocks:
+            # Create job_runs table (history written by job_runner)
             cursor.execute("""
-                INSERT INTO stocks (symbol, name) 
-                VALUES (%s, %s) 
-                ON CONFLICT (symbol) DO NOTHING
-            """, (symbol, name))
+                CREATE TABLE IF NOT EXISTS job_runs (
+                    id SERIAL PRIMARY KEY,
+                    job_name VARCHAR(100) NOT NULL,
+                    status VARCHAR(20) NOT NULL,
+                    started_at TIMESTAMP NOT NULL,
+                    finished_at TIMESTAMP,
+                    duration_seconds DOUBLE PRECISION,
+                    rows_processed INTEGER,
+                    error TEXT,
+                    host VARCHAR(255)
+                );
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_job_runs_name_started ON job_runs(job_name, started_at DESC);
+            """)
+            
+            # Create api_usage table (outbound call ledger written by api_usage)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS api_usage (
+                    day DATE NOT NULL,
+                    provider VARCHAR(50) NOT NULL,
+                    calls INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (day, provider)
+                );
+            """)
+        
+            conn.commit()
+            print("✅ All tables created successfully!")
+        
+            # Insert some sample stock data
+            sample_stocks = [
+                ('AAPL', 'Apple Inc.'),
+                ('GOOGL', 'Alphabet Inc.'),
+                ('MSFT', 'Microsoft Corporation'),
+                ('AMZN', 'Amazon.com Inc.'),
+                ('TSLA', 'Tesla Inc.'),
+                ('META', 'Meta Platforms Inc.'),
+                ('NVDA', 'NVIDIA Corporation'),
+                ('NFLX', 'Netflix Inc.')
+            ]
         
-        conn.commit()
-        print("✅ Sample stock data inserted!")
+            for symbol, name in sample_stocks:
+                cursor.execute("""
+                    INSERT INTO stocks (symbol, name) 
+                    VALUES (%s, %s) 
+                    ON CONFLICT (symbol) DO NOTHING
+                """, (symbol, name))
         
-        return True
+            conn.commit()
+            get_symbol_registry().invalidate()
+            print("✅ Sample stock data inserted!")
         
-    except Exception as e:
-        print(f"❌ Error creating tables: {e}")
-        conn.rollback()
+        except Exception as e:
+            print(f"❌ Error creating tables: {e}")
+            conn.rollback()
+            return False
+    
+    # Backfill aggregates for any sentiment rows that predate the table
+    if not rebuild_daily_aggregates():
+        return False
+    print("✅ Daily sentiment aggregates rebuilt!")
+    
+    # Backfill returns for any prices stored before the table existed
+    if not rebuild_daily_returns():
         return False
-    finally:
-        conn.close()
+    print("✅ Daily stock returns rebuilt!")
+    
+    return True
 
 if __name__ == "__main__":
     if create_tables():
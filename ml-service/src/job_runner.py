@@ -0,0 +1,215 @@
+# ml-service/src/job_runner.py
+import fcntl
+import os
+import socket
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from psycopg2.extras import RealDictCursor
+from database import db_connection
+
+# Job runner settings (override via environment)
+JOB_MAX_WORKERS = int(os.getenv('JOB_MAX_WORKERS', '4'))
+# 'db' uses PostgreSQL advisory locks (safe across replicas), 'file' uses local lock files
+JOB_LOCK_BACKEND = os.getenv('JOB_LOCK_BACKEND', 'db')
+JOB_LOCK_DIR = os.getenv('JOB_LOCK_DIR', '/tmp')
+
+@contextmanager
+def _advisory_lock(name):
+    """
+    Session-level advisory lock held on a dedicated connection for the whole job
+
+    Yields True if this process got the lock, False if another run holds it.
+    """
+    with db_connection() as conn:
+        if not conn:
+            raise RuntimeError("no database connection for job lock")
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (f"job:{name}",))
+        acquired = cursor.fetchone()[0]
+        conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", (f"job:{name}",))
+                    conn.commit()
+                except Exception as e:
+                    # The lock lives as long as the session: close the connection
+                    # (the pool then discards it) rather than return it still locked
+                    print(f"Error releasing lock for job {name}: {e}")
+                    conn.close()
+
+@contextmanager
+def _file_lock(name):
+    """Non-blocking flock on JOB_LOCK_DIR/<name>.lock (one host only)"""
+    with open(os.path.join(JOB_LOCK_DIR, f"sentiment-job-{name}.lock"), 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _record_start(name, started_at):
+    """Insert a 'running' row into job_runs; returns its id (None if it could not be recorded)"""
+    with db_connection() as conn:
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO job_runs (job_name, status, started_at, host)
+                VALUES (%s, 'running', %s, %s)
+                RETURNING id
+            """, (name, started_at, socket.gethostname()))
+            run_id = cursor.fetchone()[0]
+            conn.commit()
+            return run_id
+        except Exception as e:
+            print(f"Error recording start of job {name}: {e}")
+            conn.rollback()
+            return None
+
+def _record_finish(run_id, result):
+    """Fill in the outcome of a job_runs row"""
+    if run_id is None:
+        return
+    with db_connection() as conn:
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE job_runs
+                SET status = %s, finished_at = %s, duration_seconds = %s, rows_processed = %s, error = %s
+                WHERE id = %s
+            """, (result['status'], result['finished_at'], result['duration_seconds'],
+                  result['rows'], result['error'], run_id))
+            conn.commit()
+        except Exception as e:
+            print(f"Error recording end of job run {run_id}: {e}")
+            conn.rollback()
+
+class JobRunner:
+    """
+    Runs named collection jobs concurrently, never two runs of the same job at once
+
+    A job is a callable returning the number of rows it stored (or None).
+    Each run takes a per-job lock first; if another thread, process or replica
+    already holds it the run is recorded as 'skipped' instead of overlapping.
+    Every run is recorded in the job_runs table with its start, end,
+    duration, rows and error.
+    """
+
+    def __init__(self, max_workers=JOB_MAX_WORKERS, lock_backend=JOB_LOCK_BACKEND):
+        self.max_workers = max_workers
+        self.lock_backend = lock_backend
+        self.jobs = {}
+
+    def register(self, name, job):
+        """Add (or replace) a job under name"""
+        self.jobs[name] = job
+
+    def _lock(self, name):
+        return _advisory_lock(name) if self.lock_backend == 'db' else _file_lock(name)
+
+    def run_job(self, name):
+        """
+        Run one job under its lock and record the outcome
+
+        Returns:
+        dict: {'job', 'status', 'started_at', 'finished_at', 'duration_seconds', 'rows', 'error'}
+              status is 'succeeded', 'failed' or 'skipped'
+        """
+        started_at = datetime.now()
+        started = time.perf_counter()
+        result = {'job': name, 'status': 'skipped', 'started_at': started_at, 'rows': None, 'error': None}
+        run_id = None
+        lock_checked = False
+
+        try:
+            with self._lock(name) as acquired:
+                lock_checked = True
+                if not acquired:
+                    result['error'] = 'previous run still in progress'
+                    print(f"Job {name} skipped: previous run still in progress")
+                else:
+                    run_id = _record_start(name, started_at)
+                    try:
+                        rows = self.jobs[name]()
+                        result['status'] = 'succeeded'
+                        result['rows'] = rows
+                    except Exception as e:
+                        result['status'] = 'failed'
+                        result['error'] = f"{type(e).__name__}: {e}"
+                        traceback.print_exc()
+        except Exception as e:
+            if not lock_checked:
+                # Could not even take the lock (e.g. database down)
+                result['status'] = 'failed'
+                result['error'] = f"lock error: {e}"
+            else:
+                # The job already ran (or was skipped); keep its outcome
+                print(f"Job {name} lock error after the run: {e}")
+
+        result['finished_at'] = datetime.now()
+        result['duration_seconds'] = time.perf_counter() - started
+
+        if run_id is None:
+            # Skipped and lock-failure runs are recorded in one go
+            run_id = _record_start(name, started_at)
+        _record_finish(run_id, result)
+
+        print(f"Job {name} {result['status']} in {result['duration_seconds']:.1f}s (rows: {result['rows']})")
+        return result
+
+    def run(self, names=None):
+        """
+        Run several jobs concurrently
+
+        Parameters:
+        names (list): Jobs to run (default: every registered job)
+
+        Returns:
+        dict: {name: run_job() result}
+        """
+        names = list(dict.fromkeys(names or self.jobs))
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names)) or 1) as executor:
+            return dict(zip(names, executor.map(self.run_job, names)))
+
+def get_job_history(job_name=None, limit=50):
+    """
+    Most recent job runs, newest first
+
+    Parameters:
+    job_name (str): Only this job (default: all jobs)
+    limit (int): Maximum rows
+
+    Returns:
+    list: job_runs rows as dicts
+    """
+    with db_connection() as conn:
+        if not conn:
+            return []
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                SELECT id, job_name, status, started_at, finished_at, duration_seconds,
+                       rows_processed, error, host
+                FROM job_runs
+                WHERE %s IS NULL OR job_name = %s
+                ORDER BY started_at DESC
+                LIMIT %s
+            """, (job_name, job_name, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error getting job history: {e}")
+            return []
@@ -0,0 +1,108 @@
+# ml-service/src/keyword_matcher.py
+import re
+from functools import lru_cache
+
+
+def _trie_pattern(keywords):
+    """Build a regex alternation shaped like a trie so shared prefixes are tested once"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        is_end = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+
+        if not branches:
+            return ''
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+
+        group = '(?:' + '|'.join(branches) + ')'
+        # Greedy optional group: prefer the longer keyword, fall back to the shorter one
+        return group + '?' if is_end else group
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds every company mentioned in a text with one pass of a precompiled regex.
+
+    Matching is case-insensitive and word-boundary aware ('Mac' matches
+    "Mac sales", not "machine"). Overlapping keywords are all reported, e.g.
+    with 'Apple' and 'Apple Music' both present, "Apple Music" yields both.
+    """
+
+    def __init__(self, company_keywords):
+        """
+        Parameters:
+        company_keywords (dict): {symbol: [keywords]}, e.g. COMPANY_KEYWORDS
+        """
+        self.symbols = list(company_keywords.keys())
+        self.symbols_by_keyword = {}
+
+        for symbol, keywords in company_keywords.items():
+            for keyword in keywords:
+                keyword = keyword.strip().lower()
+                if not keyword:
+                    continue
+                matched_symbols = self.symbols_by_keyword.setdefault(keyword, [])
+                if symbol not in matched_symbols:
+                    matched_symbols.append(symbol)
+
+        # Shorter keywords that are prefixes of a longer one starting at the same place
+        self.prefixes_by_keyword = {
+            keyword: [
+                keyword[:i] for i in range(1, len(keyword))
+                if keyword[:i] in self.symbols_by_keyword
+            ]
+            for keyword in self.symbols_by_keyword
+        }
+
+        if self.symbols_by_keyword:
+            # Zero-width lookahead so matches may overlap; the group captures the longest keyword at each start
+            self.pattern = re.compile(
+                r'(?<!\w)(?=(' + _trie_pattern(self.symbols_by_keyword) + r')(?!\w))'
+            )
+        else:
+            self.pattern = None
+
+    def match(self, text):
+        """
+        Return the set of symbols whose keywords appear in text
+        """
+        if not text or self.pattern is None:
+            return set()
+
+        text = text.lower()
+        matched = set()
+
+        for found in self.pattern.finditer(text):
+            keyword = found.group(1)
+            matched.update(self.symbols_by_keyword[keyword])
+
+            start = found.start()
+            for prefix in self.prefixes_by_keyword[keyword]:
+                end = start + len(prefix)
+                if not (text[end].isalnum() or text[end] == '_'):
+                    matched.update(self.symbols_by_keyword[prefix])
+
+        return matched
+
+
+@lru_cache(maxsize=8)
+def _cached_matcher(frozen_keywords):
+    return KeywordMatcher({symbol: list(keywords) for symbol, keywords in frozen_keywords})
+
+
+def get_keyword_matcher(company_keywords):
+    """Compiled matcher for a keyword map, built once per distinct map and reused"""
+    if isinstance(company_keywords, KeywordMatcher):
+        return company_keywords
+
+    frozen = tuple((symbol, tuple(keywords)) for symbol, keywords in company_keywords.items())
+    return _cached_matcher(frozen)
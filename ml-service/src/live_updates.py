@@ -0,0 +1,239 @@
+# ml-service/src/live_updates.py
+import json
+import os
+import queue
+import select
+import threading
+import time
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from metrics import STREAM_EVENTS
+from symbol_registry import get_symbol_registry
+
+# Live update settings (override via environment)
+LIVE_UPDATES_CHANNEL = 'sentiment_updates'
+# Set to 0 to stop the ingest path from publishing (e.g. during bulk imports)
+LIVE_UPDATES_PUBLISH = os.getenv('LIVE_UPDATES_PUBLISH', '1') == '1'
+# Open /stream connections per process; each one holds a server thread
+SSE_MAX_SUBSCRIBERS = int(os.getenv('SSE_MAX_SUBSCRIBERS', '100'))
+# Events buffered per subscriber before it is treated as a slow consumer
+SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', '256'))
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+# Wait before reconnecting after the LISTEN connection drops
+LISTEN_RETRY_SECONDS = 5.0
+
+# NOTIFY payloads are capped at 8000 bytes, so long text fields are truncated
+_PUBLISH_ARTICLES = """
+    SELECT pg_notify(%s, json_build_object(
+        'type', 'article',
+        'stock_id', ss.stock_id,
+        'article_id', na.id,
+        'title', LEFT(na.title, 500),
+        'url', LEFT(na.url, 2000),
+        'source', LEFT(na.source, 200),
+        'published_at', na.published_at,
+        'sentiment_score', ss.sentiment_score
+    )::text)
+    FROM sentiment_scores ss
+    JOIN news_articles na ON na.id = ss.article_id
+    WHERE ss.id = ANY(%s)
+"""
+
+_PUBLISH_AGGREGATES = """
+    SELECT pg_notify(%s, json_build_object(
+        'type', 'aggregate',
+        'stock_id', dsa.stock_id,
+        'day', dsa.day,
+        'article_count', dsa.article_count,
+        'avg_sentiment', dsa.score_sum / NULLIF(dsa.article_count, 0),
+        'score_min', dsa.score_min,
+        'score_max', dsa.score_max
+    )::text)
+    FROM daily_sentiment_aggregates dsa
+    WHERE (dsa.stock_id, dsa.day) IN (
+        SELECT DISTINCT ss.stock_id, DATE(na.published_at)
+        FROM sentiment_scores ss
+        JOIN news_articles na ON na.id = ss.article_id
+        WHERE ss.id = ANY(%s)
+    )
+"""
+
+def publish_sentiment_updates(cursor, sentiment_ids):
+    """
+    Queue article and daily aggregate events for newly inserted sentiment scores
+
+    Runs on the caller's cursor after the aggregates were updated. NOTIFY is
+    transactional: listeners only see the events once the scores commit, and
+    never if they roll back.
+
+    Parameters:
+    cursor: Cursor inside the transaction that inserted the scores
+    sentiment_ids (list): ids of the new sentiment_scores rows
+    """
+    if not sentiment_ids or not LIVE_UPDATES_PUBLISH:
+        return
+    cursor.execute(_PUBLISH_ARTICLES, (LIVE_UPDATES_CHANNEL, list(sentiment_ids)))
+    cursor.execute(_PUBLISH_AGGREGATES, (LIVE_UPDATES_CHANNEL, list(sentiment_ids)))
+
+def format_sse(event):
+    """One Server-Sent Events message: id, event type and JSON data"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+class Subscription:
+    """
+    One /stream client: an optional symbol filter and a bounded event queue
+
+    The listener never blocks on a subscriber. When a client falls
+    SSE_QUEUE_SIZE events behind, its backlog is dropped and replaced by a
+    single 'resync' event telling it to refetch over the REST endpoints.
+    """
+
+    def __init__(self, symbols=None, max_queue=SSE_QUEUE_SIZE):
+        self.symbols = frozenset(symbols) if symbols else None
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def wants(self, event):
+        return self.symbols is None or event.get('symbol') is None or event['symbol'] in self.symbols
+
+    def put(self, event):
+        """Queue an event without blocking; drops the backlog of a slow consumer"""
+        try:
+            self._queue.put_nowait(event)
+            STREAM_EVENTS.labels('queued').inc()
+            return
+        except queue.Full:
+            pass
+
+        # Only the listener thread puts, so after draining there is room again
+        dropped = 1
+        unread = 1
+        while True:
+            try:
+                queued = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if queued['type'] == 'resync':
+                # Still unread: fold its count into the new one
+                unread += queued.get('dropped', 0)
+            else:
+                dropped += 1
+                unread += 1
+        self.dropped += dropped
+        STREAM_EVENTS.labels('dropped').inc(dropped)
+        self._queue.put_nowait({'id': event['id'], 'type': 'resync', 'reason': 'slow consumer', 'dropped': unread})
+
+    def get(self, timeout):
+        """Next event, or None if nothing arrived within timeout seconds"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class UpdateBroker:
+    """
+    Fans NOTIFY events from the ingest path out to /stream subscribers
+
+    One background thread per process holds a dedicated connection (not a
+    pooled one) that LISTENs on LIVE_UPDATES_CHANNEL. It is started by the
+    first subscriber, so under gunicorn every worker gets its own after fork.
+    Events get the symbol added (from the symbol registry) and an id that
+    increases per process.
+    """
+
+    def __init__(self, max_subscribers=SSE_MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._next_id = 1
+        self._connected = False
+
+    def subscribe(self, symbols=None, max_queue=SSE_QUEUE_SIZE):
+        """
+        Register a subscriber
+
+        Parameters:
+        symbols (list): Only deliver events for these symbols (default: all)
+        max_queue (int): Events buffered before the subscriber is resynced
+
+        Returns:
+        Subscription: or None if SSE_MAX_SUBSCRIBERS streams are already open
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(symbols, max_queue)
+            self._subscribers.add(subscription)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name='live-updates-listener', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'max_subscribers': self.max_subscribers,
+                'listening': self._connected
+            }
+
+    def _broadcast(self, event):
+        with self._lock:
+            event['id'] = self._next_id
+            self._next_id += 1
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.wants(event):
+                subscription.put(event)
+
+    def _dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            print(f"Ignoring malformed live update: {payload[:100]}")
+            return
+        if 'stock_id' in event:
+            event['symbol'] = get_symbol_registry().get_symbol(event['stock_id'])
+        self._broadcast(event)
+
+    def _listen(self):
+        from database import get_db_config
+
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**get_db_config())
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                conn.cursor().execute(f"LISTEN {LIVE_UPDATES_CHANNEL}")
+                self._connected = True
+
+                while True:
+                    if select.select([conn], [], [], SSE_HEARTBEAT_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._dispatch(conn.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"Live updates listener error: {e}")
+            finally:
+                if conn is not None:
+                    conn.close()
+
+            if self._connected:
+                # Events may have been missed while disconnected
+                self._connected = False
+                self._broadcast({'type': 'resync', 'reason': 'listener reconnected'})
+            time.sleep(LISTEN_RETRY_SECONDS)
+
+_broker = UpdateBroker()
+
+def get_update_broker():
+    """The process-wide UpdateBroker"""
+    return _broker
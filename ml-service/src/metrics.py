@@ -0,0 +1,174 @@
+# ml-service/src/metrics.py
+import functools
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, values
+)
+
+# prometheus_client chooses per-process or shared-file storage once, on import,
+# from PROMETHEUS_MULTIPROC_DIR (set by gunicorn.conf.py / hypercorn.conf.py).
+# /metrics must read the same storage the metrics were written to, even if the
+# variable appears later (e.g. from a .env file loaded after this import)
+MULTIPROCESS = values.ValueClass is not values.MutexValue
+
+# Sub-millisecond to multi-second buckets; covers cache hits through slow reports
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BATCH_SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+REQUEST_LATENCY = Histogram(
+    'ml_service_request_duration_seconds', 'HTTP request latency by route',
+    ['route', 'method', 'status'], buckets=LATENCY_BUCKETS
+)
+QUERY_LATENCY = Histogram(
+    'ml_service_db_query_duration_seconds', 'Latency of named database queries',
+    ['query'], buckets=LATENCY_BUCKETS
+)
+QUERY_ERRORS = Counter(
+    'ml_service_db_query_errors_total', 'Named database queries that failed',
+    ['query']
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    'ml_service_db_pool_checkout_seconds', 'Time spent waiting for a pooled connection',
+    buckets=LATENCY_BUCKETS
+)
+SENTIMENT_BATCH_SIZE = Histogram(
+    'ml_service_sentiment_batch_size', 'Texts per sentiment scoring call',
+    buckets=BATCH_SIZE_BUCKETS
+)
+SENTIMENT_TEXTS = Counter(
+    'ml_service_sentiment_texts_total', 'Texts scored, by whether the model ran or the memo answered',
+    ['source']
+)
+SENTIMENT_SCORING_SECONDS = Histogram(
+    'ml_service_sentiment_scoring_seconds', 'Time spent running the sentiment models per call',
+    buckets=LATENCY_BUCKETS
+)
+FETCH_LATENCY = Histogram(
+    'ml_service_fetch_duration_seconds', 'Upstream API request latency',
+    ['provider', 'outcome'], buckets=LATENCY_BUCKETS
+)
+RATE_LIMIT_WAIT = Histogram(
+    'ml_service_rate_limit_wait_seconds', 'Time spent waiting on a provider rate limiter',
+    ['provider'], buckets=LATENCY_BUCKETS + (60, 120)
+)
+STREAM_EVENTS = Counter(
+    'ml_service_stream_events_total', 'Live update events queued for /stream subscribers, or dropped for slow ones',
+    ['outcome']
+)
+
+
+def record_query_error(query):
+    """Count a failure the query handled itself (logged and returned a fallback)"""
+    QUERY_ERRORS.labels(query).inc()
+
+
+def timed_query(func):
+    """Decorator: record the call's latency under the function's name"""
+    histogram = QUERY_LATENCY.labels(func.__name__)
+    errors = QUERY_ERRORS.labels(func.__name__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def timed_async_query(func):
+    """timed_query for coroutine functions (the async query layer)"""
+    histogram = QUERY_LATENCY.labels(func.__name__)
+    errors = QUERY_ERRORS.labels(func.__name__)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def metrics_payload():
+    """
+    Current metrics in Prometheus text format
+
+    In multiprocess mode (PROMETHEUS_MULTIPROC_DIR set when prometheus_client
+    was imported, i.e. several worker processes), the values of every worker
+    are merged.
+
+    Returns:
+    tuple: (body bytes, content type)
+    """
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def init_app(app):
+    """Time every request and serve /metrics on a Flask app"""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _record_latency(response):
+        started = getattr(g, 'request_started', None)
+        if started is not None:
+            # The URL rule, not the raw path, so label cardinality stays bounded
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_LATENCY.labels(route, request.method, str(response.status_code)).observe(
+                time.perf_counter() - started
+            )
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        body, content_type = metrics_payload()
+        return Response(body, mimetype=content_type)
+
+    return app
+
+
+def init_async_app(app):
+    """init_app for the Quart (ASGI) app: same request histogram and /metrics"""
+    from quart import Response, g, request
+
+    @app.before_request
+    async def _start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    async def _record_latency(response):
+        started = getattr(g, 'request_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_LATENCY.labels(route, request.method, str(response.status_code)).observe(
+                time.perf_counter() - started
+            )
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    async def metrics():
+        body, content_type = metrics_payload()
+        return Response(body, mimetype=content_type)
+
+    return app
@@ -1,26 +1,152 @@
-from .VADER_Sentiment import analyze_sentiment
-from .textBlob_Sentiment import analyze_sentiment_textblob
+import os
+import time
+
+import numpy as np
+
+from .Sentiment_Engine import get_sentiment_engine
+from .Sentiment_Memo import get_sentiment_memo, normalize_text
+from metrics import SENTIMENT_BATCH_SIZE, SENTIMENT_SCORING_SECONDS, SENTIMENT_TEXTS
+
+# Classification thresholds shared by single-text and batch scoring
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+# Batches at least this large are fanned out to a process pool by default
+PROCESS_POOL_MIN_BATCH = int(os.getenv('SENTIMENT_POOL_MIN_BATCH', '2000'))
+BATCH_CHUNK_SIZE = 500
 
 def analyze_sentiment_combined(text):
     """
     Combine VADER and TextBlob for more robust sentiment analysis
     """
-    vader_result = analyze_sentiment(text)
-    textblob_result = analyze_sentiment_textblob(text)
+    text = normalize_text(text)
+    memo = get_sentiment_memo()
+    key = memo.key(text)
+    
+    cached = memo.get_many([key]).get(key)
+    SENTIMENT_BATCH_SIZE.observe(1)
+    if cached:
+        vader_score, textblob_score = cached
+        SENTIMENT_TEXTS.labels('memo').inc()
+    else:
+        started = time.perf_counter()
+        engine = get_sentiment_engine()
+        vader_score = engine.vader_scores(text)['compound']
+        textblob_score = engine.textblob_scores(text).polarity
+        SENTIMENT_SCORING_SECONDS.observe(time.perf_counter() - started)
+        SENTIMENT_TEXTS.labels('model').inc()
+        memo.put_many({key: (vader_score, textblob_score)})
     
     # Simple average of the two approaches
-    combined_score = (vader_result['compound'] + textblob_result['polarity']) / 2
+    combined_score = (vader_score + textblob_score) / 2
     
-    if combined_score > 0.1:
+    if combined_score > POSITIVE_THRESHOLD:
         classification = 'positive'
-    elif combined_score < -0.1:
+    elif combined_score < NEGATIVE_THRESHOLD:
         classification = 'negative'
     else:
         classification = 'neutral'
     
     return {
-        'vader_score': vader_result['compound'],
-        'textblob_score': textblob_result['polarity'],
+        'vader_score': vader_score,
+        'textblob_score': textblob_score,
         'combined_score': combined_score,
         'classification': classification
+    }
+
+def classify_scores(scores):
+    """
+    Vectorized positive/negative/neutral classification
+    
+    Parameters:
+    scores (array-like): Sentiment scores in [-1, 1]
+    
+    Returns:
+    np.ndarray: Classification strings, same length as scores
+    """
+    scores = np.asarray(scores, dtype=float)
+    return np.select(
+        [scores > POSITIVE_THRESHOLD, scores < NEGATIVE_THRESHOLD],
+        ['positive', 'negative'],
+        default='neutral'
+    )
+
+def _score_chunk(texts):
+    """Raw VADER and TextBlob scores for a list of texts (runs in pool workers too)"""
+    engine = get_sentiment_engine()
+    vader_scores = np.fromiter((engine.vader_scores(text)['compound'] for text in texts), dtype=float, count=len(texts))
+    textblob_scores = np.fromiter((engine.textblob_scores(text).polarity for text in texts), dtype=float, count=len(texts))
+    return vader_scores, textblob_scores
+
+def _score_texts(texts, processes, executor):
+    """Raw (vader, textblob) score arrays, on a process pool when worthwhile"""
+    if processes is None:
+        processes = os.cpu_count() if len(texts) >= PROCESS_POOL_MIN_BATCH else 1
+    
+    if (executor is not None or (processes and processes > 1)) and len(texts) > BATCH_CHUNK_SIZE:
+        chunks = [texts[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(texts), BATCH_CHUNK_SIZE)]
+        if executor is not None:
+            results = list(executor.map(_score_chunk, chunks))
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                results = list(pool.map(_score_chunk, chunks))
+        return (
+            np.concatenate([vader for vader, _ in results]),
+            np.concatenate([textblob for _, textblob in results])
+        )
+    
+    return _score_chunk(texts)
+
+def analyze_sentiment_batch(texts, processes=None, executor=None):
+    """
+    Score many texts in one call
+    
+    Parameters:
+    texts (list): Texts to analyze (e.g. title + description per article)
+    processes (int): Worker processes to use. None picks automatically
+                     (a pool only for batches >= PROCESS_POOL_MIN_BATCH),
+                     0 or 1 always scores in-process.
+    executor (ProcessPoolExecutor): Long-lived pool to score on instead of
+                     starting one per call (used by the streaming backfill).
+    
+    Texts already in the sentiment memo (and duplicates within the batch) are
+    not re-scored; processes/executor only apply to the texts that are new.
+    
+    Returns:
+    dict: Columnar results, each an array aligned with texts:
+          {'vader_score', 'textblob_score', 'combined_score', 'classification'}
+    """
+    texts = [normalize_text(text) for text in texts]
+    
+    # Look each distinct text up in the memo; only score what it has never seen
+    memo = get_sentiment_memo()
+    keys = [memo.key(text) for text in texts]
+    text_by_key = dict(zip(keys, texts))
+    scores = memo.get_many(list(text_by_key))
+    
+    missing = [key for key in text_by_key if key not in scores]
+    SENTIMENT_BATCH_SIZE.observe(len(texts))
+    SENTIMENT_TEXTS.labels('memo').inc(len(texts) - len(missing))
+    if missing:
+        started = time.perf_counter()
+        vader_missing, textblob_missing = _score_texts([text_by_key[key] for key in missing], processes, executor)
+        SENTIMENT_SCORING_SECONDS.observe(time.perf_counter() - started)
+        SENTIMENT_TEXTS.labels('model').inc(len(missing))
+        computed = dict(zip(missing, zip(vader_missing.tolist(), textblob_missing.tolist())))
+        memo.put_many(computed)
+        scores.update(computed)
+    
+    vader_scores = np.fromiter((scores[key][0] for key in keys), dtype=float, count=len(keys))
+    textblob_scores = np.fromiter((scores[key][1] for key in keys), dtype=float, count=len(keys))
+    
+    # Simple average of the two approaches
+    combined_scores = (vader_scores + textblob_scores) / 2
+    
+    return {
+        'vader_score': vader_scores,
+        'textblob_score': textblob_scores,
+        'combined_score': combined_scores,
+        'classification': classify_scores(combined_scores)
     }
\ No newline at end of file
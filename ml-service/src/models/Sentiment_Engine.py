@@ -0,0 +1,50 @@
+import threading
+
+
+class SentimentEngine:
+    """
+    Shared VADER + TextBlob analyzers for the whole process.
+
+    Lexicons are loaded lazily on first use. Both analyzers are read-only
+    once built, so one instance can be used from any number of threads.
+    """
+
+    def __init__(self):
+        self._vader = None
+        self._textblob = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the VADER and TextBlob lexicons if they are not loaded yet"""
+        if self._vader is not None:
+            return
+
+        with self._lock:
+            if self._vader is None:
+                from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+                from textblob.en.sentiments import PatternAnalyzer
+
+                textblob_analyzer = PatternAnalyzer()
+                # The pattern lexicon is itself lazy; touch it now while we hold the lock
+                textblob_analyzer.analyze("warm up")
+
+                self._textblob = textblob_analyzer
+                self._vader = SentimentIntensityAnalyzer()
+
+    def vader_scores(self, text):
+        """Raw VADER scores: {'neg', 'neu', 'pos', 'compound'}"""
+        self.load()
+        return self._vader.polarity_scores(text)
+
+    def textblob_scores(self, text):
+        """TextBlob pattern sentiment as (polarity, subjectivity)"""
+        self.load()
+        return self._textblob.analyze(text)
+
+
+_engine = SentimentEngine()
+
+
+def get_sentiment_engine():
+    """Return the process-wide SentimentEngine"""
+    return _engine
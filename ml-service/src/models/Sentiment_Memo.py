@@ -0,0 +1,187 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from importlib.metadata import PackageNotFoundError, version
+
+# Memo settings (override via environment)
+SENTIMENT_MEMO_MAX_ENTRIES = int(os.getenv('SENTIMENT_MEMO_MAX_ENTRIES', '100000'))
+# SQLite file for the persistent tier; unset keeps the memo in memory only
+SENTIMENT_MEMO_PATH = os.getenv('SENTIMENT_MEMO_PATH', '')
+# Seconds to wait on a locked memo file before treating it as a miss / skipping the write
+SENTIMENT_MEMO_BUSY_TIMEOUT = float(os.getenv('SENTIMENT_MEMO_BUSY_TIMEOUT', '2'))
+
+# Bump when the scoring code itself changes; library upgrades are picked up automatically
+SCORER_REVISION = 'combined-v1'
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """
+    Canonical form used both for the memo key and for scoring
+
+    Unicode is NFC-normalized and whitespace runs collapse to one space. Case
+    and punctuation are kept because VADER scores both.
+    """
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', text or '')).strip()
+
+
+def model_version():
+    """Scorer revision plus the installed VADER/TextBlob versions"""
+    versions = [SCORER_REVISION]
+    for package in ('vaderSentiment', 'textblob'):
+        try:
+            versions.append(f"{package}-{version(package)}")
+        except PackageNotFoundError:
+            versions.append(f"{package}-unknown")
+    return '/'.join(versions)
+
+
+class SentimentMemo:
+    """
+    Content-addressed cache of raw (vader, textblob) scores
+
+    Keys are a hash of the normalized text plus the model version, so a
+    library upgrade or scorer change never serves stale scores. Entries live
+    in a bounded in-process LRU and, if a path is configured, in a SQLite
+    file that survives restarts.
+    """
+
+    def __init__(self, max_entries=SENTIMENT_MEMO_MAX_ENTRIES, path=SENTIMENT_MEMO_PATH):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self._version = None
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def key(self, normalized_text):
+        if self._version is None:
+            self._version = model_version()
+        return hashlib.blake2b(
+            f"{self._version}\0{normalized_text}".encode('utf-8'), digest_size=16
+        ).digest()
+
+    def _connection(self):
+        """SQLite connection for this process (reopened after a fork); caller holds the lock"""
+        if not self.path:
+            return None
+        if self._db is None or self._db_pid != os.getpid():
+            # Workers share the file; wait this long for another one's write lock
+            self._db = sqlite3.connect(self.path, timeout=SENTIMENT_MEMO_BUSY_TIMEOUT, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment_memo "
+                "(key BLOB PRIMARY KEY, vader_score REAL NOT NULL, textblob_score REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _remember(self, key, scores):
+        """Insert into the LRU tier; caller holds the lock"""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = scores
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys):
+        """
+        Look up many keys at once
+
+        Returns:
+        dict: {key: (vader_score, textblob_score)} for the keys that were found
+        """
+        found = {}
+        with self._lock:
+            for key in keys:
+                scores = self._entries.get(key)
+                if scores is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = scores
+            self.memory_hits += len(found)
+
+            missing = [key for key in keys if key not in found]
+            if missing:
+                try:
+                    db = self._connection()
+                except sqlite3.Error as e:
+                    print(f"Sentiment memo unavailable: {e}")
+                    db = None
+                if db is not None:
+                    try:
+                        # Stay well under SQLite's bound-parameter limit
+                        for start in range(0, len(missing), 500):
+                            batch = missing[start:start + 500]
+                            rows = db.execute(
+                                "SELECT key, vader_score, textblob_score FROM sentiment_memo "
+                                f"WHERE key IN ({','.join('?' * len(batch))})",
+                                batch
+                            ).fetchall()
+                            for key, vader_score, textblob_score in rows:
+                                found[key] = (vader_score, textblob_score)
+                                self._remember(key, found[key])
+                                self.persistent_hits += 1
+                    except sqlite3.Error as e:
+                        # e.g. 'database is locked' by another worker: score them instead
+                        print(f"Sentiment memo read error: {e}")
+
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries):
+        """
+        Store freshly computed scores
+
+        Parameters:
+        entries (dict): {key: (vader_score, textblob_score)}
+        """
+        if not entries:
+            return
+        with self._lock:
+            for key, scores in entries.items():
+                self._remember(key, scores)
+            try:
+                db = self._connection()
+                if db is not None:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO sentiment_memo (key, vader_score, textblob_score) VALUES (?, ?, ?)",
+                        [(key, float(vader), float(textblob)) for key, (vader, textblob) in entries.items()]
+                    )
+                    db.commit()
+            except sqlite3.Error as e:
+                print(f"Sentiment memo write error: {e}")
+
+    def clear(self):
+        """Drop the in-memory tier (the persistent tier is keyed by model version)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.persistent_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'persistent': bool(self.path),
+                'memory_hits': self.memory_hits,
+                'persistent_hits': self.persistent_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.persistent_hits) / lookups if lookups else None
+            }
+
+
+_memo = SentimentMemo()
+
+
+def get_sentiment_memo():
+    """Return the process-wide SentimentMemo"""
+    return _memo
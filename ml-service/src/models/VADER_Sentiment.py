@@ -1,4 +1,4 @@
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from .Sentiment_Engine import get_sentiment_engine
 
 def analyze_sentiment(text):
     """
@@ -11,8 +11,7 @@ def analyze_sentiment(text):
     dict: {'compound': score, 'classification': 'positive'/'negative'/'neutral'}
     """
     
-    analyzer = SentimentIntensityAnalyzer()
-    scores = analyzer.polarity_scores(text)
+    scores = get_sentiment_engine().vader_scores(text)
     compound = scores['compound']
     
     # Your threshold classification
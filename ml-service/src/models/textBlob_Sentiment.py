@@ -1,4 +1,4 @@
-from textblob import TextBlob
+from .Sentiment_Engine import get_sentiment_engine
 
 def analyze_sentiment_textblob(text):
     """
@@ -10,8 +10,8 @@ def analyze_sentiment_textblob(text):
     Returns:
     dict: TextBlob sentiment scores
     """
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity  # -1 to 1
+    sentiment = get_sentiment_engine().textblob_scores(text)
+    polarity = sentiment.polarity  # -1 to 1
     
     # Convert to same classification system as VADER
     if polarity > 0.1:
@@ -23,7 +23,7 @@ def analyze_sentiment_textblob(text):
     
     return {
         'polarity': polarity,
-        'subjectivity': blob.sentiment.subjectivity,
+        'subjectivity': sentiment.subjectivity,
         'classification': classification
     }
 
@@ -1,11 +1,12 @@
-import requests
 import os
 from dotenv import load_dotenv
-from models.Combined_Sentiment import analyze_sentiment_combined
 #import feedparser
 from datetime import datetime, timedelta
-from database import save_article
-from database import save_sentiment_score
+from database import save_articles_bulk
+from http_client import NEWS_API_BASE_URL, fetch_concurrently, rate_limited_get
+from api_usage import reserve_api_call
+from keyword_matcher import get_keyword_matcher
+from response_cache import invalidate_response_cache
 # Load environment variables from .env file
 load_dotenv()
 
@@ -43,9 +44,18 @@ def fetch_headlines(category, count=100):
     if not api_key:
         raise ValueError("API key not found. Please set the NEWS_API_KEY environment variable.")
     
-    url = f"https://newsapi.org/v2/top-headlines?category={category}&pageSize={count}&apiKey={api_key}"
+    if not reserve_api_call('newsapi'):
+        return {
+            'error': True,
+            'status_code': 429,
+            'message': 'Daily NewsAPI quota reached.'
+        }
     
-    response = requests.get(url)
+    response = rate_limited_get(
+        'newsapi',
+        f"{NEWS_API_BASE_URL}/top-headlines",
+        params={'category': category, 'pageSize': count, 'apiKey': api_key}
+    )
     
     if response.status_code == 200:
         data = response.json()
@@ -72,19 +82,43 @@ def fetch_headlines(category, count=100):
             'message': 'There was an error fetching the news headlines.'
         }
     
+def fetch_categories(categories, count=100):
+    """
+    Fetch several headline categories concurrently
+    
+    Parameters:
+    categories (list): Categories to fetch (e.g. ['business', 'technology'])
+    count (int): Headlines per category
+    
+    Returns:
+    dict: {category: fetch_headlines result (list, or error dict)}
+    """
+    return fetch_concurrently(lambda category: fetch_headlines(category, count=count), categories)
+
+def article_text(article):
+    """Text used for sentiment scoring: title plus description"""
+    return f"{article.get('title') or ''} {article.get('description') or ''}"
+
+def score_articles(articles):
+    """Combined sentiment scores for a list of articles (scorer for save_articles_bulk)"""
+    from models.Combined_Sentiment import analyze_sentiment_batch
+    
+    return analyze_sentiment_batch([article_text(article) for article in articles])['combined_score']
+
 def filter_relevant_articles(articles, company_keywords):
     """
     Filter articles by company relevance - can match multiple companies
     
     Parameters:
     articles (list): Your news articles  
-    company_keywords (dict): Your COMPANY_KEYWORDS dict
+    company_keywords (dict): Your COMPANY_KEYWORDS dict (or a prebuilt KeywordMatcher)
     
     Returns:
     dict: {symbol: [relevant_articles]}
     """
     
-    relevant_articles = {symbol: [] for symbol in company_keywords.keys()}
+    matcher = get_keyword_matcher(company_keywords)
+    relevant_articles = {symbol: [] for symbol in matcher.symbols}
     
     for article in articles:
         # Combine title and description for searching
@@ -94,15 +128,9 @@ def filter_relevant_articles(articles, company_keywords):
         if article.get('description'):
             search_text += " " + article['description']
         
-        # Convert to lowercase for case-insensitive matching
-        search_text = search_text.lower()
-        
-        # Check each company's keywords
-        for symbol, keywords in company_keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in search_text:
-                    relevant_articles[symbol].append(article)
-                    break  # Found a match, no need to check other keywords for this company
+        # One pass over the text finds every matching company
+        for symbol in matcher.match(search_text):
+            relevant_articles[symbol].append(article)
     
     return relevant_articles
 
@@ -171,24 +199,6 @@ def filter_relevant_articles(articles, company_keywords):
     
 #     return all_articles
 
-def get_stock_id(symbol):
-    """Get stock ID from database"""
-    from database import get_db_connection
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM stocks WHERE symbol = %s", (symbol,))
-        result = cursor.fetchone()
-        return result[0] if result else None
-    except Exception as e:
-        print(f"Error getting stock ID for {symbol}: {e}")
-        return None
-    finally:
-        conn.close()
-
 def full_pipeline():
     """
     Run the complete data collection and sentiment analysis pipeline
@@ -196,11 +206,10 @@ def full_pipeline():
     print("=== Stock Playground Full Pipeline ===\n")
     
     # Step 1: Collect news articles
-    print("1. Collecting business news...")
-    business_articles = fetch_headlines('business', count=50)
-    
-    print("2. Collecting technology news...")
-    tech_articles = fetch_headlines('technology', count=50)
+    print("1-2. Collecting business and technology news...")
+    headlines = fetch_categories(['business', 'technology'], count=50)
+    business_articles = headlines['business']
+    tech_articles = headlines['technology']
     
     if isinstance(business_articles, dict) and business_articles.get('error'):
         print(f"Error in business news: {business_articles}")
@@ -227,28 +236,30 @@ def full_pipeline():
     
     # Step 3: Analyze sentiment for each company's articles
     print("4. Analyzing sentiment...")
+    from models.Combined_Sentiment import analyze_sentiment_batch, classify_scores
+    
     sentiment_results = {}
+    article_scores = {}
     
     for symbol, articles in filtered_articles.items():
         if articles:
             print(f"\n--- {symbol} Sentiment Analysis ---")
-            company_sentiments = []
+            batch = analyze_sentiment_batch([article_text(article) for article in articles])
+            for article, score in zip(articles, batch['combined_score']):
+                article_scores[article.get('url')] = score
             
-            for i, article in enumerate(articles[:5]):  # Analyze first 5 articles
-                text = f"{article['title']} {article.get('description', '')}"
-                sentiment = analyze_sentiment_combined(text)
-                company_sentiments.append(sentiment)
-                
-                print(f"Article {i+1}: {sentiment['classification']} ({sentiment['combined_score']:.3f})")
+            for i, article in enumerate(articles[:5]):  # Show first 5 articles
+                print(f"Article {i+1}: {batch['classification'][i]} ({batch['combined_score'][i]:.3f})")
                 print(f"  Title: {article['title'][:60]}...")
             
-            # Calculate average sentiment for the company
-            avg_compound = sum(s['combined_score'] for s in company_sentiments) / len(company_sentiments)
+            # Calculate average sentiment for the company (over the first 5, as reported)
+            analyzed = batch['combined_score'][:5]
+            avg_compound = float(analyzed.mean())
             sentiment_results[symbol] = {
                 'articles_count': len(articles),
-                'analyzed_count': len(company_sentiments),
+                'analyzed_count': len(analyzed),
                 'average_sentiment': avg_compound,
-                'classification': 'positive' if avg_compound > 0.1 else 'negative' if avg_compound < -0.1 else 'neutral'
+                'classification': str(classify_scores(avg_compound))
             }
     
     # Step 4: Summary
@@ -265,37 +276,28 @@ def full_pipeline():
     # Step 5: Put Into Database
     print("\n5. Storing results in database...")
 
-    for symbol, articles in filtered_articles.items():
-        # Get the stock_id once for this symbol
-        stock_id = get_stock_id(symbol)
-        if not stock_id:
-            print(f"❌ Stock {symbol} not found in database")
-            continue
-        
-        for article in articles:
-            # Save article first
-            article_id = save_article(article, [symbol])
-            
-            if article_id:
-                # Analyze sentiment
-                text = f"{article['title']} {article.get('description', '')}"
-                sentiment_result = analyze_sentiment_combined(text)
-                sentiment_score = sentiment_result['combined_score']
-                
-                # Save sentiment with CORRECT parameters
-                sentiment_id = save_sentiment_score(
-                    article_id,      # article_id (integer)
-                    stock_id,        # stock_id (integer) 
-                    sentiment_score  # sentiment_score (float)
-                )
-                
-                if sentiment_id:
-                    print(f"✅ Saved article for {symbol}: {article['title'][:50]}...")
-                else:
-                    print(f"❌ Failed to save sentiment")
-            else:
-                print(f"⚠️  Article already exists: {article['title'][:50]}...")
+    # Reuse the step 3 scores instead of analyzing new articles again
+    inserted = save_articles_bulk(
+        filtered_articles,
+        lambda new_articles: [article_scores[article['url']] for article in new_articles]
+    )
+    
+    if inserted is None:
+        print("❌ Failed to store articles")
+        return sentiment_results
+    
+    for symbol, new_articles in inserted.items():
+        if symbol in sentiment_results:
+            sentiment_results[symbol]['new_articles'] = len(new_articles)
+        for article in new_articles:
+            print(f"✅ Saved article for {symbol}: {(article['title'] or '')[:50]}...")
+        skipped = len(filtered_articles[symbol]) - len(new_articles)
+        if skipped:
+            print(f"⚠️  {symbol}: {skipped} articles already existed")
 
+    if any(inserted.values()):
+        # Make the query endpoints pick up the new rows
+        invalidate_response_cache()
     print("✅ All articles and sentiment scores saved to database.")
 
     
@@ -0,0 +1,287 @@
+# ml-service/src/response_cache.py
+import asyncio
+import contextvars
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# Cache settings (override via environment)
+RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')  # 'memory' or 'redis'
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '600'))  # 0 disables caching
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '1024'))
+
+# Set around each compute(): a one-item list that skip_caching() clears. A
+# mutable holder rather than a flag, so queries gathered into child tasks
+# (which run in a copy of the context) still reach the caller's holder
+_cacheable = contextvars.ContextVar('response_cache_cacheable', default=None)
+
+
+def skip_caching():
+    """
+    Keep the result currently being computed out of the cache
+
+    Queries call this when they return a fallback ([], {}, None) after an
+    error, so the failure is served once instead of for the whole TTL.
+    Does nothing outside get_or_compute.
+    """
+    cacheable = _cacheable.get()
+    if cacheable is not None:
+        cacheable[0] = False
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry expiry"""
+
+    name = 'memory'
+    # Calls never wait on I/O, so the async path runs them inline
+    blocking = False
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def epoch(self):
+        return self._epoch
+
+    def set(self, key, value, ttl, epoch):
+        with self._lock:
+            if epoch != self._epoch:
+                # Computed from data that was invalidated meanwhile
+                return
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """
+    Shared cache in Redis, so every worker and the collector see one cache.
+
+    Keys carry a generation number (the backend's epoch); clear() bumps the
+    generation instead of scanning for keys. Expiry uses Redis TTLs and
+    eviction is left to the server's maxmemory policy (allkeys-lru recommended).
+    """
+
+    name = 'redis'
+    blocking = True
+    prefix = 'ml-service:response-cache'
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=1)
+        self.client.ping()
+
+    def _generation(self):
+        return int(self.client.get(f"{self.prefix}:generation") or 0)
+
+    def get(self, key):
+        return self.client.get(f"{self.prefix}:{self._generation()}:{key}")
+
+    def epoch(self):
+        return self._generation()
+
+    def set(self, key, value, ttl, epoch):
+        # Filed under the generation read before computing: if clear() ran
+        # meanwhile, nothing reads that generation any more
+        self.client.setex(f"{self.prefix}:{epoch}:{key}", ttl, value)
+
+    def clear(self):
+        self.client.incr(f"{self.prefix}:generation")
+
+    def size(self):
+        return None
+
+
+class ResponseCache:
+    """Read-through cache for query endpoint data, keyed by endpoint + parameters"""
+
+    def __init__(self, backend, ttl=RESPONSE_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(endpoint, params):
+        """Stable key: the same parameters in any order map to the same entry"""
+        return f"{endpoint}:{json.dumps(params, sort_keys=True, default=str)}"
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _read(self, key):
+        """Pickled entry for key, or None on a miss or backend error"""
+        try:
+            cached = self.backend.get(key)
+        except Exception as e:
+            print(f"Response cache read error: {e}")
+            cached = None
+
+        self._count('hits' if cached is not None else 'misses')
+        return cached
+
+    def _epoch(self):
+        """Backend epoch (bumped by every invalidation), or None on a backend error"""
+        try:
+            return self.backend.epoch()
+        except Exception as e:
+            print(f"Response cache read error: {e}")
+            return None
+
+    def _write(self, key, value, epoch):
+        """Store value unless the cache was invalidated since epoch was read"""
+        if epoch is None:
+            return
+        try:
+            self.backend.set(key, pickle.dumps(value), self.ttl, epoch)
+        except Exception as e:
+            print(f"Response cache write error: {e}")
+
+    def get_or_compute(self, endpoint, params, compute):
+        """
+        Return cached data for endpoint/params, or call compute() and cache its result
+        
+        Backend errors are logged and treated as a miss, so a cache outage never
+        breaks the endpoint. A result is not cached if anything called
+        skip_caching() while computing it. A TTL of 0 disables the cache.
+        """
+        if self.ttl <= 0:
+            return compute()
+
+        key = self.make_key(endpoint, params)
+
+        cached = self._read(key)
+        if cached is not None:
+            # Values are stored pickled so callers can never mutate a cached entry
+            return pickle.loads(cached)
+
+        # Read before computing, so a result that straddles invalidate() is dropped
+        epoch = self._epoch()
+        cacheable = [True]
+        token = _cacheable.set(cacheable)
+        try:
+            value = compute()
+        finally:
+            _cacheable.reset(token)
+
+        if cacheable[0]:
+            self._write(key, value, epoch)
+        return value
+
+    async def get_or_compute_async(self, endpoint, params, compute):
+        """
+        get_or_compute for the async app: compute() returns an awaitable
+        
+        Entries are shared with the sync app. A blocking backend (Redis) is
+        called from a worker thread so the event loop never waits on it.
+        """
+        if self.ttl <= 0:
+            return await compute()
+
+        key = self.make_key(endpoint, params)
+
+        if self.backend.blocking:
+            cached = await asyncio.to_thread(self._read, key)
+        else:
+            cached = self._read(key)
+        if cached is not None:
+            return pickle.loads(cached)
+
+        if self.backend.blocking:
+            epoch = await asyncio.to_thread(self._epoch)
+        else:
+            epoch = self._epoch()
+        cacheable = [True]
+        token = _cacheable.set(cacheable)
+        try:
+            value = await compute()
+        finally:
+            _cacheable.reset(token)
+
+        if not cacheable[0]:
+            return value
+        if self.backend.blocking:
+            await asyncio.to_thread(self._write, key, value, epoch)
+        else:
+            self._write(key, value, epoch)
+        return value
+
+    def invalidate(self):
+        """Drop every cached entry (call when new rows land in the database)"""
+        self._count('invalidations')
+        try:
+            self.backend.clear()
+        except Exception as e:
+            print(f"Response cache invalidation error: {e}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0,
+            'invalidations': self.invalidations,
+            'entries': self.backend.size()
+        }
+
+
+def _create_backend():
+    if RESPONSE_CACHE_BACKEND == 'redis':
+        redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
+        try:
+            return RedisCacheBackend(redis_url)
+        except Exception as e:
+            print(f"Redis cache unavailable ({e}), falling back to in-process cache")
+    return MemoryCacheBackend()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide ResponseCache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(_create_backend())
+    return _cache
+
+
+def invalidate_response_cache():
+    """Invalidate cached query results after new data is written"""
+    get_response_cache().invalidate()
@@ -1,18 +1,88 @@
-import requests
+import json
 import os
-import time
+from datetime import date
 from dotenv import load_dotenv
-from database import save_stock_prices
+from database import get_latest_price_dates, save_stock_prices
+from http_client import ALPHA_VANTAGE_BASE_URL, fetch_concurrently, rate_limited_get
+from api_usage import reserve_api_call
 # Load environment variables from .env file
 load_dotenv()
 
 
-def fetch_stock_data(symbol):
+# Rows kept when a symbol has no stored history yet (about 3 months)
+INITIAL_HISTORY_DAYS = 90
+# 'compact' output holds the latest 100 trading days, roughly 140 calendar days;
+# stay well inside that so a gap is never silently truncated
+COMPACT_MAX_GAP_DAYS = 120
+
+_json_decoder = json.JSONDecoder()
+
+def parse_daily_closes(payload, since=None, limit=None):
+    """
+    Pull closing prices out of a TIME_SERIES_DAILY payload without decoding all of it
+    
+    Alpha Vantage lists days newest first, so decoding stops at the first day
+    before `since` (or after `limit` rows). The `since` day itself is kept so a
+    close stored mid-session gets refreshed. A full-history payload is
+    20+ years of rows; a daily run only ever needs the first few.
+    
+    Parameters:
+    payload (str): Raw JSON response body
+    since (date): Last date already stored; only that day and newer are returned
+    limit (int): Maximum number of rows to return
+    
+    Returns:
+    list: [{'date': '2024-07-25', 'close': 150.23}, ...] newest first,
+          or None if the payload has no daily time series or is truncated
+    """
+    start = payload.find('"Time Series (Daily)"')
+    if start == -1:
+        return None
+    
+    since = since.isoformat() if since else None
+    stock_data = []
+    
+    try:
+        position = payload.index('{', start) + 1
+        
+        while limit is None or len(stock_data) < limit:
+            # Skip whitespace and separators between entries
+            while payload[position] in ' \t\r\n,':
+                position += 1
+            if payload[position] == '}':
+                break
+            
+            day, position = _json_decoder.raw_decode(payload, position)
+            if since and day < since:
+                break
+            
+            position = payload.index(':', position) + 1
+            while payload[position] in ' \t\r\n':
+                position += 1
+            price_data, position = _json_decoder.raw_decode(payload, position)
+            
+            stock_data.append({
+                'date': day,
+                'close': float(price_data['4. close'])
+            })
+    except (IndexError, ValueError) as e:
+        # Body cut off mid-series (dropped connection, partial read)
+        print(f"Truncated daily time series payload: {e}")
+        return None
+    
+    return stock_data
+
+def fetch_stock_data(symbol, since=None):
     """
-    Fetches 3 months of daily stock data for a single symbol.
+    Fetches daily stock data for a single symbol.
+    
+    With no stored history this returns the last ~3 months. When `since` is
+    given only that day and newer ones are returned, and the small 'compact' output is
+    requested whenever the gap fits inside it.
     
     Parameters:
     symbol (str): Stock symbol (e.g., 'AAPL')
+    since (date): Last date already stored for this symbol, if any
     
     Returns:
     list: List of dicts with date and close price
@@ -25,76 +95,74 @@ def fetch_stock_data(symbol):
     if not api_key:
         return {'error': True, 'message': 'Alpha Vantage API key not found'}
     
-    url = f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol={symbol}&outputsize=full&apikey={api_key}"
+    if not reserve_api_call('alphavantage'):
+        return {'error': True, 'message': 'Daily Alpha Vantage quota reached'}
+    
+    if since:
+        gap_days = (date.today() - since).days
+        outputsize = 'compact' if gap_days <= COMPACT_MAX_GAP_DAYS else 'full'
+        limit = None
+    else:
+        outputsize = 'compact'
+        limit = INITIAL_HISTORY_DAYS
+    
+    from requests.exceptions import RequestException
     
     try:
-        response = requests.get(url)
+        response = rate_limited_get(
+            'alphavantage',
+            f"{ALPHA_VANTAGE_BASE_URL}/query",
+            params={'function': 'TIME_SERIES_DAILY', 'symbol': symbol, 'outputsize': outputsize, 'apikey': api_key}
+        )
         
         if response.status_code == 200:
-            data = response.json()
-            
-            # Check for API error messages
-            if "Error Message" in data:
-                return {'error': True, 'message': f'Invalid symbol: {symbol}'}
-            
-            if "Note" in data:
-                return {'error': True, 'message': 'API rate limit exceeded'}
-            
-            # Extract time series data
-            time_series = data.get('Time Series (Daily)', {})
+            stock_data = parse_daily_closes(response.text, since=since, limit=limit)
             
-            if not time_series:
+            if stock_data is None:
+                # No time series: small payload, decode it to find out why
+                data = response.json()
+                
+                # Check for API error messages
+                if "Error Message" in data:
+                    return {'error': True, 'message': f'Invalid symbol: {symbol}'}
+                
+                if "Note" in data or "Information" in data:
+                    return {'error': True, 'message': 'API rate limit exceeded'}
+                
                 return {'error': True, 'message': f'No data found for {symbol}'}
             
-            # Convert to list format and get last 3 months (approximately 90 days)
-            stock_data = []
-            for date, price_data in list(time_series.items())[:90]:
-                stock_data.append({
-                    'date': date,
-                    'close': float(price_data['4. close'])
-                })
-            
             return stock_data
             
         else:
             return {'error': True, 'message': f'HTTP {response.status_code}: Request failed'}
     
-    except requests.exceptions.RequestException as e:
+    except RequestException as e:
         return {'error': True, 'message': f'Network error: {str(e)}'}
     
     except Exception as e:
         return {'error': True, 'message': f'Unexpected error: {str(e)}'}
 
-def fetch_multiple_stocks(symbols):
+def fetch_multiple_stocks(symbols, last_dates=None):
     """
-    Fetches stock data for multiple symbols with rate limiting.
+    Fetches stock data for multiple symbols concurrently.
+    
+    Requests share one keep-alive session and are paced by the Alpha Vantage
+    token bucket in http_client, so no fixed sleeps are needed here.
     
     Parameters:
     symbols (list): List of stock symbols ['AAPL', 'GOOGL', ...]
+    last_dates (dict): {symbol: last stored date}; only newer days are fetched
     
     Returns:
     dict: {symbol: stock_data} where stock_data is list or error dict
     """
+    last_dates = last_dates or {}
     
-    results = {}
+    def fetch(symbol):
+        print(f"Fetching data for {symbol}...")
+        return fetch_stock_data(symbol, since=last_dates.get(symbol))
     
-    for i, symbol in enumerate(symbols):
-        print(f"Fetching data for {symbol} ({i+1}/{len(symbols)})...")
-        
-        # Fetch the stock data
-        stock_data = fetch_stock_data(symbol)
-        results[symbol] = stock_data
-        
-        # Check if we need to wait (after every 5 calls, but not after the last one)
-        if (i + 1) % 5 == 0 and (i + 1) < len(symbols):
-            print("Rate limit: Waiting 60 seconds...")
-            time.sleep(60)
-        
-        # Small delay between individual calls to be nice to the API
-        elif (i + 1) < len(symbols):
-            time.sleep(12)  # 12 seconds = 5 calls per minute
-    
-    return results
+    return fetch_concurrently(fetch, symbols)
 
 def fetch_and_save_stocks(symbols):
     """
@@ -107,14 +175,16 @@ def fetch_and_save_stocks(symbols):
     dict: {symbol: success or error message}
     """
     
-    results = fetch_multiple_stocks(symbols)
+    # Only ask for days we don't have yet
+    last_dates = get_latest_price_dates(symbols)
+    results = fetch_multiple_stocks(symbols, last_dates)
     
     for symbol, data in results.items():
         if isinstance(data, dict) and data.get('error'):
             print(f"{symbol}: Error - {data['message']}")
+        elif not data:
+            print(f"{symbol}: No new data (last stored {last_dates.get(symbol)})")
         else:
-            # Here you would call your database save function
-            # For example: save_stock_prices(symbol, data)
             print(f"{symbol}: Successfully fetched {len(data)} days of data")
             success = save_stock_prices(symbol, data)
 
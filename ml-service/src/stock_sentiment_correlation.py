@@ -1,6 +1,8 @@
-from models.Combined_Sentiment import analyze_sentiment_combined
-from news_Collection import fetch_headlines, filter_relevant_articles
+from models.Combined_Sentiment import analyze_sentiment_batch
+from news_Collection import fetch_headlines, filter_relevant_articles, article_text
 from stock_data import fetch_stock_data
+from correlation_engine import MAX_LAG_DAYS, correlate_series
+from trading_calendar import next_trading_day
 
 COMPANY_KEYWORDS = {
     'AAPL': ['Apple', 'iPhone', 'iPad', 'Mac', 'iOS', 'App Store', 'Tim Cook'],
@@ -16,110 +18,70 @@ def correlate_sentiment_with_prices(symbol, sentiment_data, stock_data):
     """
     Correlate same-day sentiment with same-day price percentage change
     (handles weekends/holidays by finding next trading day)
-    """
-    from datetime import datetime, timedelta
-    
-    def get_next_trading_day(date_str, stock_dates):
-        """Find the next available trading day for a given date"""
-        news_date = datetime.strptime(date_str, '%Y-%m-%d')
-        
-        # Look for the next trading day (could be the same day if it's a trading day)
-        for i in range(7):  # Look up to 7 days ahead
-            check_date = (news_date + timedelta(days=i)).strftime('%Y-%m-%d')
-            if check_date in stock_dates:
-                return check_date
-        
-        # Look backwards if no future trading day found
-        for i in range(1, 7):
-            check_date = (news_date - timedelta(days=i)).strftime('%Y-%m-%d')
-            if check_date in stock_dates:
-                return check_date
-        
-        return None
-    
-    # Step 1: Group sentiment by date
-    daily_sentiment = {}
-    
-    for article in sentiment_data:
-        if article.get('publishedAt'):
-            date_str = article['publishedAt'][:10]
-            
-            if date_str not in daily_sentiment:
-                daily_sentiment[date_str] = []
-            
-            sentiment_score = article.get('sentiment_score', 0)
-            daily_sentiment[date_str].append(sentiment_score)
-    
-    # Calculate daily averages
-    for date in daily_sentiment:
-        scores = daily_sentiment[date]
-        daily_sentiment[date] = sum(scores) / len(scores)
-    
-    # Step 2: Calculate daily price percentage changes
-    daily_price_changes = {}
-    stock_dates = set()
     
-    for i in range(1, len(stock_data)):
-        today = stock_data[i]
-        yesterday = stock_data[i-1]
-        
-        today_close = today['close']
-        yesterday_close = yesterday['close']
-        
-        percentage_change = ((today_close - yesterday_close) / yesterday_close) * 100
-        daily_price_changes[today['date']] = percentage_change
-        stock_dates.add(today['date'])
+    Returns:
+    list: [{'news_date', 'trading_date', 'sentiment', 'price_change'}, ...]
+          ordered by news date. Use correlation_engine.correlate_series
+          directly for Pearson/Spearman and lagged correlations.
+    """
+    scored = [article for article in sentiment_data if article.get('publishedAt')]
+    if not scored or len(stock_data) < 2:
+        return []
+    
+    result = correlate_series(
+        [article['publishedAt'][:10] for article in scored],
+        [article.get('sentiment_score', 0) for article in scored],
+        [day['date'] for day in stock_data],
+        [day['close'] for day in stock_data]
+    )
+    
+    return [
+        {
+            'news_date': str(news_date),
+            'trading_date': str(trading_date),
+            'sentiment': float(sentiment),
+            'price_change': float(price_change)
+        }
+        for news_date, trading_date, sentiment, price_change in zip(
+            result['news_date'], result['trading_date'], result['sentiment'], result['price_change']
+        )
+    ]
+
+def correlate_from_export(symbol, export_dir=None, max_lag=MAX_LAG_DAYS):
+    """
+    Sentiment/price correlation for a symbol from the Parquet corpus export
+    (see corpus_export.py) instead of the database
     
-    # Step 3: Find correlations (with weekend handling)
-    correlations = []
+    Suited to research over the full history: the symbol's partitions are
+    memory-mapped, so repeated runs read them straight from the page cache.
     
-    for news_date in daily_sentiment:
-        # Find the corresponding trading day
-        trading_day = get_next_trading_day(news_date, stock_dates)
-        
-        if trading_day and trading_day in daily_price_changes:
-            correlations.append({
-                'news_date': news_date,
-                'trading_date': trading_day,
-                'sentiment': daily_sentiment[news_date],
-                'price_change': daily_price_changes[trading_day]
-            })
+    Returns:
+    dict: correlation_engine.correlate_series result, or None if the symbol
+          has not been exported
+    """
+    from corpus_export import CORPUS_EXPORT_DIR, read_symbol_series
     
-    return correlations
+    series = read_symbol_series(symbol, export_dir or CORPUS_EXPORT_DIR)
+    if series is None:
+        return None
+    return correlate_series(*series, max_lag=max_lag)
 
 def add_sentiment_to_articles(articles):
     """
     Add sentiment analysis to your filtered articles
     """
-    for article in articles:
-        text = f"{article['title']} {article.get('description', '')}"
-        sentiment = analyze_sentiment_combined(text)  # Your combined VADER+TextBlob function
-        article['sentiment_score'] = sentiment['combined_score']
-        article['sentiment_classification'] = sentiment['classification']
+    batch = analyze_sentiment_batch([article_text(article) for article in articles])  # Your combined VADER+TextBlob function
+    for i, article in enumerate(articles):
+        article['sentiment_score'] = float(batch['combined_score'][i])
+        article['sentiment_classification'] = str(batch['classification'][i])
     return articles
 
 def get_next_trading_day(date_str, stock_dates):
     """
     Find the next available trading day for a given date
+    (same rules as the correlation engine and the SQL path, see trading_calendar)
     """
-    # Convert to date for comparison
-    from datetime import datetime, timedelta
-    
-    news_date = datetime.strptime(date_str, '%Y-%m-%d')
-    
-    # Look for the next trading day (could be the same day if it's a trading day)
-    for i in range(7):  # Look up to 7 days ahead
-        check_date = (news_date + timedelta(days=i)).strftime('%Y-%m-%d')
-        if check_date in stock_dates:
-            return check_date
-    
-    # Look backwards if no future trading day found
-    for i in range(1, 7):
-        check_date = (news_date - timedelta(days=i)).strftime('%Y-%m-%d')
-        if check_date in stock_dates:
-            return check_date
-    
-    return None
+    return next_trading_day(date_str, stock_dates)
 
 def test_full_correlation():
     print("=== Sentiment-Price Correlation Test ===\n")
@@ -0,0 +1,141 @@
+# ml-service/src/symbol_registry.py
+import os
+import threading
+import time
+
+# Reload the whole table after this many seconds (0 = only reload on a miss)
+SYMBOL_REGISTRY_TTL = float(os.getenv('SYMBOL_REGISTRY_TTL', '3600'))
+# Unknown symbols trigger at most one reload per this many seconds
+MISS_RELOAD_INTERVAL = 5.0
+
+STOCKS_QUERY = "SELECT symbol, id, name FROM stocks"
+
+class SymbolRegistry:
+    """
+    Process-wide symbol -> (stock id, name) map for the small, rarely changing stocks table
+    
+    Loaded once on first use. A lookup that misses reloads the table (rate
+    limited, so repeated unknown symbols cost nothing), and the whole map is
+    optionally reloaded every SYMBOL_REGISTRY_TTL seconds.
+    """
+
+    def __init__(self, ttl=SYMBOL_REGISTRY_TTL):
+        self.ttl = ttl
+        self._stocks = {}
+        self._symbols_by_id = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def load(self, cursor=None):
+        """
+        (Re)load every stock
+        
+        Parameters:
+        cursor: Optional open cursor to read with (avoids borrowing a second connection)
+        
+        Returns:
+        bool: True if the table was read
+        """
+        if cursor is None:
+            from database import db_connection
+            with db_connection() as conn:
+                if not conn:
+                    return False
+                try:
+                    return self.load(conn.cursor())
+                except Exception as e:
+                    print(f"Error loading symbol registry: {e}")
+                    return False
+
+        # Callers often pass a RealDictCursor; rows must unpack as tuples
+        cursor = cursor.connection.cursor()
+        cursor.execute(STOCKS_QUERY)
+        self.replace(cursor.fetchall())
+        return True
+
+    def replace(self, rows):
+        """Install a freshly read stocks table, as (symbol, id, name) rows from STOCKS_QUERY"""
+        stocks = {symbol: (stock_id, name) for symbol, stock_id, name in rows}
+
+        with self._lock:
+            self._stocks = stocks
+            self._symbols_by_id = {stock_id: symbol for symbol, (stock_id, _) in stocks.items()}
+            self._loaded_at = time.monotonic()
+
+    def needs_load(self, symbols=()):
+        """
+        True if get_ids(symbols) would (re)load the table first
+        
+        Lets async callers read STOCKS_QUERY on their own connection and
+        replace() the table, instead of the lookup loading it synchronously.
+        """
+        age = self._age()
+        if age is None or (self.ttl and age > self.ttl):
+            return True
+        return age > MISS_RELOAD_INTERVAL and any(symbol not in self._stocks for symbol in symbols)
+
+    def _age(self):
+        return None if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    def _ensure_loaded(self, cursor=None):
+        age = self._age()
+        if age is None or (self.ttl and age > self.ttl):
+            self.load(cursor)
+
+    def get_ids(self, symbols, cursor=None):
+        """
+        Bulk symbol -> stock id lookup
+        
+        Parameters:
+        symbols (iterable): Stock symbols
+        cursor: Optional open cursor used if the table has to be (re)loaded
+        
+        Returns:
+        dict: {symbol: stock_id} for the symbols that exist
+        """
+        self._ensure_loaded(cursor)
+        symbols = list(symbols)
+        stocks = self._stocks
+
+        if any(symbol not in stocks for symbol in symbols):
+            age = self._age()
+            if age is None or age > MISS_RELOAD_INTERVAL:
+                self.load(cursor)
+                stocks = self._stocks
+
+        return {symbol: stocks[symbol][0] for symbol in symbols if symbol in stocks}
+
+    def get_id(self, symbol, cursor=None):
+        """Stock id for one symbol, or None"""
+        return self.get_ids([symbol], cursor).get(symbol)
+
+    def get_name(self, symbol):
+        """Company name for a symbol, or None"""
+        self._ensure_loaded()
+        entry = self._stocks.get(symbol)
+        return entry[1] if entry else None
+
+    def get_symbol(self, stock_id):
+        """Symbol for a stock id, or None"""
+        self._ensure_loaded()
+        symbol = self._symbols_by_id.get(stock_id)
+        if symbol is None and (self._age() or 0) > MISS_RELOAD_INTERVAL:
+            self.load()
+            symbol = self._symbols_by_id.get(stock_id)
+        return symbol
+
+    def symbols(self):
+        """Every known symbol, sorted"""
+        self._ensure_loaded()
+        return sorted(self._stocks)
+
+    def invalidate(self):
+        """Force a reload on next use (e.g. after inserting stocks)"""
+        with self._lock:
+            self._loaded_at = None
+
+_registry = SymbolRegistry()
+
+def get_symbol_registry():
+    """The process-wide SymbolRegistry"""
+    return _registry
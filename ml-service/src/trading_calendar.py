@@ -0,0 +1,58 @@
+# ml-service/src/trading_calendar.py
+import numpy as np
+
+# News is matched to the next trading day up to this many days ahead,
+# otherwise to the previous trading day up to this many days back
+TRADING_DAY_WINDOW = 6
+
+
+def to_day_array(dates):
+    """ISO date strings / date objects / datetime64 -> sorted-compatible datetime64[D] array"""
+    return np.asarray(dates, dtype='datetime64[D]')
+
+
+def align_to_trading_days(news_days, trading_days, window=TRADING_DAY_WINDOW):
+    """
+    Map each news day to an index into trading_days
+    
+    Picks the same trading day or the next one within `window` days; failing
+    that, the previous one within `window` days; otherwise -1.
+    
+    Parameters:
+    news_days (np.ndarray): datetime64[D] news dates
+    trading_days (np.ndarray): Sorted datetime64[D] trading dates
+    
+    Returns:
+    np.ndarray: int indices into trading_days, -1 where no trading day is close enough
+    """
+    if len(trading_days) == 0:
+        return np.full(len(news_days), -1)
+
+    window = np.timedelta64(window, 'D')
+    last = len(trading_days) - 1
+
+    after = np.searchsorted(trading_days, news_days, side='left')
+    forward_ok = (after <= last) & (trading_days[np.minimum(after, last)] - news_days <= window)
+
+    before = after - 1
+    backward_ok = (before >= 0) & (news_days - trading_days[np.maximum(before, 0)] <= window)
+
+    return np.where(forward_ok, after, np.where(backward_ok, before, -1))
+
+
+def next_trading_day(date_str, trading_dates, window=TRADING_DAY_WINDOW):
+    """
+    Trading day a single news date is attributed to
+    
+    Parameters:
+    date_str (str): News date, YYYY-MM-DD
+    trading_dates (iterable): Trading dates (YYYY-MM-DD strings or dates), any order
+    
+    Returns:
+    str: Matching trading date (YYYY-MM-DD), or None
+    """
+    trading_days = np.unique(to_day_array(list(trading_dates)))
+    index = align_to_trading_days(to_day_array([date_str]), trading_days, window)[0]
+    if index < 0:
+        return None
+    return str(trading_days[index])
@@ -0,0 +1,5 @@
+# ml-service/src/wsgi.py
+# Production entry point: gunicorn -c gunicorn.conf.py (from ml-service/)
+from app import create_app
+
+app = create_app()
@@ -0,0 +1,12 @@
+# ml-service/tests/conftest.py
+# Tests import the service modules the way the entry points do: from src/, with
+# the benchmark helpers (stub provider server, import-time check) alongside.
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'src'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+# Collector runs under test log to the console only, never to data_collection.log
+os.environ['COLLECTION_LOG_FILE'] = ''
@@ -0,0 +1,89 @@
+# ml-service/tests/test_fetch_layer.py
+# The collectors' real fetch path (http_client session, token buckets, retries)
+# against the local stub provider server from benchmarks/.
+import threading
+
+import pytest
+
+import http_client
+import news_Collection
+import stock_data
+from http_client import TokenBucket
+from stub_provider_server import make_stub_server
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = make_stub_server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    monkeypatch.setattr(news_Collection, 'NEWS_API_BASE_URL', f"{base_url}/v2")
+    monkeypatch.setattr(stock_data, 'ALPHA_VANTAGE_BASE_URL', base_url)
+    monkeypatch.setenv('NEWS_API_KEY', 'stub')
+    monkeypatch.setenv('ALPHA_VANTAGE_KEY', 'stub')
+    # Daily quotas live in the database ledger; not under test here
+    monkeypatch.setattr(news_Collection, 'reserve_api_call', lambda provider: True)
+    monkeypatch.setattr(stock_data, 'reserve_api_call', lambda provider: True)
+    monkeypatch.setattr(http_client, 'HTTP_RETRY_BACKOFF', 0.01)
+    # Fresh buckets, so the real per-minute limits don't carry over between tests
+    for provider in ('newsapi', 'alphavantage'):
+        monkeypatch.setitem(http_client.RATE_LIMITERS, provider, TokenBucket(rate=1000, capacity=10))
+
+    yield server.handler
+
+    server.shutdown()
+    server.server_close()
+    thread.join(5)
+
+
+def test_categories_are_fetched_from_the_stub(stub):
+    headlines = news_Collection.fetch_categories(['business', 'technology'], count=10)
+
+    assert [len(headlines[category]) for category in ('business', 'technology')] == [10, 10]
+    assert sorted(params['category'] for _, _, params in stub.request_log) == ['business', 'technology']
+
+
+def test_symbol_requests_are_paced_by_the_token_bucket(stub, monkeypatch):
+    rate = 10
+    monkeypatch.setitem(http_client.RATE_LIMITERS, 'alphavantage', TokenBucket(rate=rate, capacity=1))
+    symbols = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'META', 'TSLA']
+
+    results = stock_data.fetch_multiple_stocks(symbols)
+
+    assert all(isinstance(results[symbol], list) and results[symbol] for symbol in symbols)
+    times = sorted(at for at, _, _ in stub.request_log)
+    assert len(times) == len(symbols)
+    # Fetched concurrently, yet spaced out by the bucket (with slack for
+    # thread scheduling between the token and the request reaching the stub)
+    assert min(later - earlier for earlier, later in zip(times, times[1:])) >= 0.5 / rate
+    assert times[-1] - times[0] >= 0.9 * (len(symbols) - 1) / rate
+
+
+def test_retryable_status_is_retried(stub):
+    stub.fail_next = http_client.HTTP_RETRIES
+
+    articles = news_Collection.fetch_headlines('business', count=5)
+
+    assert len(articles) == 5
+    assert len(stub.request_log) == http_client.HTTP_RETRIES + 1
+
+
+def test_retries_give_up_with_the_last_response(stub):
+    stub.fail_next = 100
+
+    result = news_Collection.fetch_headlines('business', count=5)
+
+    assert result['error'] is True
+    assert result['status_code'] == 503
+    assert len(stub.request_log) == http_client.HTTP_RETRIES + 1
+
+
+def test_client_errors_are_not_retried(stub):
+    stub.fail_next, stub.fail_status = 1, 401
+
+    result = stock_data.fetch_stock_data('AAPL')
+
+    assert result == {'error': True, 'message': 'HTTP 401: Request failed'}
+    assert len(stub.request_log) == 1
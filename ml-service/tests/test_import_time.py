@@ -0,0 +1,42 @@
+# ml-service/tests/test_import_time.py
+# Import-time budgets from benchmarks/check_import_time.py, enforced under pytest.
+# IMPORT_BUDGET_SCALE multiplies every budget on slow CI machines.
+import importlib.util
+import os
+
+import pytest
+
+from check_import_time import IMPORT_BUDGETS_MS, check
+
+IMPORT_BUDGET_SCALE = float(os.getenv('IMPORT_BUDGET_SCALE', '1'))
+IMPORT_TIME_REPEAT = int(os.getenv('IMPORT_TIME_REPEAT', '3'))
+
+# Entry points whose framework is an optional install
+REQUIRED_PACKAGES = {'app_async': ['quart', 'hypercorn', 'asyncpg']}
+
+
+@pytest.mark.parametrize('module', list(IMPORT_BUDGETS_MS))
+def test_import_time_within_budget(module):
+    missing = [name for name in REQUIRED_PACKAGES.get(module, []) if importlib.util.find_spec(name) is None]
+    if missing:
+        pytest.skip(f"{module} needs {', '.join(missing)}")
+
+    result = check([module], IMPORT_TIME_REPEAT, IMPORT_BUDGET_SCALE)[module]
+
+    assert not result['eager_dependencies'], (
+        f"{module} imports {', '.join(result['eager_dependencies'])} eagerly"
+    )
+    assert not result['over_budget'], (
+        f"{module} takes {result['median_ms']} ms to import (budget {result['budget_ms']} ms)"
+    )
+
+
+def test_importing_collector_leaves_no_files(monkeypatch):
+    # With the default log file configured, not the console-only test setting
+    monkeypatch.delenv('COLLECTION_LOG_FILE')
+    src_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+    before = set(os.listdir(src_dir))
+
+    check(['daily_data_collector'], 1, float('inf'))
+
+    assert set(os.listdir(src_dir)) - before <= {'__pycache__'}
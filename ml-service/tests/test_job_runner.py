@@ -0,0 +1,125 @@
+# ml-service/tests/test_job_runner.py
+# Collection jobs from daily_data_collector under JobRunner, with stubbed
+# fetchers, file locks in a temp directory and job_runs writes captured in memory.
+import threading
+
+import pytest
+
+import job_runner
+from daily_data_collector import build_collection_runner
+
+NO_USAGE = {'news_calls': 0, 'stock_calls': 0}
+
+
+@pytest.fixture
+def recorded(monkeypatch, tmp_path):
+    """Outcomes JobRunner would write to job_runs, keyed by run id"""
+    runs = {}
+
+    def record_start(name, started_at):
+        runs[len(runs) + 1] = {'job': name, 'status': 'running'}
+        return len(runs)
+
+    def record_finish(run_id, result):
+        runs[run_id].update(status=result['status'], rows=result['rows'], error=result['error'])
+
+    monkeypatch.setattr(job_runner, 'JOB_LOCK_DIR', str(tmp_path))
+    monkeypatch.setattr(job_runner, '_record_start', record_start)
+    monkeypatch.setattr(job_runner, '_record_finish', record_finish)
+    return runs
+
+
+def make_runner(**fetchers):
+    fetchers.setdefault('fetch_stocks', lambda symbols: {})
+    fetchers.setdefault('run_pipeline', lambda: {})
+    fetchers.setdefault('get_usage', lambda: NO_USAGE)
+    runner = build_collection_runner(**fetchers)
+    runner.lock_backend = 'file'
+    return runner
+
+
+def test_jobs_succeed_with_stored_row_counts(recorded):
+    runner = make_runner(
+        fetch_stocks=lambda symbols: {
+            'AAPL': [{'date': '2024-07-25', 'close': 1.0}, {'date': '2024-07-26', 'close': 2.0}],
+            'MSFT': {'error': True, 'message': 'API rate limit exceeded'}
+        },
+        run_pipeline=lambda: {'AAPL': {'new_articles': 3}, 'TSLA': {'new_articles': 1}, 'META': {}}
+    )
+
+    results = runner.run()
+
+    assert results['stock_prices']['status'] == 'succeeded'
+    assert results['stock_prices']['rows'] == 2
+    assert results['news_sentiment']['status'] == 'succeeded'
+    assert results['news_sentiment']['rows'] == 4
+    assert sorted((run['job'], run['status']) for run in recorded.values()) == [
+        ('news_sentiment', 'succeeded'), ('stock_prices', 'succeeded')
+    ]
+
+
+def test_pipeline_error_is_recorded_as_failed(recorded):
+    # full_pipeline returns None after a fetch or API error
+    runner = make_runner(run_pipeline=lambda: None)
+
+    result = runner.run_job('news_sentiment')
+
+    assert result['status'] == 'failed'
+    assert 'RuntimeError' in result['error']
+    assert recorded[1]['status'] == 'failed'
+
+
+def test_fetcher_exception_is_recorded_as_failed(recorded):
+    def fetch_stocks(symbols):
+        raise ConnectionError("provider unreachable")
+
+    result = make_runner(fetch_stocks=fetch_stocks).run_job('stock_prices')
+
+    assert result['status'] == 'failed'
+    assert result['error'] == 'ConnectionError: provider unreachable'
+    assert recorded[1] == {'job': 'stock_prices', 'status': 'failed', 'rows': None,
+                           'error': 'ConnectionError: provider unreachable'}
+
+
+def test_quota_reached_skips_the_fetch(recorded):
+    def fetch_stocks(symbols):
+        raise AssertionError("must not fetch over quota")
+
+    runner = make_runner(fetch_stocks=fetch_stocks,
+                         get_usage=lambda: {'news_calls': 0, 'stock_calls': 10 ** 6})
+
+    result = runner.run_job('stock_prices')
+
+    assert result['status'] == 'succeeded'
+    assert result['rows'] == 0
+
+
+def test_overlapping_run_of_the_same_job_is_skipped(recorded):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_pipeline():
+        started.set()
+        release.wait(10)
+        return {'AAPL': {'new_articles': 1}}
+
+    runner = make_runner(run_pipeline=slow_pipeline)
+    first = {}
+    thread = threading.Thread(target=lambda: first.update(runner.run_job('news_sentiment')))
+    thread.start()
+    assert started.wait(10)
+
+    try:
+        second = runner.run_job('news_sentiment')
+        # A different job is not blocked by the held lock
+        other = runner.run_job('stock_prices')
+    finally:
+        release.set()
+        thread.join(10)
+
+    assert second['status'] == 'skipped'
+    assert second['error'] == 'previous run still in progress'
+    assert other['status'] == 'succeeded'
+    assert first['status'] == 'succeeded'
+    assert first['rows'] == 1
+    # Once the first run is done the job runs again
+    assert runner.run_job('news_sentiment')['status'] == 'succeeded'